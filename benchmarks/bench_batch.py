@@ -0,0 +1,55 @@
+# Expressionparse v0.2 -- Create syntax trees for mathematical expressions
+#
+# Copyright (C) 2025, Peter Beard <github@peterbeard.co>
+# 
+# This file is part of Expressionparse.
+# 
+# Expressionparse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# Expressionparse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
+
+# Compare per-row Tree.evaluate with Tree.evaluateBatch over NumPy arrays
+# Run from the repository root with: python benchmarks/bench_batch.py
+
+import os
+import sys
+import time
+
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import expressionparse
+
+EXPRESSION = 'x^2+y^2+x*y+3*x+4*y+5'
+LOOP_ROWS = 10000
+BATCH_ROWS = 1000000
+
+if __name__ == '__main__':
+    tree = expressionparse.Tree(EXPRESSION)
+    rng = numpy.random.default_rng(0)
+    xs = rng.random(BATCH_ROWS)
+    ys = rng.random(BATCH_ROWS)
+
+    start = time.perf_counter()
+    for x, y in zip(xs[:LOOP_ROWS].tolist(), ys[:LOOP_ROWS].tolist()):
+        tree.setVariable('x', x)
+        tree.setVariable('y', y)
+        tree.evaluate()
+    loop_time = (time.perf_counter() - start) / LOOP_ROWS
+
+    start = time.perf_counter()
+    tree.evaluateBatch(x=xs, y=ys)
+    batch_time = (time.perf_counter() - start) / BATCH_ROWS
+
+    print('%s' % EXPRESSION)
+    print('setVariable + evaluate  %9.1f ns/row' % (1e9 * loop_time))
+    print('evaluateBatch           %9.1f ns/row  speedup %.0fx' % (1e9 * batch_time, loop_time / batch_time))
@@ -0,0 +1,86 @@
+# Expressionparse v0.2 -- Create syntax trees for mathematical expressions
+#
+# Copyright (C) 2025, Peter Beard <github@peterbeard.co>
+# 
+# This file is part of Expressionparse.
+# 
+# Expressionparse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# Expressionparse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
+
+# Measure what estimating the cost of a tree and evaluating within a budget add to evaluation, and how long
+# rejecting pathological expressions takes
+# Run from the repository root with: python benchmarks/bench_budget.py
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import expressionparse
+
+REPEAT = 5
+PATHOLOGICAL = ['(9!)!', '((99!)!)!', '(10!)^(10!)', '9!^9!^9!', '(20!)!*x']
+
+
+# A random expression with the given number of terms, a few of them factorials
+def expression(count, seed=0):
+    generator = random.Random(seed)
+    operators = ['+', '-', '*', '/']
+    terms = ['(x*%d+%d)' % (generator.randint(1, 9), generator.randint(1, 9)) if generator.random() < 0.95
+             else '%d!' % generator.randint(1, 12) for _ in range(count)]
+    return terms[0] + ''.join(generator.choice(operators) + term for term in terms[1:])
+
+
+# The best time of a few calls to a function
+def best(function):
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+# Evaluate within a budget, returning the exception if the budget is exceeded
+def attempt(tree, budget):
+    try:
+        return tree.evaluate(budget)
+    except expressionparse.BudgetException as e:
+        return e
+
+
+if __name__ == '__main__':
+    budget = expressionparse.Budget(max_nodes=10 ** 7, max_depth=10 ** 7, max_bits=10 ** 5, max_seconds=60)
+    for count in [1000, 10000, 100000]:
+        tree = expressionparse.Tree(expression(count))
+        tree.setVariable('x', 1.5)
+        evaluate_time = best(tree.evaluate)
+        estimate_time = best(tree.estimateCost)
+        budget_time = best(lambda: tree.evaluate(budget))
+        print('%6d terms: evaluate %8.3f ms, estimateCost %8.3f ms (%5.1f%%), evaluate with budget %8.3f ms (%+5.1f%%)'
+              % (count, 1e3 * evaluate_time, 1e3 * estimate_time, 100 * estimate_time / evaluate_time,
+                 1e3 * budget_time, 100 * (budget_time / evaluate_time - 1)))
+    print()
+    for source in PATHOLOGICAL:
+        tree = expressionparse.Tree(source)
+        tree.setVariable('x', 2)
+        bits = tree.estimateCost()['bits']
+        rejected = best(lambda: attempt(tree, budget))
+        print('%-12s %14.4g bits, rejected in %7.3f ms' % (source, bits, 1e3 * rejected))
+    print()
+    # Without a budget, the time grows with the size of the factorial
+    for n in [10 ** 3, 10 ** 4, 10 ** 5]:
+        tree = expressionparse.Tree('(%d)!' % n)
+        print('(%d)! %9d bits, evaluated in %9.3f ms without a budget'
+              % (n, tree.estimateCost()['bits'], 1e3 * best(tree.evaluate)))
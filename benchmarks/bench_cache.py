@@ -0,0 +1,60 @@
+# Expressionparse v0.2 -- Create syntax trees for mathematical expressions
+#
+# Copyright (C) 2025, Peter Beard <github@peterbeard.co>
+# 
+# This file is part of Expressionparse.
+# 
+# Expressionparse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# Expressionparse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
+
+# Compare parsing a heavy-tailed stream of expressions with and without the parse cache
+# Run from the repository root with: python benchmarks/bench_cache.py
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import expressionparse
+
+DISTINCT = 2000
+REQUESTS = 20000
+MAXSIZE = 256
+
+
+# Generate a distinct expression for each index
+def makeExpression(i):
+    return '%dx^2 + %dy - (x+%d)*(y-%d)' % (i % 97 + 1, i % 89 + 1, i, i % 13)
+
+
+if __name__ == '__main__':
+    rng = random.Random(0)
+    # Zipf-like popularity: a few expressions are requested most of the time
+    weights = [1.0 / (i + 1) for i in range(DISTINCT)]
+    stream = [makeExpression(i) for i in rng.choices(range(DISTINCT), weights, k=REQUESTS)]
+
+    start = time.perf_counter()
+    for expression in stream:
+        expressionparse.Tree(expression)
+    uncached = time.perf_counter() - start
+
+    cache = expressionparse.enableParseCache(MAXSIZE)
+    start = time.perf_counter()
+    for expression in stream:
+        expressionparse.Tree(expression)
+    cached = time.perf_counter() - start
+    expressionparse.disableParseCache()
+
+    print('uncached %7.1f us/parse' % (1e6 * uncached / REQUESTS))
+    print('cached   %7.1f us/parse  speedup %.1fx  %r' % (1e6 * cached / REQUESTS, uncached / cached, cache.stats()))
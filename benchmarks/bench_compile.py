@@ -0,0 +1,47 @@
+# Expressionparse v0.2 -- Create syntax trees for mathematical expressions
+#
+# Copyright (C) 2025, Peter Beard <github@peterbeard.co>
+# 
+# This file is part of Expressionparse.
+# 
+# Expressionparse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# Expressionparse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
+
+# Compare Tree.evaluate with the function returned by Tree.compile
+# Run from the repository root with: python benchmarks/bench_compile.py
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import expressionparse
+
+EXPRESSIONS = [
+    'x+1',
+    '3x^2 + 2y - 4/(x+1)',
+    'x^2+y^2+x*y+3*x+4*y+5',
+    '(x+1)*(y-2)+x*y',
+]
+NUMBER = 20000
+
+if __name__ == '__main__':
+    for expression in EXPRESSIONS:
+        tree = expressionparse.Tree(expression)
+        tree.setVariable('x', 1.5)
+        tree.setVariable('y', 2.5)
+        f = tree.compile()
+        evaluate_time = timeit.timeit(tree.evaluate, number=NUMBER)
+        compiled_time = timeit.timeit(lambda: f(x=1.5, y=2.5), number=NUMBER)
+        print('%-30s evaluate %7.3f us  compiled %7.3f us  speedup %5.1fx' % (
+            expression, 1e6 * evaluate_time / NUMBER, 1e6 * compiled_time / NUMBER, evaluate_time / compiled_time))
@@ -0,0 +1,62 @@
+# Expressionparse v0.2 -- Create syntax trees for mathematical expressions
+#
+# Copyright (C) 2025, Peter Beard <github@peterbeard.co>
+# 
+# This file is part of Expressionparse.
+# 
+# Expressionparse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# Expressionparse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
+
+# Measure how factoring scales on generated sums of products with thousands of terms
+# Run from the repository root with: python benchmarks/bench_factor.py
+
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import expressionparse
+
+SEED = 1234
+REPEAT = 3
+
+
+# A sum of products of a variable and a small constant, e.g. x*3 - 2*y + ..., with the terms in a random order
+def sum_of_products(count, rng):
+    terms = []
+    for _ in range(count):
+        factors = [rng.choice(string.ascii_letters), str(rng.randint(1, 9))]
+        rng.shuffle(factors)
+        terms.append('*'.join(factors))
+    expression = terms[0]
+    for term in terms[1:]:
+        expression += rng.choice('+-') + term
+    return expression
+
+
+if __name__ == '__main__':
+    rng = random.Random(SEED)
+    for count in [1000, 4000, 16000, 64000]:
+        expression = sum_of_products(count, rng)
+        elapsed = 0
+        nodes = expressionparse.Tree(expression).estimateCost()['nodes']
+        for _ in range(REPEAT):
+            tree = expressionparse.Tree(expression)
+            start = time.perf_counter()
+            factored = tree.root.factor()
+            elapsed += time.perf_counter() - start
+        factored_nodes = expressionparse.estimateCost(factored)['nodes']
+        print('%6d terms: factor %9.2f ms (%5.2f us per node), %7d nodes -> %6d nodes'
+              % (count, 1e3 * elapsed / REPEAT, 1e6 * elapsed / REPEAT / nodes, nodes, factored_nodes))
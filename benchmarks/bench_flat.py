@@ -0,0 +1,51 @@
+# Expressionparse v0.2 -- Create syntax trees for mathematical expressions
+#
+# Copyright (C) 2025, Peter Beard <github@peterbeard.co>
+# 
+# This file is part of Expressionparse.
+# 
+# Expressionparse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# Expressionparse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
+
+# Compare evaluating a tree by walking its nodes with evaluating its flat form
+# Run from the repository root with: python benchmarks/bench_flat.py
+
+
+import os
+import pickle
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import expressionparse
+
+NUMBER = 5
+
+
+# A sum of terms that use every kind of operation, a few variables, and some constants
+def mixed(terms):
+    return '+'.join('x*%d.5-(y/%d)^2+z!' % (i, i + 1) for i in range(terms))
+
+
+if __name__ == '__main__':
+    for terms in [1000, 10000, 100000]:
+        tree = expressionparse.Tree(mixed(terms))
+        tree.setVariables({'x': 1.5, 'y': 2, 'z': 3})
+        flat = tree.freeze()
+        tree_time = timeit.timeit(tree.evaluate, number=NUMBER) / NUMBER
+        flat_time = timeit.timeit(flat.evaluate, number=NUMBER) / NUMBER
+        # Large node trees are too deep to pickle at all, so only the flat form is timed
+        data = pickle.dumps(flat, pickle.HIGHEST_PROTOCOL)
+        pickle_time = timeit.timeit(lambda: pickle.loads(pickle.dumps(flat, pickle.HIGHEST_PROTOCOL)), number=NUMBER) / NUMBER
+        print('%6d terms: evaluate %8.2f ms -> %8.2f ms (%4.1fx)  pickled %8.1f KB, round trip %6.2f ms' % (
+            terms, 1e3 * tree_time, 1e3 * flat_time, tree_time / flat_time, len(data) / 1024.0, 1e3 * pickle_time))
@@ -0,0 +1,71 @@
+# Expressionparse v0.2 -- Create syntax trees for mathematical expressions
+#
+# Copyright (C) 2025, Peter Beard <github@peterbeard.co>
+# 
+# This file is part of Expressionparse.
+# 
+# Expressionparse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# Expressionparse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
+
+# Compare computing a gradient with one reverse-mode sweep against finite differences, which evaluate the tree twice
+# per variable
+# Run from the repository root with: python benchmarks/bench_gradient.py
+
+import os
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import expressionparse
+
+REPEAT = 5
+STEP = 1e-6
+
+
+# A sum of terms using the first count variables
+def expression(count):
+    return '+'.join('(%s*%d+1)^2/(%s+2)' % (string.ascii_letters[i], i + 1, string.ascii_letters[i])
+                    for i in range(count))
+
+
+# Central finite differences for every variable
+def finite_differences(tree, variables):
+    gradient = {}
+    for name, value in variables.items():
+        tree.setVariable(name, value + STEP)
+        above = tree.evaluate()
+        tree.setVariable(name, value - STEP)
+        below = tree.evaluate()
+        tree.setVariable(name, value)
+        gradient[name] = (above - below) / (2 * STEP)
+    return gradient
+
+
+def timed(function):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        result = function()
+    return (time.perf_counter() - start) / REPEAT, result
+
+
+if __name__ == '__main__':
+    for count in [1, 8, 52]:
+        tree = expressionparse.Tree('+'.join([expression(count)] * (2000 // count)))
+        variables = dict((string.ascii_letters[i], 0.5 + i) for i in range(count))
+        tree.setVariables(variables)
+        reverse_time, (_, gradient) = timed(tree.gradient)
+        finite_time, approximation = timed(lambda: finite_differences(tree, variables))
+        error = max(abs(gradient[name] - approximation[name]) / max(1.0, abs(gradient[name])) for name in variables)
+        print('%2d variables: reverse mode %8.2f ms, finite differences %8.2f ms (%5.1fx), max relative difference %.1e'
+              % (count, 1e3 * reverse_time, 1e3 * finite_time, finite_time / reverse_time, error))
@@ -0,0 +1,82 @@
+# Expressionparse v0.2 -- Create syntax trees for mathematical expressions
+#
+# Copyright (C) 2025, Peter Beard <github@peterbeard.co>
+# 
+# This file is part of Expressionparse.
+# 
+# Expressionparse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# Expressionparse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
+
+# Measure comparing large trees that differ only near the end, and deduplicating subtrees with a set
+# Run from the repository root with: python benchmarks/bench_hash.py
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import expressionparse
+
+REPEAT = 100
+
+
+# Return the products in a tree
+def products(root):
+    found = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, expressionparse.Times):
+            found.append(node)
+        if isinstance(node, expressionparse.Operation):
+            stack.extend(child for child in (node.left, node.right) if child is not None)
+    return found
+
+
+# Compare nodes the way Operation.__eq__ did before it had a hash to check
+def deep_equal(node, other):
+    stack = [(node, other)]
+    while stack:
+        node, other = stack.pop()
+        if isinstance(node, expressionparse.Operation):
+            if type(other) != type(node):
+                return False
+            stack.append((node.right, other.right))
+            stack.append((node.left, other.left))
+        elif not (node == other):
+            return False
+    return True
+
+
+def timed(function, *arguments):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        function(*arguments)
+    return (time.perf_counter() - start) / REPEAT
+
+
+if __name__ == '__main__':
+    for count in [1000, 10000, 100000]:
+        terms = ['(x*%d+y)' % (i % 10) for i in range(count)]
+        left = expressionparse.Tree('+'.join(terms) + '+1').root
+        right = expressionparse.Tree('+'.join(terms) + '+2').root
+        start = time.perf_counter()
+        hash(left), hash(right)
+        first = time.perf_counter() - start
+        print('%6d terms: first hash %8.2f ms, unequal trees: deep compare %8.3f ms, hashed compare %8.4f ms'
+              % (count, 1e3 * first, 1e3 * timed(deep_equal, left, right), 1e3 * timed(left.__eq__, right)))
+        subtrees = products(left)
+        start = time.perf_counter()
+        distinct = len(set(subtrees))
+        print('              %d products deduplicated to %d in %.2f ms'
+              % (len(subtrees), distinct, 1e3 * (time.perf_counter() - start)))
@@ -0,0 +1,75 @@
+# Expressionparse v0.2 -- Create syntax trees for mathematical expressions
+#
+# Copyright (C) 2025, Peter Beard <github@peterbeard.co>
+# 
+# This file is part of Expressionparse.
+# 
+# Expressionparse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# Expressionparse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
+
+# Compare evaluating a tree from scratch with incremental evaluation when one variable changes per step
+# Run from the repository root with: python benchmarks/bench_incremental.py
+
+import os
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import expressionparse
+
+STEPS = 200
+NAMES = string.ascii_letters
+
+
+# The terms of a sum, each using one of the variables
+def terms(count):
+    return ['(%s*%d+1)^2' % (NAMES[i % len(NAMES)], i) for i in range(count)]
+
+
+# A sum parsed left to right, so the additions form a long chain
+def chained(count):
+    return '+'.join(terms(count))
+
+
+# A sum with parentheses that make the additions a balanced tree
+def balanced(count):
+    parts = terms(count)
+    while len(parts) > 1:
+        parts = ['(' + '+'.join(parts[i:i + 2]) + ')' for i in range(0, len(parts), 2)]
+    return parts[0]
+
+
+# Change one variable per step and evaluate, returning the time per step and the average number of recomputed nodes
+def run(tree, evaluate):
+    recomputed = 0
+    start = time.perf_counter()
+    for step in range(STEPS):
+        tree.setVariable(NAMES[step % len(NAMES)], step)
+        evaluate()
+        recomputed += tree.recomputed
+    return (time.perf_counter() - start) / STEPS, recomputed / float(STEPS)
+
+
+if __name__ == '__main__':
+    for name, generator in [('chained', chained), ('balanced', balanced)]:
+        for count in [1000, 10000]:
+            tree = expressionparse.Tree(generator(count))
+            tree.setVariables(dict((variable, 1) for variable in NAMES))
+            operations = tree.estimateCost()['operations']
+            tree.evaluateIncremental()
+            full_time, _ = run(tree, tree.evaluate)
+            incremental_time, recomputed = run(tree, tree.evaluateIncremental)
+            print('%-8s %6d terms: evaluate %8.3f ms, incremental %8.3f ms (%5.1fx), %7.0f of %d operations recomputed'
+                  % (name, count, 1e3 * full_time, 1e3 * incremental_time, full_time / incremental_time, recomputed,
+                     operations))
@@ -0,0 +1,68 @@
+# Expressionparse v0.2 -- Create syntax trees for mathematical expressions
+#
+# Copyright (C) 2025, Peter Beard <github@peterbeard.co>
+# 
+# This file is part of Expressionparse.
+# 
+# Expressionparse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# Expressionparse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
+
+# Measure how many bytes each node of a parsed tree takes up
+# Run from the repository root with: python benchmarks/bench_memory.py
+
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import expressionparse
+
+
+# A sum of terms that use every kind of operation, a few variables, and some constants
+def mixed(terms):
+    return '+'.join('x*%d.5-(y/%d)^2+z!' % (i, i + 1) for i in range(terms))
+
+
+# Count the nodes in a tree
+def count(root):
+    nodes = 0
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        nodes += 1
+        if isinstance(node, expressionparse.Operation):
+            stack.extend(child for child in (node.left, node.right) if child is not None)
+    return nodes
+
+
+# Parse an expression and return the tree and the memory it takes up
+def measure(expression):
+    gc.collect()
+    tracemalloc.start()
+    tree = expressionparse.Tree(expression)
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return tree, size
+
+
+if __name__ == '__main__':
+    for terms in [1000, 10000, 100000]:
+        tree, size = measure(mixed(terms))
+        nodes = count(tree.root)
+        print('%6d terms: %8d nodes, %10.1f KB, %6.1f bytes/node' % (terms, nodes, size / 1024.0, size / float(nodes)))
+    print('')
+    print('Bytes per node by type:')
+    for name, entry in sorted(tree.memoryFootprint().items()):
+        print('  %-10s %8d nodes %6.1f bytes/node' % (name, entry['count'], entry['bytes'] / float(entry['count'])))
@@ -0,0 +1,67 @@
+# Expressionparse v0.2 -- Create syntax trees for mathematical expressions
+#
+# Copyright (C) 2025, Peter Beard <github@peterbeard.co>
+# 
+# This file is part of Expressionparse.
+# 
+# Expressionparse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# Expressionparse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
+
+# Compare the depth, memory use, and evaluation time of long chains of additions before and after Tree.flatten
+# Run from the repository root with: python benchmarks/bench_nary.py
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import expressionparse
+
+REPEATS = 20
+
+
+# A sum of variables, a single long chain of additions
+def chain(count):
+    return '+'.join(['x', 'y'] * (count // 2))
+
+
+# A sum of products, so the tree has one long chain of additions and many short chains of multiplications
+def products(count):
+    return '+'.join('%d*x*y' % i for i in range(count))
+
+
+# The average time to evaluate a tree
+def evaluate(tree):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        tree.evaluate()
+    return (time.perf_counter() - start) / REPEATS
+
+
+if __name__ == '__main__':
+    for name, generator in [('chain', chain), ('products', products)]:
+        for count in [1000, 10000, 50000]:
+            tree = expressionparse.Tree(generator(count))
+            tree.setVariables({'x': 1.5, 'y': 2})
+            flat = tree.copy()
+            start = time.perf_counter()
+            removed = flat.flatten()
+            flatten_time = time.perf_counter() - start
+            binary_bytes = sum(entry['bytes'] for entry in tree.memoryFootprint().values())
+            flat_bytes = sum(entry['bytes'] for entry in flat.memoryFootprint().values())
+            binary_time = evaluate(tree)
+            flat_time = evaluate(flat)
+            print('%-8s %6d terms: flatten %8.2f ms (%d operations removed), depth %6d -> %d, %9d -> %9d bytes, '
+                  'evaluate %8.2f -> %8.2f ms (%4.1fx)'
+                  % (name, count, 1e3 * flatten_time, removed, tree.estimateCost()['depth'], flat.estimateCost()['depth'], binary_bytes,
+                     flat_bytes, 1e3 * binary_time, 1e3 * flat_time, binary_time / flat_time))
@@ -0,0 +1,63 @@
+# Expressionparse v0.2 -- Create syntax trees for mathematical expressions
+#
+# Copyright (C) 2025, Peter Beard <github@peterbeard.co>
+# 
+# This file is part of Expressionparse.
+# 
+# Expressionparse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# Expressionparse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
+
+# Compare parsing the same expressions written in Infix, Polish, and Reverse Polish Notation, and evaluating Reverse
+# Polish Notation directly without building a tree
+# Run from the repository root with: python benchmarks/bench_notation.py
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import expressionparse
+
+VARIABLES = {'x': 1.5, 'y': 2}
+
+
+# A sum of terms that use every kind of operation
+def mixed(terms):
+    return '+'.join('x*%d.5-(y/%d)^2+%d!' % (i, i + 1, i % 7) for i in range(terms))
+
+
+# Time a function, returning the elapsed time in milliseconds
+def timed(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return 1e3 * (time.perf_counter() - start)
+
+
+# Parse an expression and evaluate the tree
+def parseAndEvaluate(expression):
+    tree = expressionparse.Tree(expression)
+    tree.setVariables(VARIABLES)
+    return tree.evaluate()
+
+
+if __name__ == '__main__':
+    tree = expressionparse.Tree()
+    for terms in [1000, 10000, 100000]:
+        infix = mixed(terms)
+        polish = expressionparse.Tree(infix).toPolishNotation()
+        reverse = expressionparse.Tree(infix).toReversePolishNotation()
+        print('%6d terms: parse infix %8.1f ms, polish %8.1f ms, reverse polish %8.1f ms' % (
+            terms, timed(tree.parseInfixNotation, infix), timed(tree.parsePolishNotation, polish),
+            timed(tree.parseReversePolishNotation, reverse)))
+        print('              parse and evaluate infix %8.1f ms, evaluate reverse polish directly %8.1f ms' % (
+            timed(parseAndEvaluate, infix), timed(expressionparse.evaluateReversePolishNotation, reverse, VARIABLES)))
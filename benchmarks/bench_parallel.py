@@ -0,0 +1,48 @@
+# Expressionparse v0.2 -- Create syntax trees for mathematical expressions
+#
+# Copyright (C) 2025, Peter Beard <github@peterbeard.co>
+# 
+# This file is part of Expressionparse.
+# 
+# Expressionparse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# Expressionparse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
+
+# Measure how evaluating one tree over a large table of variable values scales with the number of worker processes
+# Run from the repository root with: python benchmarks/bench_parallel.py [rows]
+
+import array
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import expressionparse
+
+WORKERS = [1, 2, 4, 8]
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    random.seed(0)
+    xs = array.array('d', (random.uniform(0, 10) for _ in range(rows)))
+    ys = array.array('d', (random.uniform(-5, 5) for _ in range(rows)))
+    tree = expressionparse.Tree('3x^2 + 2y - 4/(x+1) + (x-y)^3/7')
+    print('%d rows, %d CPUs' % (rows, os.cpu_count()))
+    baseline = None
+    for workers in WORKERS:
+        start = time.perf_counter()
+        tree.evaluateParallel(workers=workers, x=xs, y=ys)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print('%d workers: %8.2f s  %10.0f rows/s  speedup %4.2fx' % (workers, elapsed, rows / elapsed, baseline / elapsed))
@@ -0,0 +1,51 @@
+# Expressionparse v0.2 -- Create syntax trees for mathematical expressions
+#
+# Copyright (C) 2025, Peter Beard <github@peterbeard.co>
+# 
+# This file is part of Expressionparse.
+# 
+# Expressionparse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# Expressionparse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
+
+# Measure infix parsing time on deeply nested and parenthesis-heavy expressions
+# Run from the repository root with: python benchmarks/bench_parse.py
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import expressionparse
+
+SIZES = [1000, 10000, 100000]
+
+
+# A single value wrapped in n sets of parentheses, e.g. ((((1))))
+def nested(n):
+    return '(' * n + '1' + ')' * n
+
+
+# A sum of n parenthesised terms, e.g. (1+x)+(2+x)+...
+def parenthesisedSum(n):
+    return '+'.join('(%d*x+1)' % i for i in range(n))
+
+
+if __name__ == '__main__':
+    for name, generator in [('nested', nested), ('parenthesised sum', parenthesisedSum)]:
+        for size in SIZES:
+            expression = generator(size)
+            start = time.perf_counter()
+            expressionparse.Tree(expression)
+            elapsed = time.perf_counter() - start
+            print('%-18s n=%-7d %9.1f ms  %6.2f us/char' % (
+                name, size, 1e3 * elapsed, 1e6 * elapsed / len(expression)))
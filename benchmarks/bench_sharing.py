@@ -0,0 +1,65 @@
+# Expressionparse v0.2 -- Create syntax trees for mathematical expressions
+#
+# Copyright (C) 2025, Peter Beard <github@peterbeard.co>
+# 
+# This file is part of Expressionparse.
+# 
+# Expressionparse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# Expressionparse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
+
+# Measure the memory and evaluation time saved by sharing identical subtrees
+# Run from the repository root with: python benchmarks/bench_sharing.py
+
+import gc
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import expressionparse
+
+NUMBER = 20
+
+
+# A sum of terms that repeat the same few subexpressions
+def repetitive(terms):
+    return '+'.join('(x+1)^2*(x+1)^3 + (x+1)*(y-%d)' % (i % 5) for i in range(terms))
+
+
+# Parse an expression and return the tree and the memory it takes up
+def measure(expression, share):
+    gc.collect()
+    tracemalloc.start()
+    tree = expressionparse.Tree(expression)
+    if share:
+        tree.shareSubtrees()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return tree, size
+
+
+if __name__ == '__main__':
+    for terms in [100, 1000, 10000]:
+        expression = repetitive(terms)
+        results = []
+        for share in (False, True):
+            tree, size = measure(expression, share)
+            tree.setVariables({'x': 1.5, 'y': 2})
+            elapsed = timeit.timeit(tree.evaluate, number=NUMBER) / NUMBER
+            results.append((size, elapsed))
+        (tree_size, tree_time), (dag_size, dag_time) = results
+        print('%6d terms: memory %8.1f KB -> %8.1f KB (%4.1fx)  evaluate %8.2f ms -> %8.2f ms (%4.1fx)' % (
+            terms, tree_size / 1024.0, dag_size / 1024.0, tree_size / float(dag_size),
+            1e3 * tree_time, 1e3 * dag_time, tree_time / dag_time))
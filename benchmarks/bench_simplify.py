@@ -0,0 +1,79 @@
+# Expressionparse v0.2 -- Create syntax trees for mathematical expressions
+#
+# Copyright (C) 2025, Peter Beard <github@peterbeard.co>
+# 
+# This file is part of Expressionparse.
+# 
+# Expressionparse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# Expressionparse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
+
+# Compare simplify with the previous implementation, which evaluated the whole node and recursed into its children
+# whenever that failed, on deep trees that mix constant subtrees and variables
+# Run from the repository root with: python benchmarks/bench_simplify.py
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import expressionparse
+
+REPEAT = 3
+
+
+# The previous implementation of simplify, for comparison
+def previous_simplify(node):
+    if not node or not isinstance(node, expressionparse.Node):
+        return node
+    try:
+        return node.evaluate()
+    except expressionparse.EvalException:
+        if isinstance(node, expressionparse.Operation):
+            lvalue = previous_simplify(node.left) if node.left else node.left
+            rvalue = previous_simplify(node.right) if node.right else node.right
+            new_node = type(node)()
+            new_node.left = lvalue
+            new_node.right = rvalue
+            return new_node
+        return node
+
+
+# A chain of depth operations where every level has a small constant subtree on the left and the only variable is at
+# the bottom of the chain, so evaluating any level walks all of the constants below it before failing
+def deep_tree(depth):
+    words = ['x']
+    for i in range(depth):
+        words = ['%d 2 * 1 -' % (i % 7 + 1)] + words + ['+' if i % 2 else '*']
+    tree = expressionparse.Tree()
+    tree.parseReversePolishNotation(' '.join(words))
+    return tree
+
+
+def timed(function, node):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        function(node)
+    return (time.perf_counter() - start) / REPEAT
+
+
+if __name__ == '__main__':
+    sys.setrecursionlimit(100000)
+    for depth in [100, 500, 2000, 20000]:
+        tree = deep_tree(depth)
+        current = timed(expressionparse.simplify, tree.root)
+        if depth <= 2000:
+            previous = timed(previous_simplify, tree.root)
+            print('depth %6d: simplify %9.2f ms, previous %9.2f ms (%6.1fx)'
+                  % (depth, 1e3 * current, 1e3 * previous, previous / current))
+        else:
+            print('depth %6d: simplify %9.2f ms' % (depth, 1e3 * current))
@@ -0,0 +1,73 @@
+# Expressionparse v0.2 -- Create syntax trees for mathematical expressions
+#
+# Copyright (C) 2025, Peter Beard <github@peterbeard.co>
+# 
+# This file is part of Expressionparse.
+# 
+# Expressionparse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# Expressionparse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
+
+# Compare loading a library of formulas from an expression store with parsing them again
+# Run from the repository root with: python benchmarks/bench_store.py [formulas]
+
+import gc
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import expressionparse
+
+
+# A random formula with the given number of terms
+def formula(terms):
+    parts = []
+    for i in range(terms):
+        parts.append(random.choice(['%d.5*x', '(y-%d)^2', '%d/(x+y)', 'x^%d', '(z+%d)!']) % random.randint(1, 9))
+    return random.choice('+-').join(parts)
+
+
+# Time a function, returning its result and the elapsed time in seconds
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    random.seed(0)
+    expressions = [formula(random.randint(1, 20)) for _ in range(count)]
+    path = os.path.join(tempfile.mkdtemp(), 'formulas.store')
+    expressionparse.ExpressionStore.write(path, expressions)
+    # Each measurement starts without any trees in memory, like a process that's just starting up
+    trees, parse_time = timed(lambda: [expressionparse.Tree(expression) for expression in expressions])
+    del trees
+    gc.collect()
+    store, open_time = timed(expressionparse.ExpressionStore, path)
+    _, flat_time = timed(lambda: [store.getFlatTree(i) for i in range(len(store))])
+    gc.collect()
+    _, load_time = timed(lambda: list(store))
+    _, single_time = timed(lambda: store[count // 2])
+    store.close()
+    text = sum(len(expression) for expression in expressions)
+    print('%d formulas, %d bytes of text, %d bytes in the store' % (count, text, os.path.getsize(path)))
+    print('parse everything:           %8.2f s' % parse_time)
+    print('open the store:             %8.2f ms' % (1e3 * open_time))
+    print('decode one tree:            %8.3f ms' % (1e3 * single_time))
+    print('decode every flat tree:     %8.2f s (%5.1fx faster than parsing)' % (flat_time, parse_time / flat_time))
+    print('decode every tree:          %8.2f s (%5.1fx faster than parsing)' % (load_time, parse_time / load_time))
+    os.remove(path)
+    os.rmdir(os.path.dirname(path))
@@ -0,0 +1,347 @@
+# Expressionparse v0.2 -- Create syntax trees for mathematical expressions
+#
+# Copyright (C) 2025, Peter Beard <github@peterbeard.co>
+# 
+# This file is part of Expressionparse.
+# 
+# Expressionparse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# Expressionparse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
+
+# Time every stage of the pipeline (tokenizing, parsing, evaluating, setting variables, simplifying with all or half of
+# the variables bound, factoring, and writing each notation) on seeded synthetic expressions of several shapes and
+# sizes, and save the results as JSON.
+# A saved run can be used as a baseline: compare mode reports the operations that got slower than the baseline.
+# Running with --profile enables expressionparse's profiler, so comparing against a run without it shows what profiling
+# costs. The hooks command times every operation with profiling disabled and on a copy of expressionparse with the
+# profiling hooks taken out, and reports the ratio, which is what the disabled hooks cost.
+# Run from the repository root with: python benchmarks/bench_suite.py run -o results.json
+#                               and: python benchmarks/bench_suite.py compare baseline.json results.json
+#                               and: python benchmarks/bench_suite.py hooks
+
+import argparse
+import ast
+import json
+import math
+import os
+import platform
+import random
+import string
+import sys
+import time
+import types
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import expressionparse
+
+SEED = 1234
+SIZES = [100, 1000, 10000]
+REPEAT = 5
+MIN_TIME = 0.02		# Each sample calls the operation enough times to take at least this many seconds
+THRESHOLD = 0.2		# Operations that take this much longer than the baseline (as a fraction) are slowdowns
+NAMES = string.ascii_letters
+FORMAT = 1
+HOOKS = ('_profiler', 'profiler', 'counts')	# Names that the profiling hooks check against None
+
+
+# Expression generators
+# Each one takes the number of terms and a random number generator, and returns an expression that can be evaluated
+# once every variable in NAMES is set to a positive value. Every generator is called with a generator seeded from SEED
+# and the size, so the expressions are the same on every run.
+
+# A long flat sum of short terms using every kind of operation
+def wide(size, rng):
+    terms = []
+    for _ in range(size):
+        terms.append(rng.choice(['%d*x', '%d.5/y', '(x+%d)^2', '%d!']) % rng.randint(1, 9))
+    return _join(terms, rng)
+
+
+# Operations nested inside each other, so the tree is about as deep as the number of terms
+def deep(size, rng):
+    expression = 'x'
+    for _ in range(size):
+        operator = rng.choice('+-*/')
+        if rng.random() < 0.5:
+            expression = '(%s)%s%d' % (expression, operator, rng.randint(1, 9))
+        else:
+            expression = '%d%s(%s)' % (rng.randint(1, 9), operator, expression)
+    return expression
+
+
+# Terms wrapped in several redundant sets of parentheses
+def parenthesised(size, rng):
+    terms = []
+    for _ in range(size):
+        depth = rng.randint(1, 4)
+        terms.append('(' * depth + '%d*(x-%d)' % (rng.randint(1, 9), rng.randint(1, 9)) + ')' * depth)
+    return _join(terms, rng)
+
+
+# Terms that mostly consist of variables, using every variable name
+def variables(size, rng):
+    terms = []
+    for _ in range(size):
+        terms.append(''.join(rng.choice(NAMES) for _ in range(rng.randint(1, 3))))
+    return _join(terms, rng)
+
+
+# Products of variables that share factors, so factoring finds something to do
+def factorable(size, rng):
+    common = NAMES[:4]
+    terms = []
+    for _ in range(size):
+        factors = [rng.choice(common), rng.choice(NAMES), str(rng.randint(1, 9))]
+        rng.shuffle(factors)
+        terms.append('*'.join(factors))
+    return _join(terms, rng)
+
+
+# Join terms with random additions and subtractions
+def _join(terms, rng):
+    expression = terms[0]
+    for term in terms[1:]:
+        expression += rng.choice('+-') + term
+    return expression
+
+
+GENERATORS = [('wide', wide), ('deep', deep), ('parenthesised', parenthesised), ('variables', variables),
+              ('factorable', factorable)]
+
+
+# Return the operations to time on an expression, as (name, setup, function) where function is called with the value
+# returned by setup. Only the time spent in function is measured.
+def operations(expression, module=expressionparse):
+    tree = module.Tree(expression)
+    values = dict((name, 1 + i / 10.0) for i, name in enumerate(NAMES))
+    tree.setVariables(values)
+    index = sorted(tree.getVariableIndex())
+    # Every other variable is left unbound, so only part of the tree can be simplified away
+    partial = module.Tree(expression)
+    partial.setVariables(dict((name, values[name]) for name in index[::2]))
+
+    # Set each variable in the tree
+    def setVariables(tree):
+        for name in index:
+            tree.setVariable(name, values[name])
+
+    return [
+        ('tokenize', None, lambda _: module.Tokenizer(expression)),
+        ('parse', module.Tree, lambda empty: empty.parseInfixNotation(expression)),
+        ('evaluate', None, lambda _: tree.evaluate()),
+        ('setVariable', None, lambda _: setVariables(tree)),
+        ('simplify', None, lambda _: module.simplify(tree.root)),
+        ('simplifyPartial', None, lambda _: module.simplify(partial.root)),
+        ('factor', lambda: tree.root.copy(), lambda root: root.factor()),
+        ('infix', None, lambda _: tree.toInfixNotation()),
+        ('polish', None, lambda _: tree.toPolishNotation()),
+        ('reversePolish', None, lambda _: tree.toReversePolishNotation()),
+    ]
+
+
+# Return the best time per call of a function over several samples
+def measure(setup, function, repeat):
+    calls = 1
+    best = None
+    for _ in range(repeat):
+        while True:
+            elapsed = 0
+            for _ in range(calls):
+                argument = setup() if setup else None
+                start = time.perf_counter()
+                function(argument)
+                elapsed += time.perf_counter() - start
+            if elapsed >= MIN_TIME or calls >= 1 << 20:
+                break
+            # Too short to measure reliably, so try again with more calls
+            calls = max(calls * 2, int(calls * MIN_TIME / max(elapsed, 1e-9)))
+        if best is None or elapsed / calls < best:
+            best = elapsed / calls
+    return best
+
+
+# Run the benchmarks and return the results as a dictionary that can be saved as JSON
+# With hooks=False the benchmarks run on a copy of expressionparse with the profiling hooks taken out
+def run(sizes=SIZES, repeat=REPEAT, seed=SEED, generators=None, operationNames=None, profile=False, log=None,
+        hooks=True):
+    if profile and not hooks:
+        raise ValueError('Cannot profile without the profiling hooks.')
+    module = expressionparse if hooks else withoutHooks()
+    if profile:
+        expressionparse.enableProfiling()
+    try:
+        results = _run(sizes, repeat, seed, generators, operationNames, log, module)
+    finally:
+        if profile:
+            expressionparse.disableProfiling()
+    return {'format': FORMAT, 'python': platform.python_version(), 'implementation': platform.python_implementation(),
+            'machine': platform.machine(), 'seed': seed, 'repeat': repeat, 'profile': profile, 'hooks': hooks,
+            'results': results}
+
+
+# Run the benchmarks and return the list of measurements
+def _run(sizes, repeat, seed, generators, operationNames, log, module=expressionparse):
+    results = []
+    for name, generator in GENERATORS:
+        if generators and name not in generators:
+            continue
+        for size in sizes:
+            expression = generator(size, random.Random('%d-%s-%d' % (seed, name, size)))
+            nodes = module.Tree(expression).estimateCost()['nodes']
+            for operation, setup, function in operations(expression, module):
+                if operationNames and operation not in operationNames:
+                    continue
+                seconds = measure(setup, function, repeat)
+                results.append({'generator': name, 'size': size, 'operation': operation, 'nodes': nodes,
+                                'seconds': seconds})
+                if log:
+                    log('%-13s %6d terms %7d nodes  %-15s %10.3f ms  %7.3f us/node'
+                        % (name, size, nodes, operation, 1e3 * seconds, 1e6 * seconds / nodes))
+    return results
+
+
+# Return a copy of expressionparse with the profiling hooks taken out: every if statement or conditional expression
+# whose condition checks that one of the names in HOOKS is not None is replaced with its else branch, so only the code that runs while profiling is
+# disabled is left, without the checks
+def withoutHooks():
+    path = expressionparse.__file__
+    with open(path) as f:
+        tree = ast.parse(f.read(), path)
+    tree = ast.fix_missing_locations(_HookRemover().visit(tree))
+    module = types.ModuleType('expressionparse_without_hooks')
+    module.__file__ = path
+    exec(compile(tree, path, 'exec'), module.__dict__)
+    return module
+
+
+# Replaces the profiling hooks with their else branches
+class _HookRemover(ast.NodeTransformer):
+    def visit_If(self, node):
+        self.generic_visit(node)
+        if not any(_isHook(test) for test in ast.walk(node.test)):
+            return node
+        return node.orelse or ast.copy_location(ast.Pass(), node)
+
+    def visit_IfExp(self, node):
+        self.generic_visit(node)
+        if not any(_isHook(test) for test in ast.walk(node.test)):
+            return node
+        return node.orelse
+
+
+# Whether an expression checks that one of the names in HOOKS is not None
+def _isHook(node):
+    return (isinstance(node, ast.Compare) and isinstance(node.left, ast.Name) and node.left.id in HOOKS
+            and len(node.ops) == 1 and isinstance(node.ops[0], ast.IsNot)
+            and isinstance(node.comparators[0], ast.Constant) and node.comparators[0].value is None)
+
+
+# Compare two runs, returning (key, baseline seconds, current seconds, ratio) for every measurement they have in common
+# and the list of keys of the measurements that got slower by more than the threshold
+def compare(baseline, current, threshold=THRESHOLD):
+    if baseline.get('format') != FORMAT or current.get('format') != FORMAT:
+        raise ValueError('Unsupported benchmark result format.')
+    old = dict((_key(result), result['seconds']) for result in baseline['results'])
+    rows = []
+    slower = []
+    for result in current['results']:
+        key = _key(result)
+        if key not in old:
+            continue
+        ratio = result['seconds'] / old[key]
+        rows.append((key, old[key], result['seconds'], ratio))
+        if ratio > 1 + threshold:
+            slower.append(key)
+    return rows, slower
+
+
+# The key that identifies a measurement in a run
+def _key(result):
+    return '%s/%d/%s' % (result['generator'], result['size'], result['operation'])
+
+
+# Load a run saved as JSON
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+# Print a comparison and return the exit status: 1 if anything got slower, otherwise 0
+def report(baseline, current, threshold):
+    rows, slower = compare(baseline, current, threshold)
+    for key, old, new, ratio in rows:
+        print('%-40s %10.3f ms -> %10.3f ms  %5.2fx%s'
+              % (key, 1e3 * old, 1e3 * new, ratio, '  SLOWER' if key in slower else ''))
+    print('%d of %d measurements got more than %d%% slower' % (len(slower), len(rows), round(100 * threshold)))
+    if rows:
+        print('geometric mean ratio %.3fx' % math.exp(sum(math.log(row[3]) for row in rows) / len(rows)))
+    return 1 if slower else 0
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(prog='python benchmarks/bench_suite.py')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    run_parser = commands.add_parser('run', help='run the benchmarks')
+    run_parser.add_argument('-o', '--output', help='file to save the results to as JSON (default: standard output)')
+    run_parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help='numbers of terms to generate')
+    run_parser.add_argument('--repeat', type=int, default=REPEAT, help='number of samples to take the best of')
+    run_parser.add_argument('--seed', type=int, default=SEED, help='seed for the expression generators')
+    run_parser.add_argument('--generators', nargs='+', choices=[name for name, _ in GENERATORS],
+                            help='only use these generators')
+    run_parser.add_argument('--operations', nargs='+', help='only time these operations')
+    run_parser.add_argument('--profile', action='store_true', help='run with profiling enabled')
+    run_parser.add_argument('--baseline', help='compare the results to a saved run')
+    run_parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                            help='fraction by which an operation has to get slower to be reported')
+
+    hooks_parser = commands.add_parser('hooks', help='compare running with profiling disabled against running with the '
+                                       'profiling hooks taken out, to show what the disabled hooks cost')
+    hooks_parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help='numbers of terms to generate')
+    hooks_parser.add_argument('--repeat', type=int, default=REPEAT, help='number of samples to take the best of')
+    hooks_parser.add_argument('--seed', type=int, default=SEED, help='seed for the expression generators')
+    hooks_parser.add_argument('--generators', nargs='+', choices=[name for name, _ in GENERATORS],
+                              help='only use these generators')
+    hooks_parser.add_argument('--operations', nargs='+', help='only time these operations')
+    hooks_parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                              help='fraction by which an operation has to get slower to be reported')
+
+    compare_parser = commands.add_parser('compare', help='compare two saved runs')
+    compare_parser.add_argument('baseline', help='the saved run to compare against')
+    compare_parser.add_argument('current', help='the saved run to compare')
+    compare_parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                                help='fraction by which an operation has to get slower to be reported')
+
+    arguments = parser.parse_args(arguments)
+    if arguments.command == 'compare':
+        return report(load(arguments.baseline), load(arguments.current), arguments.threshold)
+    if arguments.command == 'hooks':
+        runs = [run(arguments.sizes, arguments.repeat, arguments.seed, arguments.generators, arguments.operations,
+                    log=lambda line: print(line, file=sys.stderr), hooks=hooks) for hooks in (False, True)]
+        return report(runs[0], runs[1], arguments.threshold)
+
+    results = run(arguments.sizes, arguments.repeat, arguments.seed, arguments.generators, arguments.operations,
+                  arguments.profile, log=lambda line: print(line, file=sys.stderr))
+    if arguments.output:
+        with open(arguments.output, 'w') as f:
+            json.dump(results, f, indent=1)
+    else:
+        json.dump(results, sys.stdout, indent=1)
+        print()
+    if arguments.baseline:
+        return report(load(arguments.baseline), results, arguments.threshold)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
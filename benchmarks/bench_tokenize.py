@@ -0,0 +1,78 @@
+# Expressionparse v0.2 -- Create syntax trees for mathematical expressions
+#
+# Copyright (C) 2025, Peter Beard <github@peterbeard.co>
+# 
+# This file is part of Expressionparse.
+# 
+# Expressionparse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# Expressionparse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
+
+# Measure tokenizer throughput and peak memory on large generated expressions
+# Run from the repository root with: python benchmarks/bench_tokenize.py
+
+import io
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import expressionparse
+
+SIZES = [1 << 20, 4 << 20]
+
+
+# Generate an expression of at least the given number of characters
+def makeExpression(size, seed=0):
+    rng = random.Random(seed)
+    parts = []
+    length = 0
+    while length < size:
+        part = '%d.%dx^2 + 3y(%d-z) - %d/(x+1)' % (
+            rng.randint(1, 999), rng.randint(0, 99), rng.randint(1, 99), rng.randint(1, 99))
+        parts.append(part)
+        length += len(part) + 3
+    return ' + '.join(parts)
+
+
+# Run a function and return its wall time and peak traced memory
+def measure(function):
+    tracemalloc.start()
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+# Consume a token stream without keeping the tokens
+def drain(tokens):
+    for token in tokens:
+        pass
+
+
+if __name__ == '__main__':
+    for size in SIZES:
+        expression = makeExpression(size)
+        megabytes = len(expression) / float(1 << 20)
+        cases = [
+            ('Tokenizer (token list)', lambda: expressionparse.Tokenizer(expression)),
+            ('tokenize(str)', lambda: drain(expressionparse.tokenize(expression))),
+            ('tokenize(file)', lambda: drain(expressionparse.tokenize(io.StringIO(expression)))),
+        ]
+        for name, function in cases:
+            elapsed, peak = measure(function)
+            print('%5.1f MB  %-24s %6.2f MB/s  peak %8.1f MB' % (
+                megabytes, name, megabytes / elapsed, peak / float(1 << 20)))
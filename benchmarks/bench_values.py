@@ -0,0 +1,71 @@
+# Expressionparse v0.2 -- Create syntax trees for mathematical expressions
+#
+# Copyright (C) 2025, Peter Beard <github@peterbeard.co>
+# 
+# This file is part of Expressionparse.
+# 
+# Expressionparse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# Expressionparse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
+
+# Measure the cost of evaluating numeric literals and assigning values to variables
+# Run from the repository root with: python benchmarks/bench_values.py
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import expressionparse
+
+NUMBER = 5
+
+
+# A sum of terms that are mostly constants
+def constants(terms):
+    return '+'.join('%d.25*%d-%d/8' % (i, i + 1, i + 2) for i in range(terms))
+
+
+# Return the numeric literals in a tree
+def literals(root):
+    values = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, expressionparse.Value):
+            values.append(node)
+        elif isinstance(node, expressionparse.Operation):
+            stack.extend(child for child in (node.left, node.right) if child is not None)
+    return values
+
+
+# Assign a variable and evaluate a small expression over and over
+def assignments(tree, count):
+    for i in range(count):
+        tree.setVariable('x', i)
+        tree.evaluate()
+
+
+if __name__ == '__main__':
+    tree = expressionparse.Tree(constants(100000))
+    values = literals(tree.root)
+    elapsed = timeit.timeit(tree.evaluate, number=NUMBER) / NUMBER
+    print('evaluate a tree with %d constants: %8.2f ms' % (len(values), 1e3 * elapsed))
+    elapsed = timeit.timeit(lambda: [value.evaluate() for value in values], number=NUMBER) / NUMBER
+    print('evaluate %d constants on their own: %8.2f ms' % (len(values), 1e3 * elapsed))
+
+    small = expressionparse.Tree('x^2+3*x-1.5')
+    elapsed = timeit.timeit(lambda: assignments(small, 100000), number=NUMBER) / NUMBER
+    print('set and evaluate 100000 times: %8.2f ms' % (1e3 * elapsed))
+
+    elapsed = timeit.timeit(lambda: [value == 2 for value in values], number=NUMBER) / NUMBER
+    print('compare %d constants with a number: %8.2f ms' % (len(values), 1e3 * elapsed))
@@ -0,0 +1,73 @@
+# Expressionparse v0.2 -- Create syntax trees for mathematical expressions
+#
+# Copyright (C) 2025, Peter Beard <github@peterbeard.co>
+# 
+# This file is part of Expressionparse.
+# 
+# Expressionparse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# Expressionparse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
+
+# Compare binding variables with the recursive Operation.setVariable walk and with Tree.setVariables
+# Run from the repository root with: python benchmarks/bench_variables.py
+
+import os
+import string
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import expressionparse
+
+SIZES = [10000, 100000]
+NAMES = string.ascii_letters[:10]
+NUMBER = 5
+
+
+# Build a balanced sum with the given number of leaves, every 100th of which is a variable
+def balancedTree(leaves):
+    nodes = []
+    for i in range(leaves):
+        if i % 100 == 0:
+            nodes.append(expressionparse.Variable(NAMES[(i // 100) % len(NAMES)]))
+        else:
+            nodes.append(expressionparse.Value(str(i)))
+    while len(nodes) > 1:
+        paired = []
+        for i in range(0, len(nodes) - 1, 2):
+            node = expressionparse.Plus()
+            node.addChild(nodes[i])
+            node.addChild(nodes[i + 1])
+            paired.append(node)
+        if len(nodes) % 2:
+            paired.append(nodes[-1])
+        nodes = paired
+    tree = expressionparse.Tree()
+    tree.root = nodes[0]
+    return tree
+
+
+if __name__ == '__main__':
+    bindings = dict((name, i) for i, name in enumerate(NAMES))
+    for size in SIZES:
+        tree = balancedTree(size)
+        nodes = 2 * size - 1
+
+        def recursive():
+            for name, value in bindings.items():
+                expressionparse.Operation.setVariable(tree.root, name, value)
+
+        recursive_time = timeit.timeit(recursive, number=NUMBER) / NUMBER
+        index_time = timeit.timeit(lambda: tree.getVariableIndex(rebuild=True), number=NUMBER) / NUMBER
+        bulk_time = timeit.timeit(lambda: tree.setVariables(bindings), number=NUMBER) / NUMBER
+        print('%7d nodes, %d variables: recursive %9.3f ms  index build %9.3f ms  setVariables %9.3f ms' % (
+            nodes, len(bindings), 1e3 * recursive_time, 1e3 * index_time, 1e3 * bulk_time))
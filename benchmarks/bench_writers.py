@@ -0,0 +1,68 @@
+# Expressionparse v0.2 -- Create syntax trees for mathematical expressions
+#
+# Copyright (C) 2025, Peter Beard <github@peterbeard.co>
+# 
+# This file is part of Expressionparse.
+# 
+# Expressionparse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# Expressionparse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
+
+# Compare the time and peak memory of writing huge trees as strings and streaming them to a file
+# Run from the repository root with: python benchmarks/bench_writers.py
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import expressionparse
+
+NOTATIONS = [('infix', 'toInfixNotation'), ('polish', 'toPolishNotation'),
+             ('reverse polish', 'toReversePolishNotation')]
+
+
+# A sum of terms that use every kind of operation
+def wide(terms):
+    return '+'.join('x*%d.5-(y/%d)^2+%d!' % (i, i + 1, i % 7) for i in range(terms))
+
+
+# A value with an operation applied to it over and over, so the tree is as deep as the number of terms
+def deep(terms):
+    return '(' * terms + 'x' + '*2+1)' * terms
+
+
+# Run a function and return its wall time and peak traced memory
+# Tracing memory slows everything down, so the time is measured on a separate run
+def measure(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    function(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+if __name__ == '__main__':
+    with open(os.devnull, 'w') as output:
+        for name, generator in [('wide', wide), ('deep', deep)]:
+            for terms in [10000, 100000]:
+                tree = expressionparse.Tree(generator(terms))
+                for notation, method in NOTATIONS:
+                    string_time, string_peak = measure(getattr(tree, method))
+                    stream_time, stream_peak = measure(tree.writeNotation, output, notation)
+                    print('%-4s %6d terms %-14s string %8.1f ms %8.1f MB, stream %8.1f ms %8.1f MB'
+                          % (name, terms, notation, 1e3 * string_time, string_peak / 1e6, 1e3 * stream_time,
+                             stream_peak / 1e6))
@@ -17,9 +17,24 @@
 # You should have received a copy of the GNU General Public License
 # along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
 
+import argparse
+import array
+import cmath
+import collections
+import contextlib
+import itertools
+import json
+import keyword
 import math
-import re
-import copy
+import mmap
+import multiprocessing
+import multiprocessing.shared_memory
+import operator
+import os
+import struct
+import sys
+import threading
+import time
 
 
 # A general node-related exception
@@ -58,11 +73,20 @@ class EvalException(Exception):
         return repr(self.value)
 
 
+# Exception that's raised when evaluating an expression would go over a Budget
+class BudgetException(EvalException):
+    pass
+
+
 # The base node class. Implements evaluation and stringification functions.
+# Nodes use __slots__ instead of a per-instance __dict__ since large trees have a lot of them.
 class Node(object):
+    __slots__ = ('parent', 'hash_value')
+
     # Initialize the node
     def __init__(self):
-        pass
+        self.parent = None
+        self.hash_value = None		# The structural hash hasn't been computed yet
 
     # Set a variable
     def setVariable(self, name, value):
@@ -72,6 +96,200 @@ class Node(object):
     def evaluate(self):
         return None
 
+    # Compile the node into a Python function that evaluates it
+    # The function takes the values of variables as keyword arguments, e.g. f(x=1, y=2); variables that aren't passed
+    # default to whatever value they had in the node when it was compiled
+    def compile(self):
+        lines = []
+        constants = {}
+        variables = {}
+        # Each value is stored in a temporary named after its depth on the evaluation stack so we only need a few locals
+        depth = 0
+        for node in _postOrder(self):
+            if isinstance(node, NaryOperation):
+                depth -= len(node.children)
+                operands = ['_t' + str(depth + i) for i in range(len(node.children))]
+                lines.append(operands[0] + ' = ' + node.compileOperands(operands))
+            elif isinstance(node, Operation):
+                depth -= node.arity
+                target = '_t' + str(depth)
+                lines.append(target + ' = ' + node.compileOperation(target, '_t' + str(depth + 1)))
+            elif isinstance(node, Variable):
+                if node.name not in variables:
+                    variables[node.name] = ('_v' + str(len(variables)), node.value)
+                lines.append('_t' + str(depth) + ' = ' + variables[node.name][0])
+            elif isinstance(node, Value):
+                value = node.evaluate()
+                if math.isfinite(value):
+                    lines.append('_t' + str(depth) + ' = ' + repr(value))
+                else:
+                    name = '_c' + str(len(constants))
+                    constants[name] = value
+                    lines.append('_t' + str(depth) + ' = ' + name)
+            else:
+                raise NodeException('Cannot compile node of type ' + type(node).__name__ + '.')
+            depth += 1
+        # Variables with names that are valid identifiers become keyword arguments; anything else has to be looked up
+        # in the extra keyword arguments
+        namespace = dict(constants, _float=float, _power=_power, _factorial=_factorial, _sum=_sum, _prod=math.prod,
+                         _UNSET=_UNSET, EvalException=EvalException)
+        params = []
+        conversions = []
+        for name, (local, value) in variables.items():
+            default = '_d' + local
+            try:
+                namespace[default] = float(value)
+            except (TypeError, ValueError):
+                namespace[default] = _UNSET
+            if name.isidentifier() and not name.startswith('_') and not keyword.iskeyword(name):
+                params.append(name + '=' + default)
+                conversions.append(local + ' = _float(' + name + ')')
+            else:
+                conversions.append(local + ' = _float(_kw.get(' + repr(name) + ', ' + default + '))')
+        if params:
+            params.insert(0, '*')
+        params.append('**_kw')
+        source = 'def _compiled(' + ', '.join(params) + '):\n'
+        if conversions:
+            source += '    try:\n'
+            source += ''.join('        ' + line + '\n' for line in conversions)
+            source += '    except (TypeError, ValueError):\n'
+            source += "        raise EvalException('Cannot evaluate expressions that contain uninitialized variables.')\n"
+        source += ''.join('    ' + line + '\n' for line in lines)
+        source += '    return _t0\n'
+        exec(compile(source, '<expressionparse>', 'exec'), namespace)
+        return namespace['_compiled']
+
+    # Return a copy of the node without any of its children
+    def copyNode(self):
+        return type(self)()
+
+    # Forget the values cached by evaluateIncremental and the structural hashes of the node and its ancestors, e.g.
+    # after the node changed
+    # Since a node is only cached or hashed when its children are, this stops at the first ancestor without either one
+    def invalidate(self):
+        self.hash_value = None
+        node = self.parent
+        if isinstance(self, Operation):
+            self.cache = _UNSET
+        while isinstance(node, Operation) and (node.cache is not _UNSET or node.hash_value is not None):
+            node.cache = _UNSET
+            node.hash_value = None
+            node = node.parent
+
+    # Return the structural hash of the node, which is cached until the node or one of its descendants changes
+    # Nodes that are equal have the same hash, including values that compare equal to numbers, e.g. 2 and 2.0
+    def __hash__(self):
+        if self.hash_value is None:
+            _hashNodes(self)
+        return self.hash_value
+
+    # Return a copy of the node and all of its descendants
+    # If a dictionary is given, the copied variables are added to it by name, the same way getVariableIndex indexes
+    # them, so the copy doesn't need another walk to be indexed
+    def copy(self, variables=None):
+        root = self.copyNode()
+        stack = [(self, root)]
+        while stack:
+            original, node = stack.pop()
+            if variables is not None and isinstance(node, Variable):
+                variables.setdefault(node.name, []).append(node)
+            elif isinstance(original, NaryOperation):
+                for child in original.children:
+                    node.children.append(child.copyNode())
+                    node.children[-1].parent = node
+                    stack.append((child, node.children[-1]))
+            elif isinstance(original, Operation):
+                if original.left is not None:
+                    node.left = original.left.copyNode()
+                    node.left.parent = node
+                    stack.append((original.left, node.left))
+                if original.right is not None:
+                    node.right = original.right.copyNode()
+                    node.right.parent = node
+                    stack.append((original.right, node.right))
+        return root
+
+    # Report how much memory the node and its descendants use, e.g. {'Plus': {'count': 2, 'bytes': 112}, ...}
+    # Nodes that are shared between subtrees are only counted once
+    def memoryFootprint(self):
+        footprint = {}
+        seen = set()
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if id(node) in seen:
+                continue
+            seen.add(id(node))
+            entry = footprint.setdefault(type(node).__name__, {'count': 0, 'bytes': 0})
+            entry['count'] += 1
+            entry['bytes'] += _nodeSize(node)
+            if isinstance(node, Operation):
+                stack.extend(child for child in reversed(_children(node)) if child is not None)
+        return footprint
+
+    # Return the value of the node and its gradient, a dictionary with the partial derivative of the value with respect
+    # to each variable, using reverse-mode automatic differentiation: one sweep up the tree computes the value of every
+    # node and one sweep back down accumulates the derivatives
+    def gradient(self):
+        return _reverseMode(self, lambda node: node.evaluate(), False)
+
+    # Return the values of the node and its gradient for whole arrays of variable values at once, like evaluateBatch
+    # The gradient has an array of partial derivatives for each variable, one for each element of the value array
+    def gradientBatch(self, dtype=None, **variables):
+        import numpy
+        if dtype is None:
+            dtype = numpy.float64
+        arrays = {}
+
+        def leafValue(node):
+            if isinstance(node, Variable):
+                if node.name not in arrays:
+                    if node.name in variables:
+                        arrays[node.name] = numpy.asarray(variables[node.name], dtype=dtype)
+                    else:
+                        arrays[node.name] = numpy.asarray(node.evaluate(), dtype=dtype)
+                return arrays[node.name]
+            return numpy.asarray(node.evaluate(), dtype=dtype)
+
+        value, gradient = _reverseMode(self, leafValue, True)
+        value = numpy.asarray(value)
+        # Derivatives that don't depend on the variables are scalars, so spread them out to the shape of the value
+        for name in gradient:
+            gradient[name] = numpy.zeros(value.shape, numpy.result_type(value, gradient[name])) + gradient[name]
+        return value, gradient
+
+    # Evaluate the node for whole arrays of variable values at once, e.g. evaluateBatch(x=xs, y=ys)
+    # The arrays are broadcast against each other using the normal NumPy rules and converted to the given dtype
+    # (float64 by default); variables that aren't passed use the value they have in the node
+    def evaluateBatch(self, dtype=None, **variables):
+        import numpy
+        if dtype is None:
+            dtype = numpy.float64
+        arrays = {}
+        stack = []
+        for node in _postOrder(self):
+            if isinstance(node, NaryOperation):
+                operands = stack[-len(node.children):]
+                del stack[-len(node.children):]
+                stack.append(node.evaluateArrays(operands))
+            elif isinstance(node, Operation):
+                rvalue = stack.pop() if node.arity == 2 else None
+                lvalue = stack.pop()
+                stack.append(node.evaluateArray(lvalue, rvalue))
+            elif isinstance(node, Variable):
+                if node.name not in arrays:
+                    if node.name in variables:
+                        arrays[node.name] = numpy.asarray(variables[node.name], dtype=dtype)
+                    else:
+                        arrays[node.name] = numpy.asarray(node.evaluate(), dtype=dtype)
+                stack.append(arrays[node.name])
+            elif isinstance(node, Value):
+                stack.append(numpy.asarray(node.evaluate(), dtype=dtype))
+            else:
+                raise NodeException('Cannot evaluate node of type ' + type(node).__name__ + '.')
+        return stack[0]
+
     # Return a nice-looking string representing the node
     def toInfixNotation(self):
         return self.__str__()
@@ -84,11 +302,127 @@ class Node(object):
     def toReversePolishNotation(self):
         return self.__str__()
 
+    # Yield the node written in a notation ('infix', 'polish', 'reverse polish', or 'string' for str()) a piece at a
+    # time, so huge trees can be written out without ever holding the whole string. Joining the pieces gives exactly
+    # the same string as toInfixNotation, toPolishNotation, toReversePolishNotation, or str().
+    def iterNotation(self, notation='infix'):
+        if notation not in _NOTATIONS:
+            raise ValueError('Unknown notation "' + str(notation) + '".')
+        return _notationFragments(self, *_NOTATIONS[notation])
+
+    # Write the node in a notation to a file-like object (anything with a write method that takes a string), a few
+    # thousand pieces at a time. Returns the number of characters written.
+    def writeNotation(self, file, notation='infix'):
+        fragments = self.iterNotation(notation)
+        written = 0
+        while True:
+            chunk = list(itertools.islice(fragments, _WRITE_CHUNK))
+            if not chunk:
+                return written
+            chunk = ''.join(chunk)
+            file.write(chunk)
+            written += len(chunk)
+
     # Make a string representation of the node
     def __str__(self):
         return 'Empty Node (' + type(self).__name__ + ')'
 
 
+# The characters that make up numbers and operators
+_NUMBERS = frozenset('0123456789.')
+_OPERATORS = frozenset('+-*/^!')
+_LETTERS = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ')
+
+
+# Check whether two adjacent characters are an implicit multiplication, e.g. 3x, xy, x(...), (...)x, or (...)(...)
+def _isImplicitMultiplication(prev, char):
+    if prev == ')':
+        return char == '(' or char.isalnum() or char == '_'
+    elif char == '(':
+        return prev.isalnum() or prev == '_'
+    elif prev in _LETTERS:
+        return char in _LETTERS or char.isdecimal()
+    elif char in _LETTERS:
+        return prev.isdecimal()
+    return False
+
+
+# Iterate over the characters of a string or a file-like object, skipping spaces
+# Files have to be opened in text mode; a file opened in binary mode raises a TokenizeException.
+def _readCharacters(source, chunk_size):
+    if isinstance(source, str):
+        chunks = [source]
+    else:
+        chunks = iter(lambda: source.read(chunk_size), '')
+    for chunk in chunks:
+        if not isinstance(chunk, str):
+            raise TokenizeException('Expressions must be read from text, not ' + type(chunk).__name__ + '.')
+        if not chunk:
+            break
+        for char in chunk:
+            if char != ' ':
+                yield char
+
+
+# Split an expression into tokens in a single pass, yielding each token as soon as it's complete
+# The expression can be a string or a text file-like object (which is read chunk_size characters at a time). Implicit
+# multiplications are made explicit along the way, and unmatched parentheses raise a TokenizeException.
+def tokenize(source, chunk_size=65536):
+    level = 0
+    value = []
+    last_token = None
+    prev = None
+    chars = _readCharacters(source, chunk_size)
+    char = next(chars, None)
+    while char is not None:
+        # Numbers need one character of lookahead to tell a negative sign from a minus operator
+        following = next(chars, None)
+        if prev is not None and _isImplicitMultiplication(prev, char):
+            if value:
+                last_token = Value(''.join(value))
+                value = []
+                yield last_token
+            last_token = Times()
+            yield last_token
+        if char == Tokenizer.OPENPAREN:
+            level += 1
+            last_token = char
+            yield last_token
+        elif char == Tokenizer.CLOSEPAREN:
+            level -= 1
+            if level < 0:
+                raise TokenizeException('Unmatched parenthesis.')
+            if value:
+                last_token = Value(''.join(value))
+                value = []
+                yield last_token
+            last_token = char
+            yield last_token
+        elif char in _NUMBERS or (
+                char == '-'
+                and following in _NUMBERS
+                and not value
+                and not isinstance(last_token, Variable)
+                and prev != Tokenizer.CLOSEPAREN):
+            value.append(char)
+        else:
+            if value:
+                last_token = Value(''.join(value))
+                value = []
+                yield last_token
+            if char in _OPERATORS:
+                last_token = getOperation(char)
+            else:
+                last_token = Variable(char)
+            yield last_token
+        prev = char
+        char = following
+    if level != 0:
+        raise TokenizeException('Unmatched parenthesis.')
+    if value:
+        yield Value(''.join(value))
+
+
 # A class to tokenize input strings and feed the tokens to the parser
 class Tokenizer(object):
     # Some static constants
@@ -97,72 +431,15 @@ class Tokenizer(object):
 
     # Initialize the tokenizer and tokenize the string
     def __init__(self, string):
-        self.tokens = []
-        # First, strip out whitespace from the string
-        string = string.replace(' ','')
-        # Next replace adjacent parentheses with explicit multiplications so we can parse more easily
-        string = string.replace(')(',')*(')
-        # Check for unmatched parentheses
-        level = 0
-        for char in string:
-            if char == '(':
-                level += 1
-            elif char == ')':
-                level -= 1
-        if level != 0:
-            raise TokenizeException('Unmatched parenthesis.')
-        # Make variable multiplications written as adjacent characters (e.g. 3x, xy) explicit
-        p = re.compile(r'(\d+)([a-zA-Z])')
-        string = p.sub(r'\1*\2',string)
-        p = re.compile(r'([a-zA-Z])(\d+)')
-        string = p.sub(r'\1*\2',string)
-        p = re.compile(r'([a-zA-Z])(?=[a-zA-Z])')
-        string = p.sub(r'\1*',string)
-        # Multiplication of parenthetical expression can also be written implicitly as 'x(...)' or '(...)x'
-        # Make these explicit here
-        p = re.compile(r'(\w+)\(')
-        string = p.sub(r'\1*(',string)
-        p = re.compile(r'\)(\w+)')
-        string = p.sub(r')*\1',string)
-        # The characters that we recognize
-        numbers = '01234567890.'
-        operators = '+-*/^!'
-        # Iterate over the string and create tokens of the appropriate type
-        curr_value = Value()
-        for i in range(0,len(string)):
-            char = string[i]
-            if char == Tokenizer.OPENPAREN:
-                self.pushToken(char)
-            elif char == Tokenizer.CLOSEPAREN:
-                if len(curr_value) > 0:
-                    self.pushToken(curr_value)
-                    curr_value = Value()
-                self.pushToken(char)
-            elif char in numbers or (
-                    char == '-'
-                    and string[i+1] in numbers
-                    and len(curr_value) == 0
-                    and not (len(self.tokens) > 0 and isinstance(self.tokens[-1], Variable))
-                    and string[i-1] != Tokenizer.CLOSEPAREN):
-                curr_value.append(char)
-                # Last value in the string
-                if i == len(string)-1:
-                    self.pushToken(curr_value)
-            elif char in operators:
-                if len(curr_value) > 0:
-                    self.pushToken(curr_value)
-                    curr_value = Value()
-                self.pushToken(getOperation(char))
-            else:
-                if len(curr_value) > 0:
-                    self.pushToken(curr_value)
-                    curr_value = Value()
-                self.pushToken(Variable(char))
+        if _profiler is not None:
+            self.tokens = _profiler.call('tokenize', collections.deque, tokenize(string))
+        else:
+            self.tokens = collections.deque(tokenize(string))
 
     # Return the next token in the list (at the beginning)
     def getToken(self):
         if len(self.tokens) > 0:
-            return self.tokens.pop(0)
+            return self.tokens.popleft()
         else:
             return None
 
@@ -178,6 +455,198 @@ class Tokenizer(object):
         self.tokens.append(token)
 
 
+# A bounded cache of parsed expressions that evicts the least recently used expression when it's full
+# The cache only ever hands out copies of the trees it holds, so changes made to one parsed tree (e.g. by setVariable)
+# are never seen by anyone else who parses the same expression
+class ParseCache(object):
+    # Initialize the cache
+    def __init__(self, maxsize=1024):
+        if maxsize < 1:
+            raise ValueError('The parse cache must be able to hold at least one expression.')
+        self.maxsize = maxsize
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # Return a copy of the root node for an expression, or None if the expression isn't in the cache
+    # If a dictionary is given, the variables in the copy are added to it (see Node.copy)
+    def get(self, expression, variables=None):
+        with self.lock:
+            root = self.entries.get(expression)
+            if root is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(expression)
+            self.hits += 1
+        return root.copy(variables)
+
+    # Add the root node for an expression to the cache
+    def put(self, expression, root):
+        if root is None:
+            return
+        root = root.copy()
+        with self.lock:
+            self.entries[expression] = root
+            self.entries.move_to_end(expression)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    # Remove every expression from the cache and reset the counters
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    # Return a dictionary of cache statistics
+    def stats(self):
+        with self.lock:
+            return {
+                'size': len(self.entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+    # The number of expressions in the cache
+    def __len__(self):
+        return len(self.entries)
+
+
+# Collects the wall time spent in each phase of the pipeline (tokenize, parse, setVariable, evaluate, simplify, factor),
+# the number of operations of each type visited while evaluating, simplifying, and factoring, and parse cache hits
+# Profiling is enabled with enableProfiling or the profiling context manager; while it's disabled the instrumented
+# functions only check whether a profiler is set.
+class Profiler(object):
+    # Initialize the profiler
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.reset()
+
+    # Forget everything that has been recorded so far
+    def reset(self):
+        with self.lock:
+            self.phases = {}
+            self.visits = {}
+            self.cacheHits = 0
+            self.cacheMisses = 0
+
+    # Check whether a phase is running in the current thread
+    # Instrumented functions only record a phase that isn't running yet (e.g. Tree.evaluate calls Operation.evaluate),
+    # so each phase's time is only counted once. Phases running inside other phases are counted in both.
+    def running(self, phase):
+        return phase in self.local.__dict__.get('running', ())
+
+    # Call a function as part of a phase and record how long it took
+    def call(self, phase, function, *args):
+        running = self.local.__dict__.setdefault('running', set())
+        running.add(phase)
+        start = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            elapsed = time.perf_counter() - start
+            running.discard(phase)
+            with self.lock:
+                calls, seconds = self.phases.get(phase, (0, 0.0))
+                self.phases[phase] = (calls + 1, seconds + elapsed)
+
+    # Add the number of times each type of node was visited during a phase, given as a Counter of node types
+    # Only operations are recorded, under the names of their classes.
+    def addVisits(self, phase, counts):
+        with self.lock:
+            visits = self.visits.setdefault(phase, collections.Counter())
+            for kind, count in counts.items():
+                if issubclass(kind, Operation):
+                    visits[kind.__name__] += count
+
+    # Record a lookup in the parse cache
+    def addCacheLookup(self, hit):
+        with self.lock:
+            if hit:
+                self.cacheHits += 1
+            else:
+                self.cacheMisses += 1
+
+    # Return a dictionary of everything that has been recorded so far
+    def snapshot(self):
+        with self.lock:
+            return {
+                'phases': dict((phase, {'calls': calls, 'seconds': seconds})
+                               for phase, (calls, seconds) in self.phases.items()),
+                'visits': dict((phase, dict(counts)) for phase, counts in self.visits.items()),
+                'parseCache': {'hits': self.cacheHits, 'misses': self.cacheMisses},
+            }
+
+
+# The number of nodes evaluated within a Budget between checks of the time
+_DEADLINE_INTERVAL = 256
+
+
+# Limits on the resources evaluating an expression may use, so pathological inputs like (99!)! or 9!^9!^9! are
+# rejected instead of keeping a process busy for minutes. Every limit is optional:
+# max_nodes       the number of nodes in the tree
+# max_depth       the depth of the tree
+# max_bits        the size in bits of any integer computed along the way (factorials and the powers, products, and
+#                 sums of their results are computed exactly, so they're the only values that can get huge)
+# max_operations  the number of operations that have to be evaluated
+# max_seconds     the wall time spent evaluating, checked every _DEADLINE_INTERVAL nodes; the time can't be checked
+#                 during a single operation, so only max_bits bounds the time a huge factorial or power takes
+# Everything but the time is checked with estimateCost before anything is evaluated, which follows the values of
+# variables exactly, so no huge integer is ever started on. Going over a limit raises a BudgetException.
+class Budget(object):
+    # Initialize the budget
+    def __init__(self, max_nodes=None, max_depth=None, max_bits=None, max_operations=None, max_seconds=None):
+        self.max_nodes = max_nodes
+        self.max_depth = max_depth
+        self.max_bits = max_bits
+        self.max_operations = max_operations
+        self.max_seconds = max_seconds
+
+    # Check the estimated cost of evaluating a node against the budget, returning the estimate if it's within it
+    # If the node has shared subtrees, shared must be true (see estimateCost)
+    def check(self, node, shared=False):
+        cost = estimateCost(node, shared)
+        if self.max_nodes is not None and cost['nodes'] > self.max_nodes:
+            raise BudgetException('Expression has more than ' + str(self.max_nodes) + ' nodes.')
+        if self.max_depth is not None and cost['depth'] > self.max_depth:
+            raise BudgetException('Expression is more than ' + str(self.max_depth) + ' levels deep.')
+        if self.max_operations is not None and cost['operations'] > self.max_operations:
+            raise BudgetException('Expression has more than ' + str(self.max_operations) + ' operations.')
+        if self.max_bits is not None and cost['bits'] > self.max_bits:
+            raise BudgetException('Expression needs integers with more than ' + str(self.max_bits) + ' bits.')
+        return cost
+
+    # Evaluate a node without going over the budget
+    def evaluate(self, node, shared=False):
+        self.check(node, shared)
+        if self.max_seconds is None:
+            return _evaluateShared(node) if shared else node.evaluate()
+        deadline = time.perf_counter() + self.max_seconds
+        if shared:
+            return _evaluateShared(node, lambda: self._checkTime(deadline))
+        return _evaluateNodes(self._untilDeadline(_postOrder(node), deadline))
+
+    # Raise an exception if the deadline has passed
+    def _checkTime(self, deadline):
+        if time.perf_counter() > deadline:
+            raise BudgetException('Evaluation took longer than ' + str(self.max_seconds) + ' seconds.')
+
+    # Yield nodes until the deadline passes
+    # Reading the clock takes about as long as evaluating a node, so it's only read every so often
+    def _untilDeadline(self, nodes, deadline):
+        for i, node in enumerate(nodes):
+            if not i % _DEADLINE_INTERVAL:
+                self._checkTime(deadline)
+            yield node
+
+
 # A class representing an expression tree. Contains logic for parsing strings.
 # TODO: This class is probably not that different from the Node class, so they
 # 	    should probably be merged or this class should at least be simplified.
@@ -189,108 +658,316 @@ class Tree(Node):
         if expression:
             self.parse(expression)
 
-    # Parse a string expression
+    # The root node of the tree
+    @property
+    def root(self):
+        return self._root
+
+    # Replacing the root node invalidates the variable index
+    @root.setter
+    def root(self, node):
+        self._root = node
+        self._variables = None
+        self._shared = False
+        self.recomputed = 0
+
+    # Return a dictionary mapping the name of each variable in the tree to the nodes where it occurs
+    # The index is built once and reused by setVariable/setVariables, so if nodes are added to or removed from the
+    # tree without replacing the root, call this with rebuild=True
+    def getVariableIndex(self, rebuild=False):
+        if self._variables is None or rebuild:
+            variables = {}
+            seen = set()
+            stack = [self.root]
+            while stack:
+                node = stack.pop()
+                # Trees with shared subtrees can reach the same node more than once
+                if id(node) in seen:
+                    continue
+                seen.add(id(node))
+                if isinstance(node, Variable):
+                    variables.setdefault(node.name, []).append(node)
+                elif isinstance(node, Operation):
+                    stack.extend(child for child in reversed(_children(node)) if child is not None)
+            self._variables = variables
+        return self._variables
+
+    # Return a copy of the tree
+    def copy(self):
+        tree = Tree()
+        if self.root is not None:
+            tree.root = self.root.copy()
+        return tree
+
+    # Parse a string expression, detecting whether it's written in Infix, Polish, or Reverse Polish Notation
     def parse(self, expression):
-        # TODO: This function should be able to detect the type of notation and choose the correct parser
-        self.parseInfixNotation(expression)
+        # Use the parse cache if it's been enabled
+        # Only strings are cached, since other inputs (e.g. files) are read as they're parsed
+        cached = _parse_cache is not None and isinstance(expression, str)
+        if cached:
+            variables = {}
+            root = _parse_cache.get(expression, variables)
+            if _profiler is not None:
+                _profiler.addCacheLookup(root is not None)
+            if root is not None:
+                # The variable index was built while copying the cached tree
+                self.root = root
+                self._variables = variables
+                return
+        notation = _detectNotation(expression)
+        if notation == 'polish':
+            self.parsePolishNotation(expression)
+        elif notation == 'reverse polish':
+            self.parseReversePolishNotation(expression)
+        else:
+            self.parseInfixNotation(expression)
+        if cached:
+            _parse_cache.put(expression, self.root)
 
     # Parse a string expression written using Infix Notation
+    # This is an operator precedence parser driven by the weights of the operations. Every token is pushed onto and
+    # popped off of the stacks at most once, so parsing takes linear time no matter how deeply nested the expression is.
     def parseInfixNotation(self, expression):
-        # Tokenize the expression
-        tokenizer = Tokenizer(expression)
-        # Iterate over the tokens
-        tokenIndex = 0
-        token = 0
-        curr_value = None
-        subtree_root = Operation()
-        prev_op = None
-        curr_op = None
-        self.root = Operation()
-        paren_stack = []
-        while token is not None:
-            tokenIndex += 1
-            token = tokenizer.getToken()
-            # No tokens left
-            if token is None:
-                # If there are no operations, the current value must be the entire tree
-                if len(subtree_root) == 0:
-                    subtree_root = curr_value
-                elif curr_value is not None and len(subtree_root) < 2:
-                    subtree_root.addChild(curr_value)
-                break
-            # Parse the token
+        if _profiler is not None:
+            # Tokenize the whole expression first so the time spent tokenizing is recorded separately
+            tokens = _profiler.call('tokenize', list, tokenize(expression))
+            _profiler.call('parse', self._parseInfixTokens, tokens)
+        else:
+            self._parseInfixTokens(tokenize(expression))
+
+    # Parse a sequence of tokens written using Infix Notation
+    def _parseInfixTokens(self, tokens):
+        operands = []
+        operators = []
+        # Whether the next token should be a value (or something that turns into a value, like a parenthesis)
+        expect_value = True
+        for token in tokens:
             if token == Tokenizer.OPENPAREN:
-                paren_stack.append(copy.deepcopy(subtree_root))
-                subtree_root = Operation()
-                prev_op = Operation()
-                curr_op = Operation()
+                if not expect_value:
+                    raise ParseException('Unexpected opening parenthesis.')
+                operators.append(token)
             elif token == Tokenizer.CLOSEPAREN:
-                paren_op = paren_stack.pop()
-                # Insert the parenthetical expression in the tree
-                if len(paren_op) < 2:
-                    paren_op.addChild(subtree_root)
-                else:
-                    paren_op.addWhereOpen(subtree_root)
-                # Re-root the tree and continue parsing
-                subtree_root = paren_op
-                prev_op = subtree_root
+                if expect_value:
+                    raise ParseException('Missing value before closing parenthesis.')
+                while operators[-1] != Tokenizer.OPENPAREN:
+                    _reduceOperation(operators.pop(), operands)
+                operators.pop()
             elif isinstance(token, Variable) or isinstance(token, Value):
-                if curr_value is None:
-                    curr_value = token
-                    if (tokenizer.peekToken() is None or tokenizer.peekToken() == Tokenizer.CLOSEPAREN) and prev_op is not None:
-                        prev_op.addChild(curr_value)
-                        curr_value = None
-                #else:
-                #	raise ParseException("Too many values at token " + str(tokenIndex))
-            elif isinstance(token, Operation):
-                if curr_value == None and subtree_root.symbol == '?':
-                    token.addChild(subtree_root.left)
-                    subtree_root = token
-                    prev_op = token
-                elif prev_op is not None and len(prev_op) > 0:
-                    if curr_value != None:
-                        prev_op.addChild(curr_value)
-                        curr_value = None
-                    curr_op = token
-                    # Determine parent-child relationship based on operation weights
-                    # If the next node is heavier than the current one (e.g. * v. +), add it as a child of the current node and make the current node the root of the tree
-                    if curr_op.weight > prev_op.weight:
-                        c = prev_op.removeChild()
-                        prev_op.addChild(curr_op)
-                        curr_op.addChild(c)
-                        subtree_root = prev_op
-                    # If the current and next nodes have the same weight, add the next node as a child of the current one -- note that this is the same as what we do when the next node is heavier BUT we do NOT re-root the tree
-                    elif curr_op.weight == prev_op.weight:
-                        c = prev_op.removeChild()
-                        prev_op.addChild(curr_op)
-                        curr_op.addChild(c)
-                    # If the next node is lighter than the current one, add the current node as a child of the next one and make the next one the root of the tree
+                if not expect_value:
+                    # The tokenizer reads the minus in something like 3!-2 as part of a negative number
+                    if isinstance(token, Value) and token.value.startswith('-') and len(token.value) > 1:
+                        _pushOperation(Minus(), operators, operands)
+                        token = Value(token.value[1:])
                     else:
-                        curr_op.addChild(subtree_root)
-                        subtree_root = curr_op
-                    prev_op = curr_op
+                        raise ParseException('Unexpected value "' + str(token) + '".')
+                operands.append(token)
+                expect_value = False
+            elif isinstance(token, Operation):
+                if expect_value:
+                    raise ParseException('Missing value before "' + token.symbol + '".')
+                # Unary operators apply to the value right before them
+                if token.arity == 1:
+                    _reduceOperation(token, operands)
                 else:
-                    prev_op = token
-                    prev_op.addChild(curr_value)
-                    subtree_root = prev_op
-                    curr_value = None
-        # An undefined operation with only one child can be simplified. Let's.
-        if isinstance(subtree_root, Operation) and subtree_root.symbol == '?' and subtree_root.right == None:
-            self.root = subtree_root.left
+                    _pushOperation(token, operators, operands)
+                    expect_value = True
+        if expect_value and (operands or operators):
+            raise ParseException('Missing value at end of expression.')
+        while operators:
+            _reduceOperation(operators.pop(), operands)
+        if operands:
+            self.root = operands.pop()
+            self.root.parent = None
+        else:
+            self.root = None
+        # Index the variables so binding them doesn't have to walk the whole tree
+        self.getVariableIndex()
+
+    # Parse a string expression written using Polish Notation, e.g. + 1 * 2 x
+    # Tokens are separated by spaces. Reading the tokens from right to left, every operation applies to the values
+    # right after it, so the tree is built in a single pass with a stack of operands.
+    def parsePolishNotation(self, expression):
+        if _profiler is not None and not _profiler.running('parse'):
+            return _profiler.call('parse', self.parsePolishNotation, expression)
+        operands = []
+        for word in reversed(expression.split()):
+            token = _notationToken(word)
+            if isinstance(token, Operation):
+                if len(operands) < token.arity:
+                    raise ParseException('Missing value for "' + token.symbol + '".')
+                token.addChild(operands.pop())
+                if token.arity == 2:
+                    token.addChild(operands.pop())
+            operands.append(token)
+        self._setParsedRoot(operands)
+
+    # Parse a string expression written using Reverse Polish Notation, e.g. 1 2 x * +
+    # Tokens are separated by spaces. Every operation applies to the values right before it, so the tree is built in a
+    # single pass with a stack of operands.
+    def parseReversePolishNotation(self, expression):
+        if _profiler is not None and not _profiler.running('parse'):
+            return _profiler.call('parse', self.parseReversePolishNotation, expression)
+        operands = []
+        for word in expression.split():
+            token = _notationToken(word)
+            if isinstance(token, Operation):
+                _reduceOperation(token, operands)
+            else:
+                operands.append(token)
+        self._setParsedRoot(operands)
+
+    # Make the only node left on the operand stack of a Polish or Reverse Polish parser the root of the tree
+    def _setParsedRoot(self, operands):
+        if len(operands) > 1:
+            raise ParseException('Too many values.')
+        if operands:
+            self.root = operands.pop()
+            self.root.parent = None
         else:
-            self.root = subtree_root
+            self.root = None
+        self.getVariableIndex()
 
     # Set the value of a variable in the tree
     def setVariable(self, name, value):
-        if isinstance(self.root, Operation):
-            self.root.setVariable(name, value)
-        elif isinstance(self.root, Variable) and self.root.name == name:
-            self.root.set(value)
-
-    # Evaluate the entire tree
-    def evaluate(self):
+        if _profiler is not None and not _profiler.running('setVariable'):
+            return _profiler.call('setVariable', self.setVariable, name, value)
+        for node in self.getVariableIndex().get(name, ()):
+            node.set(value)
+
+    # Set the values of several variables at once from a dictionary mapping names to values
+    def setVariables(self, variables):
+        if _profiler is not None and not _profiler.running('setVariable'):
+            return _profiler.call('setVariable', self.setVariables, variables)
+        index = self.getVariableIndex()
+        for name, value in variables.items():
+            for node in index.get(name, ()):
+                node.set(value)
+
+    # Merge structurally identical subtrees into a single shared node, turning the tree into a directed acyclic graph
+    # Evaluating a tree with shared subtrees only evaluates each shared node once. Notation output and equality are
+    # unaffected, but a shared node only keeps one of its parents, and changes made to a shared node (e.g. by factor)
+    # show up everywhere it occurs. Since only that parent is invalidated, the structural hashes of the nodes in a shared
+    # tree can go stale; Tree equality doesn't use them. Returns the number of nodes that were merged away.
+    def shareSubtrees(self):
+        if self.root is None:
+            return 0
+        root, merged = _shareSubtrees(self.root)
+        self.root = root
+        self._shared = True
+        self.getVariableIndex()
+        return merged
+
+    # Replace chains of additions and multiplications with n-ary Sum and Product nodes, e.g. 1+2+3 becomes a single Sum
+    # with three children. Flattened trees are much shallower and faster to evaluate. Infix Notation doesn't change, but
+    # the other notations write a Sum as additions nested to the right, e.g. (1+2)+3 as "1 2 3 + +". Returns the number
+    # of operations that were removed.
+    def flatten(self):
+        if self.root is None:
+            return 0
+        shared = self._shared
+        root, removed = _flatten(self.root)
+        root.parent = None
+        self.root = root
+        self._shared = shared
+        return removed
+
+    # Check whether the tree has shared subtrees
+    def hasSharedSubtrees(self):
+        return self._shared
+
+    # Evaluate the entire tree, optionally without going over a Budget
+    def evaluate(self, budget=None):
+        if _profiler is not None and not _profiler.running('evaluate'):
+            return _profiler.call('evaluate', self.evaluate, budget)
+        if budget is not None:
+            return budget.evaluate(self.root, self._shared)
+        if self._shared:
+            return _evaluateShared(self.root)
         return self.root.evaluate()
 
+    # Evaluate the entire tree, reusing the values of operations that haven't changed since the last time
+    # Binding variables with setVariable (or Variable.set) and changing nodes with addChild/removeChild invalidates the
+    # cached values of the affected nodes and their ancestors, so only those are recomputed. The number of operations
+    # that had to be recomputed is stored in recomputed.
+    def evaluateIncremental(self):
+        if self._shared:
+            raise NodeException('Cannot evaluate trees with shared subtrees incrementally.')
+        if _profiler is not None and not _profiler.running('evaluate'):
+            return _profiler.call('evaluate', self.evaluateIncremental)
+        value, self.recomputed = _evaluateIncremental(self.root)
+        return value
+
+    # Estimate the cost of evaluating the entire tree
+    def estimateCost(self):
+        return estimateCost(self.root, self._shared)
+
+    # Return the value of the entire tree and its gradient with respect to every variable
+    def gradient(self):
+        return self.root.gradient()
+
+    # Return the values of the entire tree and its gradient for whole arrays of variable values at once
+    def gradientBatch(self, dtype=None, **variables):
+        return self.root.gradientBatch(dtype, **variables)
+
+    # Compile the entire tree into a Python function
+    def compile(self):
+        return self.root.compile()
+
+    # Evaluate the entire tree for whole arrays of variable values at once
+    def evaluateBatch(self, dtype=None, **variables):
+        return self.root.evaluateBatch(dtype, **variables)
+
+    # Evaluate the tree for every row of a table of variable values using a pool of worker processes, e.g.
+    # evaluateParallel(x=xs, y=ys). Each column is a sequence of numbers (a list, an array.array('d'), a NumPy array,
+    # ...) and all of them must have the same length. The columns and the result are kept in shared memory, and the
+    # tree is only sent to each worker once. Each row is evaluated like Tree.evaluate, so errors like division by zero
+    # are raised. Returns an array.array('d') with the value for each row.
+    def evaluateParallel(self, workers=None, chunk_size=None, **columns):
+        if not columns:
+            raise ValueError('At least one column of variable values is needed.')
+        names = list(columns)
+        rows = len(columns[names[0]])
+        if any(len(column) != rows for column in columns.values()):
+            raise ValueError('All of the columns must have the same length.')
+        if rows == 0:
+            return array.array('d')
+        workers = workers or os.cpu_count() or 1
+        if chunk_size is None:
+            chunk_size = -(-rows // (4 * workers))
+        ranges = [(start, min(start + chunk_size, rows)) for start in range(0, rows, chunk_size)]
+        flat = self.freeze()
+        memory = multiprocessing.shared_memory.SharedMemory(create=True, size=8 * rows * (len(names) + 1))
+        view = memory.buf.cast('d')
+        try:
+            for i, name in enumerate(names):
+                view[i * rows:(i + 1) * rows] = _doubles(columns[name])
+            if workers == 1:
+                _startParallelWorker(flat, names, memory.name, rows)
+                for start, stop in ranges:
+                    _evaluateRows(start, stop)
+            else:
+                with multiprocessing.Pool(workers, _startParallelWorker, (flat, names, memory.name, rows)) as pool:
+                    pool.starmap(_evaluateRows, ranges)
+            result = array.array('d', view[len(names) * rows:rows * (len(names) + 1)])
+        finally:
+            _stopParallelWorker()
+            view.release()
+            memory.close()
+            memory.unlink()
+        return result
+
+    # Report how much memory the nodes in the tree use, by node type
+    def memoryFootprint(self):
+        if self.root is None:
+            return {}
+        return self.root.memoryFootprint()
+
+    # Lower the tree into a FlatTree that can be evaluated without walking the nodes
+    def freeze(self):
+        if self.root is None:
+            raise NodeException('Cannot freeze an empty tree.')
+        return FlatTree(self.root)
+
     # Print the tree using Infix Notation
     def toInfixNotation(self):
         return self.root.toInfixNotation()
@@ -303,6 +980,14 @@ class Tree(Node):
     def toReversePolishNotation(self):
         return self.root.toReversePolishNotation()
 
+    # Yield the tree written in a notation a piece at a time
+    def iterNotation(self, notation='infix'):
+        return self.root.iterNotation(notation)
+
+    # Write the tree in a notation to a file-like object
+    def writeNotation(self, file, notation='infix'):
+        return self.root.writeNotation(file, notation)
+
     # Make a string representation of the tree
     def __str__(self):
         return self.root.__str__()
@@ -312,26 +997,346 @@ class Tree(Node):
         return len(self.root)
 
     # Check if two trees are equal
+    # A shared node only knows one of its parents, so changing it can leave stale structural hashes on the others, and
+    # trees with shared subtrees are compared without them
     def __eq__(self, other):
         if isinstance(other, Tree):
+            if (self._shared or other._shared) and isinstance(self.root, Operation):
+                return _nodesEqual(self.root, other.root, False)
             return self.root == other.root
         return False
 
 
+# A tree stored as parallel arrays of instructions in postfix order, i.e. the order of toReversePolishNotation
+# Each instruction has an opcode, an index into the constant pool (for constants), and a variable slot (for variables);
+# the index that doesn't apply is -1. Flat trees don't refer to any nodes, so they're cheap to pickle, copy, and cache.
+class FlatTree(object):
+    # Lower a node and its descendants into arrays
+    def __init__(self, node):
+        self.opcodes = array.array('b')
+        self.constant_index = array.array('i')
+        self.variable_slot = array.array('i')
+        self.constants = []		# The text of each distinct constant
+        self.variables = []		# The name of the variable in each slot
+        self.values = []		# The value of the variable in each slot, or None if it isn't set
+        constants = {}
+        slots = {}
+        for child in _postOrder(node):
+            if isinstance(child, NaryOperation):
+                # Flat trees only have binary instructions, so n-ary operations become a chain of them
+                for _ in range(len(child.children) - 1):
+                    self._append(_OPCODES[child.binary], -1, -1)
+            elif isinstance(child, Operation):
+                opcode = _OPCODES.get(type(child))
+                if opcode is None:
+                    raise NodeException('Cannot freeze node of type ' + type(child).__name__ + '.')
+                self._append(opcode, -1, -1)
+            elif isinstance(child, Variable):
+                if child.name not in slots:
+                    slots[child.name] = len(self.variables)
+                    self.variables.append(child.name)
+                    self.values.append(child.value)
+                self._append(_PUSH_VARIABLE, -1, slots[child.name])
+            elif isinstance(child, Value):
+                if child.value not in constants:
+                    constants[child.value] = len(self.constants)
+                    self.constants.append(child.value)
+                self._append(_PUSH_CONSTANT, constants[child.value], -1)
+            else:
+                raise NodeException('Cannot freeze node of type ' + type(child).__name__ + '.')
+        self._numbers = [float(constant) for constant in self.constants]
+
+    # Add an instruction
+    def _append(self, opcode, constant, slot):
+        self.opcodes.append(opcode)
+        self.constant_index.append(constant)
+        self.variable_slot.append(slot)
+
+    # Set the value of a variable
+    def setVariable(self, name, value):
+        if name in self.variables:
+            self.values[self.variables.index(name)] = _rawValue(value)
+
+    # Set the values of several variables at once from a dictionary mapping names to values
+    def setVariables(self, variables):
+        for name, value in variables.items():
+            self.setVariable(name, value)
+
+    # Evaluate the instructions with a value stack
+    def evaluate(self):
+        try:
+            values = [float(value) for value in self.values]
+        except (TypeError, ValueError):
+            raise EvalException('Cannot evaluate expressions that contain uninitialized variables.')
+        numbers = self._numbers
+        functions = _FLAT_FUNCTIONS
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        for opcode, constant, slot in zip(self.opcodes, self.constant_index, self.variable_slot):
+            if opcode == _PUSH_CONSTANT:
+                push(numbers[constant])
+            elif opcode == _PUSH_VARIABLE:
+                push(values[slot])
+            elif opcode == _FACTORIAL:
+                stack[-1] = _factorial(stack[-1])
+            else:
+                rvalue = pop()
+                stack[-1] = functions[opcode](stack[-1], rvalue)
+        return stack[0]
+
+    # Convert the flat tree back into a Tree
+    def toTree(self):
+        operations = dict((opcode, operation) for operation, opcode in _OPCODES.items())
+        # Every occurrence of a constant or variable is a copy of the same node, so each literal is only parsed once
+        constants = [Value(constant) for constant in self.constants]
+        variables = []
+        for name, value in zip(self.variables, self.values):
+            variables.append(Variable(name))
+            variables[-1].value = value
+        stack = []
+        for opcode, constant, slot in zip(self.opcodes, self.constant_index, self.variable_slot):
+            if opcode == _PUSH_CONSTANT:
+                stack.append(constants[constant].copyNode())
+            elif opcode == _PUSH_VARIABLE:
+                stack.append(variables[slot].copyNode())
+            else:
+                node = operations[opcode]()
+                if node.arity == 2:
+                    node.right = stack.pop()
+                    node.right.parent = node
+                node.left = stack.pop()
+                node.left.parent = node
+                stack.append(node)
+        tree = Tree()
+        tree.root = stack[0]
+        tree.getVariableIndex()
+        return tree
+
+    # Encode the flat tree as bytes
+    # The encoding starts with a header (the magic bytes EXPT, a version number, the size of an operand, and the
+    # number of instructions, constants, and variables), followed by one byte per opcode, the constant index or
+    # variable slot of each value instruction (as 1, 2, or 4 byte integers, whichever is big enough), the text of
+    # each constant, and the name and value of each variable (a byte that says whether the value is missing, a
+    # double, or a 64-bit integer, followed by the value). Numbers are little-endian, and strings are UTF-8 prefixed
+    # with their length.
+    def encode(self):
+        operands = [constant if opcode == _PUSH_CONSTANT else slot
+                    for opcode, constant, slot in zip(self.opcodes, self.constant_index, self.variable_slot)
+                    if opcode <= _PUSH_VARIABLE]
+        typecode = _operandTypecode(max(len(self.constants), len(self.variables)))
+        operands = array.array(typecode, operands)
+        if sys.byteorder == 'big':
+            operands.byteswap()
+        parts = [_ENCODING_HEADER.pack(_ENCODING_MAGIC, _ENCODING_VERSION, operands.itemsize, len(self.opcodes),
+                                       len(self.constants), len(self.variables)),
+                 self.opcodes.tobytes(), operands.tobytes()]
+        for constant in self.constants:
+            parts.append(_encodeString(constant))
+        for name, value in zip(self.variables, self.values):
+            parts.append(_encodeString(name))
+            if value is None:
+                parts.append(b'\x00')
+            elif isinstance(value, int) and -2 ** 63 <= value < 2 ** 63:
+                parts.append(b'\x02' + struct.pack('<q', value))
+            else:
+                try:
+                    parts.append(b'\x01' + struct.pack('<d', float(value)))
+                except (TypeError, ValueError):
+                    raise NodeException('Cannot encode the value of variable "' + name + '".')
+        return b''.join(parts)
+
+    # Decode a flat tree from bytes (or any buffer, like a memory map) made by encode, starting at offset
+    @classmethod
+    def decode(cls, data, offset=0):
+        data = memoryview(data)
+        try:
+            magic, version, size, count, constants, variables = _ENCODING_HEADER.unpack_from(data, offset)
+            if magic != _ENCODING_MAGIC:
+                raise ParseException('Not an encoded tree.')
+            if version != _ENCODING_VERSION:
+                raise ParseException('Unsupported encoding version ' + str(version) + '.')
+            offset += _ENCODING_HEADER.size
+            flat = cls.__new__(cls)
+            flat.opcodes = array.array('b')
+            flat.opcodes.frombytes(data[offset:offset + count])
+            if len(flat.opcodes) != count:
+                raise ValueError('Opcodes run past the end of the data.')
+            offset += count
+            leaves = flat.opcodes.count(_PUSH_CONSTANT) + flat.opcodes.count(_PUSH_VARIABLE)
+            operands = array.array(_OPERAND_TYPECODES[size])
+            operands.frombytes(data[offset:offset + size * leaves])
+            if sys.byteorder == 'big':
+                operands.byteswap()
+            offset += size * leaves
+            if len(operands) != leaves:
+                raise ValueError('Operands run past the end of the data.')
+            # Spread the operands back out to one per instruction
+            leaf = iter(operands)
+            operands = [next(leaf) if opcode <= _PUSH_VARIABLE else -1 for opcode in flat.opcodes]
+            flat.constant_index = array.array('i', [operand if opcode == _PUSH_CONSTANT else -1
+                                                    for opcode, operand in zip(flat.opcodes, operands)])
+            flat.variable_slot = array.array('i', [operand if opcode == _PUSH_VARIABLE else -1
+                                                   for opcode, operand in zip(flat.opcodes, operands)])
+            flat.constants = []
+            for i in range(constants):
+                constant, offset = _decodeString(data, offset)
+                flat.constants.append(constant)
+            flat.variables = []
+            flat.values = []
+            for i in range(variables):
+                name, offset = _decodeString(data, offset)
+                flat.variables.append(name)
+                kind = data[offset]
+                if kind == 0:
+                    flat.values.append(None)
+                elif kind == 1:
+                    flat.values.append(struct.unpack_from('<d', data, offset + 1)[0])
+                elif kind == 2:
+                    flat.values.append(struct.unpack_from('<q', data, offset + 1)[0])
+                else:
+                    raise ValueError('Unknown kind of variable value.')
+                offset += 1 if kind == 0 else 9
+            # Make sure the instructions can be run, so corrupt data doesn't fail later on
+            depth = 0
+            for opcode in flat.opcodes:
+                if not 0 <= opcode < len(_FLAT_FUNCTIONS):
+                    raise ValueError('Unknown opcode.')
+                depth += 1 if opcode <= _PUSH_VARIABLE else 0 if opcode == _FACTORIAL else -1
+                if depth < 1:
+                    raise ValueError('Missing operand.')
+            if count and depth != 1:
+                raise ValueError('Too many operands.')
+            if max(flat.constant_index, default=-1) >= constants or max(flat.variable_slot, default=-1) >= variables:
+                raise ValueError('Operand out of range.')
+            flat._numbers = [float(constant) for constant in flat.constants]
+        except (struct.error, IndexError, KeyError, UnicodeDecodeError, ValueError):
+            raise ParseException('Truncated or corrupt encoded tree.')
+        return flat
+
+    # The number of instructions
+    def __len__(self):
+        return len(self.opcodes)
+
+
+# A file holding many encoded trees that can be read without loading the whole thing
+# The file starts with a header (the magic bytes EXPS, a version number, the number of trees, and the offset of the
+# index), followed by the encoded trees, and ends with the index: the offset of each tree and the end of the last one.
+# Opening a store only memory-maps the file; each tree is decoded when it's accessed, e.g. store[5].
+class ExpressionStore(object):
+    # Open a store for reading
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ParseException('Not an expression store.')
+        except BaseException:
+            self._file.close()
+            raise
+        try:
+            magic, version, count, index = _STORE_HEADER.unpack_from(self._map, 0)
+        except struct.error:
+            self.close()
+            raise ParseException('Not an expression store.')
+        if magic != _STORE_MAGIC or version != _ENCODING_VERSION or index + 8 * (count + 1) > len(self._map):
+            self.close()
+            raise ParseException('Not an expression store, or an unsupported version.')
+        self._index = array.array('Q', self._map[index:index + 8 * (count + 1)])
+        if sys.byteorder == 'big':
+            self._index.byteswap()
+
+    # Write trees (or infix expressions, which are parsed first) to a new store at path. Returns the number of trees.
+    @staticmethod
+    def write(path, trees):
+        index = array.array('Q')
+        with open(path, 'wb') as f:
+            f.write(_STORE_HEADER.pack(_STORE_MAGIC, _ENCODING_VERSION, 0, 0))
+            offset = _STORE_HEADER.size
+            for tree in trees:
+                if not isinstance(tree, Tree):
+                    tree = Tree(tree)
+                data = tree.freeze().encode()
+                index.append(offset)
+                f.write(data)
+                offset += len(data)
+            count = len(index)
+            index.append(offset)
+            if sys.byteorder == 'big':
+                index.byteswap()
+            f.write(index.tobytes())
+            f.seek(0)
+            f.write(_STORE_HEADER.pack(_STORE_MAGIC, _ENCODING_VERSION, count, offset))
+        return count
+
+    # Decode the flat form of tree i
+    def getFlatTree(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('Expression store index out of range.')
+        return FlatTree.decode(self._map, self._index[i])
+
+    # Decode tree i
+    def __getitem__(self, i):
+        return self.getFlatTree(i).toTree()
+
+    # The number of trees in the store
+    def __len__(self):
+        return len(self._index) - 1
+
+    # Decode each tree in turn
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    # Close the file
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
 # A class representing a numeric value, e.g. 5, -7, 2.1, etc.
+# The literal is parsed into a number once, when the node is created; the original text is only kept for output
 class Value(Node):
+    __slots__ = ('value', 'number')
+
     # Initialize the node
     def __init__(self, val=''):
         super(Value, self).__init__()
         self.value = str(val)
+        self.number = _parseNumber(self.value)
 
     # Append a digit to the value
     def append(self, digit):
         self.value = self.value + str(digit)
+        self.number = _parseNumber(self.value)
+        self.invalidate()
+
+    # Return a copy of the node
+    def copyNode(self):
+        node = Value.__new__(Value)
+        node.parent = None
+        node.hash_value = self.hash_value
+        node.value = self.value
+        node.number = self.number
+        return node
 
     # Evaluate the node
     def evaluate(self):
-        return float(self.value)
+        if self.number is None:
+            # Not a number, so this raises the ValueError
+            return float(self.value)
+        return self.number
 
     # The length of the value
     def __len__(self):
@@ -341,10 +1346,13 @@ class Value(Node):
     def __eq__(self, other):
         if isinstance(other, Value):
             return self.value == other.value
-        elif self.value != '':
-            return float(self.value) == other
+        elif self.number is not None:
+            return self.number == other
         return False
 
+    # Defining __eq__ hides the structural hash
+    __hash__ = Node.__hash__
+
     # Return a string representation of the value
     def __str__(self):
         return self.value
@@ -356,29 +1364,37 @@ class Value(Node):
 
 # Class representing a variable, e.g. x
 class Variable(Node):
+    __slots__ = ('name', 'value')
+
     # Initialize the node
+    # The value of a variable is stored as it was given, e.g. 2 or 1.5, and is None if the variable hasn't been set
     def __init__(self, name=''):
         super(Variable, self).__init__()
         self.name = str(name)
-        self.value = Value()
+        self.value = None
 
     # Evaluate the node
     def evaluate(self):
         try:
-            return self.value.evaluate()
-        except:
+            return float(self.value)
+        except (TypeError, ValueError):
             raise EvalException('Cannot evaluate expressions that contain uninitialized variables.')
 
     # Set the value of the variable
     def set(self, value):
-        if isinstance(value, Value):
-            self.value = value
-        else:
-            self.value = Value(value)
+        self.value = _rawValue(value)
+        self.invalidate()
 
     # Unset the value of the variable
     def unset(self):
-        self.value = Value()
+        self.value = None
+        self.invalidate()
+
+    # Return a copy of the node
+    def copyNode(self):
+        node = Variable(self.name)
+        node.value = self.value
+        return node
 
     # Compare two variables
     def __eq__(self, other):
@@ -387,6 +1403,9 @@ class Variable(Node):
         else:
             return False
 
+    # Defining __eq__ hides the structural hash
+    __hash__ = Node.__hash__
+
     # The length of the value
     def __len__(self):
         return len(self.name)
@@ -394,9 +1413,9 @@ class Variable(Node):
     # Return a string representation of the value
     def __str__(self):
         try:
-            self.value.evaluate()
+            float(self.value)
             return '{' + self.name + '=' + str(self.value) + '}'
-        except:
+        except (TypeError, ValueError):
             return self.name
 
     # Return a representation of the variable
@@ -405,16 +1424,21 @@ class Variable(Node):
 
 
 # A class representing a mathematical operation, e.g. plus, minus, etc.
+# The value of an operation is cached by evaluateIncremental until the operation or one of its descendants changes
 class Operation(Node):
+    __slots__ = ('left', 'right', 'cache')
+
+    # The weight, symbol, and arity are the same for every operation of a given type
+    weight = 0			# Default weight is 0
+    symbol = '?'		# Default operator symbol is ?
+    arity = 2			# Default to binary operator
+
     # Initialize the operation
     def __init__(self):
         super(Operation, self).__init__()
         self.left = None		# Initialize left child to none
         self.right = None		# Initialize right child to none
-        self.parent = None		# Initialize parent to none
-        self.weight = 0			# Default weight is 0
-        self.symbol = '?'		# Default operator symbol is ?
-        self.arity = 2			# Default to binary operator
+        self.cache = _UNSET		# No value has been cached yet
 
     # Add a child to the node
     def addChild(self, child):
@@ -426,6 +1450,7 @@ class Operation(Node):
             child.parent = self
         else:
             raise NodeException('Node already has two children.')
+        self.invalidate()
 
     # Remove a child from the node
     def removeChild(self):
@@ -439,6 +1464,7 @@ class Operation(Node):
             node.parent = None
         else:
             raise NodeException('Node has no children to remove.')
+        self.invalidate()
         return node
 
     # Find somewhere in this tree to add a child node. Return false if there are no open spots
@@ -466,206 +1492,165 @@ class Operation(Node):
             else:
                 return False
 
-    # Try to factor the node
+    # Factor the node as much as possible, e.g. x*y+x*z becomes x*(y+z), and return the factored node
+    # Factoring is repeated until nothing else can be factored, and common factors are found across whole sums rather
+    # than just pairs of terms. The children of the node are reused in the factored tree.
     def factor(self):
-        # Factor the children first (if possibe)
-        # Left child
-        try:
-            self.left = self.left.factor()
-        except:
-            pass
-        # Right child
-        try:
-            self.right = self.right.factor()
-        except:
-            pass
-        # Currently we only know how to factor sums of multiplications since both are commutative
-        parent_type = type(self).__name__
-        parent_weight = self.weight
-        child_type = type(self.left).__name__
-        # Make sure the children are both operations, both the same type, and have a greater weight
-        if isinstance(self.left, Operation) and type(self.left) == type(self.right) and self.left.weight - self.weight == 1:
-            # Get grandchildren
-            llgc = self.left.left
-            lrgc = self.left.right
-            rlgc = self.right.left
-            rrgc = self.right.right
-            common_factor_on_left = False
-            # Find the common factor (if any)
-            if llgc == rlgc:
-                common_factor = llgc
-                common_factor_on_left = True
-                different_left = lrgc
-                different_right = rrgc
-            elif llgc == rrgc:
-                common_factor = llgc
-                common_factor_on_left = True
-                different_left = lrgc
-                different_right = rlgc
-            elif lrgc == rlgc:
-                common_factor = lrgc
-                different_left = llgc
-                different_right = rrgc
-            elif lrgc == rrgc:
-                common_factor = lrgc
-                different_left = llgc
-                different_right = rlgc
-            else:
-                return self
-            # Create a new parent node with the type of the original child
-            if child_type == 'Times':
-                new_parent = Times()
-            elif child_type == 'Divide':
-                # This operation requires the common factor to be on the same side in both children
-                if llgc == rlgc or lrgc == rrgc:
-                    new_parent = Divide()
-                else:
-                    return self
-            elif child_type == 'Exponent':
-                # This operation requires the common factor to be on the same side in both children
-                if llgc == rlgc or lrgc == rrgc:
-                    new_parent = Exponent()
-                else:
-                    return self
-            else:
-                return self
-            # Create a new child node with the type of the original parent
-            if parent_type == 'Plus':
-                new_child = Plus()
-            elif parent_type == 'Minus':
-                new_child = Minus()
-            elif parent_type == 'Times':
-                new_child = Times()
-            elif parent_type == 'Divide':
-                new_child = Divide()
-            else:
-                return self
-            # Add the differing factors as children
-            new_child.addChild(different_left)
-            new_child.addChild(different_right)
-            # Add the common factor as a child of the times node
-            if common_factor_on_left:
-                new_parent.addChild(common_factor)
-                new_parent.addChild(new_child)
-            else:
-                new_parent.addChild(new_child)
-                new_parent.addChild(common_factor)
-            # Return the re-factored node
-            return new_parent
-        else:
-            return self
+        if _profiler is not None and not _profiler.running('factor'):
+            return _profiler.call('factor', self.factor)
+        return _Factoring().factor(self)
 
     # Check whether the node contains a certain variable
     def containsVariable(self, varname):
-        # Is the variable in the left child?
-        if isinstance(self.left, Variable) and self.left.name == varname:
-            return True
-        elif not isinstance(self.left, Value):
-            return self.left.containsVariable(varname)
-        # Is the variable in the right child?
-        if isinstance(self.right, Variable) and self.right.name == varname:
-            return True
-        elif not isinstance(self.right, Value):
-            return self.right.containsVariable(varname)
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, Variable) and node.name == varname:
+                return True
+            elif isinstance(node, Operation):
+                stack.extend(child for child in _children(node) if child is not None)
         # Didn't find the variable
         return False
 
     # Set the value of a variable in this node
     def setVariable(self, name, value):
-        # See if the variable exists in the left and/or right subtrees
-        # Left side
-        if isinstance(self.left, Variable) and self.left.name == name:
-            self.left.set(value)
-        else:
-            self.left.setVariable(name, value)
-        # Right side
-        if isinstance(self.right, Variable) and self.right.name == name:
-            self.right.set(value)
-        else:
-            self.right.setVariable(name, value)
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, Variable):
+                if node.name == name:
+                    node.set(value)
+            elif isinstance(node, Operation):
+                stack.extend(child for child in _children(node) if child is not None)
 
     # Return the value of this node
+    # The children are evaluated with an explicit stack instead of recursion so very deep trees can be evaluated
     def evaluate(self):
+        profiler = _profiler
+        nodes = _postOrder(self)
+        if profiler is not None:
+            if not profiler.running('evaluate'):
+                return profiler.call('evaluate', self.evaluate)
+            nodes, counts = _countVisits(nodes)
+        value = _evaluateNodes(nodes)
+        if profiler is not None:
+            profiler.addVisits('evaluate', counts)
+        return value
+
+    # Apply the operation to the values of the children
+    def operate(self, lvalue, rvalue):
         return None
 
+    # Return Python source code that applies the operation to the named operands
+    def compileOperation(self, lvalue, rvalue):
+        raise NodeException('Cannot compile operation "' + self.symbol + '".')
+
+    # Estimate the result of the operation from estimates of its operands without computing it (see estimateCost)
+    # Each estimate is (value, log2 of the absolute value, whether it's an exact integer), where value is the value as
+    # a float, or None if it's too big for one
+    def estimate(self, operands):
+        return (None, math.inf, False)
+
+    # Apply the operation to arrays of operand values
+    def evaluateArray(self, lvalue, rvalue):
+        raise NodeException('Cannot evaluate operation "' + self.symbol + '" over arrays.')
+
+    # Return the partial derivative of the operation with respect to its left operand, given the values of the operands
+    # and of the operation. The values can be numbers or NumPy arrays.
+    def leftDerivative(self, lvalue, rvalue, value):
+        raise NodeException('Cannot differentiate operation "' + self.symbol + '".')
+
+    # Return the partial derivative of the operation with respect to its right operand
+    def rightDerivative(self, lvalue, rvalue, value):
+        raise NodeException('Cannot differentiate operation "' + self.symbol + '".')
+
     # Return an Infix Notation string representing the operation
     def toInfixNotation(self):
+        return ''.join(_notationFragments(self, 'infixParts', 'toInfixNotation'))
+
+    # Return the pieces of the Infix Notation string for the operation: strings and child nodes, in order
+    def infixParts(self):
         # Unary operators
         if self.arity == 1:
-            lstring = self.left.toInfixNotation()
             if isinstance(self.left, Operation) and self.weight > self.left.weight:
-                string = '(' + lstring + ')'
-            else:
-                string = lstring
-            string += self.symbol
+                return ['(', self.left, ')', self.symbol]
+            return [self.left, self.symbol]
         # Binary operators
         elif self.arity == 2:
-            lstring = self.left.toInfixNotation()
-            rstring = self.right.toInfixNotation()
-            string = ''
+            parts = []
             if isinstance(self.left, Operation) and self.weight > self.left.weight:
-                string += '(' + lstring + ')'
+                parts += ['(', self.left, ')']
             else:
-                string += lstring
-
-            string += ' ' + self.symbol + ' '
+                parts.append(self.left)
+            parts.append(' ' + self.symbol + ' ')
             if isinstance(self.right, Operation) and self.weight > self.right.weight:
-                string += '(' + rstring + ')'
+                parts += ['(', self.right, ')']
             else:
-                string += rstring
+                parts.append(self.right)
+            return parts
         else:
             raise ValueError('Operators with arity other than 1 or 2 cannot be converted to infix notation')
 
-        return string
-
     # Return a Polish Notation string of the operation
     def toPolishNotation(self):
+        return ''.join(_notationFragments(self, 'polishParts', 'toPolishNotation'))
+
+    # Return the pieces of the Polish Notation string for the operation
+    def polishParts(self):
         if self.arity == 1:
-            lstring = self.left.toPolishNotation()
-            return f"{self.symbol} {lstring}"
+            return [self.symbol + ' ', self.left]
         else:
             assert self.arity == 2
-            lstring = self.left.toPolishNotation()
-            rstring = self.right.toPolishNotation()
-            return f"{self.symbol} {lstring} {rstring}"
+            return [self.symbol + ' ', self.left, ' ', self.right]
 
     # Return a Reverse Polish Notation string of the operation
     def toReversePolishNotation(self):
+        return ''.join(_notationFragments(self, 'reversePolishParts', 'toReversePolishNotation'))
+
+    # Return the pieces of the Reverse Polish Notation string for the operation
+    def reversePolishParts(self):
         if self.arity == 1:
-            lstring = self.left.toReversePolishNotation()
-            return f"{lstring} {self.symbol}"
+            return [self.left, ' ' + self.symbol]
         else:
             assert self.arity == 2
-            lstring = self.left.toReversePolishNotation()
-            rstring = self.right.toReversePolishNotation()
-            return f"{lstring} {rstring} {self.symbol}"
+            return [self.left, ' ', self.right, ' ' + self.symbol]
 
     # See if two operation nodes are equal
+    # Nodes with different structural hashes can't be equal, so most unequal nodes are rejected without comparing their
+    # descendants. Pairs of nodes are compared with an explicit stack so very deep trees don't hit the recursion limit.
     def __eq__(self, other):
-        if type(other) == type(self):
-            return (self.left == other.left) and (self.right == other.right)
-        return False
+        if isinstance(other, Operation) and hash(self) != hash(other):
+            return False
+        return _nodesEqual(self, other, True)
+
+    # Defining __eq__ hides the structural hash
+    __hash__ = Node.__hash__
 
     # Return the length of the node
     def __len__(self):
-        left_len = 0
-        right_len = 0
-        # Get the lengths of the non-None children
-        if self.left is not None:
-            left_len = len(self.left)
-        if self.right is not None:
-            right_len = len(self.right)
-        # Return the sum of the lengths
-        return left_len + right_len
+        length = 0
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, Operation):
+                # Get the lengths of the non-None children
+                stack.extend(child for child in _children(node) if child is not None)
+            else:
+                length += len(node)
+        return length
 
     # Return a string representation of the node
     def __str__(self):
+        return ''.join(_notationFragments(self, 'stringParts', '__str__'))
+
+    # Return the pieces of the string representation of the node
+    def stringParts(self):
         # Unary operators
         if self.arity == 1:
-            return '[ ' + self.left.__str__() + ' ' + self.symbol + ' ]'
+            return ['[ ', self.left, ' ' + self.symbol + ' ]']
         # Binary operators
         else:
-            return '[ ' + self.left.__str__() + ' ' + self.symbol + ' ' + self.right.__str__() + ' ]'
+            return ['[ ', self.left, ' ' + self.symbol + ' ', self.right, ' ]']
 
     # Return a representation of the node
     def __repr__(self):
@@ -674,268 +1659,244 @@ class Operation(Node):
 
 # Add two nodes together
 class Plus(Operation):
-    # Initialize the node
-    def __init__(self):
-        super(Plus, self).__init__()
-        self.weight = 1
-        self.symbol = '+'
+    __slots__ = ()
+    weight = 1
+    symbol = '+'
 
-    # Evaluate the node
-    def evaluate(self):
-        if self.left and self.right:
-            return self.left.evaluate() + self.right.evaluate()
-        else:
-            raise NodeException('Node does not have enough children.')
+    # Apply the operation to the values of the children
+    def operate(self, lvalue, rvalue):
+        return lvalue + rvalue
+
+    # Return Python source code that applies the operation to the named operands
+    def compileOperation(self, lvalue, rvalue):
+        return lvalue + ' + ' + rvalue
+
+    # Estimate the sum of two operands
+    def estimate(self, operands):
+        return _estimateAdd(operands, operator.add)
+
+    # Apply the operation to arrays of operand values
+    def evaluateArray(self, lvalue, rvalue):
+        return lvalue + rvalue
+
+    # d(l + r)/dl = 1
+    def leftDerivative(self, lvalue, rvalue, value):
+        return 1.0
+
+    # d(l + r)/dr = 1
+    def rightDerivative(self, lvalue, rvalue, value):
+        return 1.0
 
 
 # Subtract two nodes
 class Minus(Operation):
-    # Initialize the node
-    def __init__(self):
-        super(Minus, self).__init__()
-        self.weight = 1
-        self.symbol = '-'
+    __slots__ = ()
+    weight = 1
+    symbol = '-'
 
-    # Evaluate the node
-    def evaluate(self):
-        if self.left and self.right:
-            return self.left.evaluate() - self.right.evaluate()
-        else:
-            raise NodeException('Node does not have enough children.')
+    # Apply the operation to the values of the children
+    def operate(self, lvalue, rvalue):
+        return lvalue - rvalue
 
+    # Return Python source code that applies the operation to the named operands
+    def compileOperation(self, lvalue, rvalue):
+        return lvalue + ' - ' + rvalue
 
-# Multiply two nodes
-class Times(Operation):
-    # Initialize the node
-    def __init__(self):
-        super(Times, self).__init__()
-        self.weight = 2
-        self.symbol = '*'
+    # Estimate the difference of two operands
+    def estimate(self, operands):
+        return _estimateAdd(operands, operator.sub)
 
-    # Evaluate the node
-    def evaluate(self):
-        if self.left and self.right:
-            return self.left.evaluate() * self.right.evaluate()
-        else:
-            raise NodeException('Node does not have enough children.')
+    # Apply the operation to arrays of operand values
+    def evaluateArray(self, lvalue, rvalue):
+        return lvalue - rvalue
 
-    # Try to factor the node
-    def factor(self):
-        # Factor the children first (if possibe)
-        # Left child
-        try:
-            self.left = self.left.factor()
-        except:
-            pass
-        # Right child
-        try:
-            self.right = self.right.factor()
-        except:
-            pass
-        # Currently we only know how to factor sums of multiplications since both are commutative
-        parent_type = type(self).__name__
-        parent_weight = self.weight
-        child_type = type(self.left).__name__
-        # Make sure the children are both operations, both the same type, and have a greater weight
-        if isinstance(self.left, Operation) and type(self.left) == type(self.right) and self.left.weight - self.weight == 1:
-            if child_type != 'Exponent':
-                return super(Times,self).factor()
-            else:
-                # Get grandchildren
-                llgc = self.left.left
-                lrgc = self.left.right
-                rlgc = self.right.left
-                rrgc = self.right.right
-                common_factor_on_left = False
-                # Find the common factor (if any)
-                if llgc == rlgc:
-                    common_factor = llgc
-                    common_factor_on_left = True
-                    different_left = lrgc
-                    different_right = rrgc
-                elif llgc == rrgc:
-                    common_factor = llgc
-                    common_factor_on_left = True
-                    different_left = lrgc
-                    different_right = rlgc
-                elif lrgc == rlgc:
-                    common_factor = lrgc
-                    different_left = llgc
-                    different_right = rrgc
-                elif lrgc == rrgc:
-                    common_factor = lrgc
-                    different_left = llgc
-                    different_right = rlgc
-                else:
-                    return self
-                # If the common factor is on the right, normal factoring rules apply
-                if not common_factor_on_left:
-                    return super(Times,self).factor()
-                # Create a new parent node with the type of the original child
-                if child_type == 'Exponent':
-                    # This operation requires the common factor to be on the same side in both children
-                    if llgc == rlgc or lrgc == rrgc:
-                        new_parent = Exponent()
-                    else:
-                        return self
-                else:
-                    return self
-                # Since this is a multiplication, we need to convert to addition of the exponents
-                new_child = Plus()
-                # Add the differing factors as children
-                new_child.addChild(different_left)
-                new_child.addChild(different_right)
-                # Add the common factor as a child of the times node
-                new_parent.addChild(common_factor)
-                new_parent.addChild(new_child)
-                # Return the re-factored node
-                return new_parent
-        else:
-            return self
+    # d(l - r)/dl = 1
+    def leftDerivative(self, lvalue, rvalue, value):
+        return 1.0
 
-    # Return an Infix Notation string representing the operation
-    def toInfixNotation(self):
-        lstring = self.left.toInfixNotation()
-        rstring = self.right.toInfixNotation()
+    # d(l - r)/dr = -1
+    def rightDerivative(self, lvalue, rvalue, value):
+        return -1.0
 
-        if isinstance(self.left, Operation) and self.weight > self.left.weight:
-            lstring = '(' + lstring + ')'
 
-        if isinstance(self.right, Operation) and self.weight > self.right.weight:
-            rstring = '(' + rstring + ')'
+# Multiply two nodes
+class Times(Operation):
+    __slots__ = ()
+    weight = 2
+    symbol = '*'
+
+    # Apply the operation to the values of the children
+    def operate(self, lvalue, rvalue):
+        return lvalue * rvalue
+
+    # Return Python source code that applies the operation to the named operands
+    def compileOperation(self, lvalue, rvalue):
+        return lvalue + ' * ' + rvalue
+
+    # Estimate the product of two operands
+    def estimate(self, operands):
+        (lvalue, lsize, linteger), (rvalue, rsize, rinteger) = operands
+        if lvalue is not None and rvalue is not None:
+            return _estimateOf(lvalue * rvalue, linteger and rinteger, lsize + rsize)
+        if lvalue == 0 or rvalue == 0:
+            return (0.0, -math.inf, linteger and rinteger)
+        return (None, lsize + rsize, linteger and rinteger)
+
+    # Apply the operation to arrays of operand values
+    def evaluateArray(self, lvalue, rvalue):
+        return lvalue * rvalue
+
+    # d(l * r)/dl = r
+    def leftDerivative(self, lvalue, rvalue, value):
+        return rvalue
+
+    # d(l * r)/dr = l
+    def rightDerivative(self, lvalue, rvalue, value):
+        return lvalue
+
+    # Return the pieces of the Infix Notation string for the operation
+    def infixParts(self):
+        parts = []
+        if isinstance(self.left, Operation) and self.weight > self.left.weight:
+            parts += ['(', self.left, ')']
+        else:
+            parts.append(self.left)
 
         # Multiplication of variables is usually written with the variables adjacent to each other
-        if isinstance(self.left, Variable) or isinstance(self.right, Variable):
-            return lstring + rstring
+        if not (isinstance(self.left, Variable) or isinstance(self.right, Variable)):
+            parts.append(' * ')
+
+        if isinstance(self.right, Operation) and self.weight > self.right.weight:
+            parts += ['(', self.right, ')']
         else:
-            return lstring + ' * ' + rstring
+            parts.append(self.right)
+        return parts
 
 
 # Divide two nodes
 class Divide(Operation):
-    # Initialize the node
-    def __init__(self):
-        super(Divide, self).__init__()
-        self.weight = 2
-        self.symbol = '/'
+    __slots__ = ()
+    weight = 2
+    symbol = '/'
 
-    # Evaluate the node
-    def evaluate(self):
-        if self.left and self.right:
-            return self.left.evaluate() / self.right.evaluate()
-        else:
-            raise NodeException('Node does not have enough children.')
+    # Apply the operation to the values of the children
+    def operate(self, lvalue, rvalue):
+        return lvalue / rvalue
 
-    # Try to factor the node
-    def factor(self):
-        # Factor the children first (if possibe)
-        # Left child
-        try:
-            self.left = self.left.factor()
-        except:
-            pass
-        # Right child
-        try:
-            self.right = self.right.factor()
-        except:
-            pass
-        # Currently we only know how to factor sums of multiplications since both are commutative
-        parent_type = type(self).__name__
-        parent_weight = self.weight
-        child_type = type(self.left).__name__
-        # Make sure the children are both operations, both the same type, and have a greater weight
-        if isinstance(self.left, Operation) and type(self.left) == type(self.right) and self.left.weight - self.weight == 1:
-            if child_type != 'Exponent':
-                return super(Divide,self).factor()
-            else:
-                # Get grandchildren
-                llgc = self.left.left
-                lrgc = self.left.right
-                rlgc = self.right.left
-                rrgc = self.right.right
-                common_factor_on_left = False
-                # Find the common factor (if any)
-                if llgc == rlgc:
-                    common_factor = llgc
-                    common_factor_on_left = True
-                    different_left = lrgc
-                    different_right = rrgc
-                elif llgc == rrgc:
-                    common_factor = llgc
-                    common_factor_on_left = True
-                    different_left = lrgc
-                    different_right = rlgc
-                elif lrgc == rlgc:
-                    common_factor = lrgc
-                    different_left = llgc
-                    different_right = rrgc
-                elif lrgc == rrgc:
-                    common_factor = lrgc
-                    different_left = llgc
-                    different_right = rlgc
-                else:
-                    return self
-                # If the common factor is on the right, normal factoring rules apply
-                if not common_factor_on_left:
-                    return super(Divide,self).factor()
-                # Create a new parent node with the type of the original child
-                if child_type == 'Exponent':
-                    # This operation requires the common factor to be on the same side in both children
-                    if llgc == rlgc or lrgc == rrgc:
-                        new_parent = Exponent()
-                    else:
-                        return self
-                else:
-                    return self
-                # Since this is a multiplication, we need to convert to addition of the exponents
-                new_child = Minus()
-                # Add the differing factors as children
-                new_child.addChild(different_left)
-                new_child.addChild(different_right)
-                # Add the common factor as a child of the times node
-                new_parent.addChild(common_factor)
-                new_parent.addChild(new_child)
-                # Return the re-factored node
-                return new_parent
-        else:
-            return self
+    # Return Python source code that applies the operation to the named operands
+    def compileOperation(self, lvalue, rvalue):
+        return lvalue + ' / ' + rvalue
+
+    # Estimate the quotient of two operands, which is never an integer
+    def estimate(self, operands):
+        (lvalue, lsize, _), (rvalue, rsize, _) = operands
+        if rvalue == 0:
+            # Division by zero fails right away
+            return _ZERO_ESTIMATE
+        if lvalue is not None and rvalue is not None:
+            return _estimateOf(lvalue / rvalue, False, lsize - rsize)
+        return (None, lsize - rsize, False)
+
+    # Apply the operation to arrays of operand values
+    def evaluateArray(self, lvalue, rvalue):
+        return lvalue / rvalue
+
+    # d(l / r)/dl = 1 / r
+    def leftDerivative(self, lvalue, rvalue, value):
+        return 1.0 / rvalue
+
+    # d(l / r)/dr = -l / r^2
+    def rightDerivative(self, lvalue, rvalue, value):
+        return -value / rvalue
 
 
 # Exponentiate two nodes
 class Exponent(Operation):
-    # Initialize the node
-    def __init__(self):
-        super(Exponent, self).__init__()
-        self.weight = 3
-        self.symbol = '^'
-
-    # Evaluate the node
-    def evaluate(self):
-        if self.left and self.right:
-            lvalue = self.left.evaluate()
-            rvalue = self.right.evaluate()
-            # Exponents are dumb and mean when negative numbers are involved
-            if lvalue < 0:
-                if rvalue == int(rvalue):
-                    return lvalue ** rvalue
-                else:
-                    # The answer will be complex
-                    return (lvalue + 0j) ** rvalue
-            else:
-                return lvalue ** rvalue
-        else:
-            raise NodeException('Node does not have enough children.')
+    __slots__ = ()
+    weight = 3
+    symbol = '^'
+
+    # Apply the operation to the values of the children
+    def operate(self, lvalue, rvalue):
+        return _power(lvalue, rvalue)
+
+    # Return Python source code that applies the operation to the named operands
+    def compileOperation(self, lvalue, rvalue):
+        return '_power(' + lvalue + ', ' + rvalue + ')'
+
+    # Estimate a power, which is an exact integer if both operands are and the exponent isn't negative
+    # log2 |l ^ r| = r * log2 |l|
+    def estimate(self, operands):
+        (lvalue, lsize, linteger), (rvalue, rsize, rinteger) = operands
+        if rvalue is None:
+            # The exponent is too big to even be a float
+            return (None, math.inf if lsize != 0 else 0.0, linteger and rinteger)
+        integer = linteger and rinteger and rvalue.real >= 0
+        if rvalue == 0:
+            return (1.0, 0.0, integer)
+        size = rvalue.real * lsize
+        if lvalue is not None and size < 1000:
+            try:
+                return _estimateOf(_power(lvalue, rvalue), integer, size)
+            except (ArithmeticError, ValueError):
+                pass
+        return (None, size, integer)
+
+    # Apply the operation to arrays of operand values
+    def evaluateArray(self, lvalue, rvalue):
+        import numpy
+        if numpy.iscomplexobj(lvalue) or numpy.iscomplexobj(rvalue):
+            return numpy.power(lvalue, rvalue)
+        lvalue, rvalue = numpy.broadcast_arrays(lvalue, rvalue)
+        # A negative base with a non-integer exponent has a complex result, so the whole array has to be complex
+        with numpy.errstate(invalid='ignore'):
+            complex_mask = (lvalue < 0) & (rvalue != numpy.trunc(rvalue))
+            if not complex_mask.any():
+                return numpy.power(lvalue, rvalue)
+            result = numpy.power(lvalue, rvalue).astype(numpy.result_type(lvalue, rvalue, 1j))
+        result[complex_mask] = numpy.power(lvalue[complex_mask].astype(result.dtype), rvalue[complex_mask])
+        return result
+
+    # d(l ^ r)/dl = r * l ^ (r - 1), which doesn't exist for l = 0 and r < 1 (except for r = 0, when it's 0)
+    # Over arrays, the derivative is infinite where it doesn't exist
+    def leftDerivative(self, lvalue, rvalue, value):
+        if hasattr(lvalue, 'dtype') or hasattr(rvalue, 'dtype'):
+            import numpy
+            with numpy.errstate(divide='ignore', invalid='ignore'):
+                return numpy.where(rvalue == 0, 0.0, rvalue * self.evaluateArray(lvalue, rvalue - 1))
+        if rvalue == 0:
+            return 0.0
+        try:
+            return rvalue * _power(lvalue, rvalue - 1)
+        except ZeroDivisionError:
+            raise EvalException('Cannot differentiate x^y with respect to x at x = 0 when y < 1.')
+
+    # d(l ^ r)/dr = l ^ r * ln(l), which is complex for negative l and doesn't exist for l = 0 and r <= 0
+    # Over arrays, the derivative is NaN where it doesn't exist
+    def rightDerivative(self, lvalue, rvalue, value):
+        if hasattr(lvalue, 'dtype') or hasattr(rvalue, 'dtype'):
+            import numpy
+            lvalue = numpy.asarray(lvalue)
+            if not numpy.iscomplexobj(lvalue) and (lvalue < 0).any():
+                lvalue = lvalue.astype(numpy.result_type(lvalue, 1j))
+            with numpy.errstate(divide='ignore', invalid='ignore'):
+                return numpy.where((lvalue == 0) & (rvalue > 0), 0.0, value * numpy.log(lvalue))
+        if isinstance(lvalue, complex) or lvalue < 0:
+            return value * cmath.log(lvalue)
+        elif lvalue > 0:
+            return value * math.log(lvalue)
+        elif rvalue > 0:
+            return 0.0
+        raise EvalException('Cannot differentiate x^y with respect to y at x = 0 when y <= 0.')
 
 
 # Calculate the factorial of a node
 # ** This is an unary operator **
 class Factorial(Operation):
-    # Initialize the node
-    def __init__(self):
-        super(Factorial, self).__init__()
-        self.weight = 4
-        self.symbol = '!'
-        self.arity = 1
+    __slots__ = ()
+    weight = 4
+    symbol = '!'
+    arity = 1
 
     # Add a child to the node
     def addChild(self, child):
@@ -944,6 +1905,7 @@ class Factorial(Operation):
             child.parent = self
         else:
             raise NodeException('Node already has one child.')
+        self.invalidate()
 
     # Remove a child from the node
     def removeChild(self):
@@ -951,21 +1913,1439 @@ class Factorial(Operation):
             c = self.left
             self.left = None
             c.parent = None
+            self.invalidate()
             return c
         else:
             raise NodeException('Node has no children to remove.')
 
-    # Evaluate the node
-    def evaluate(self):
-        if self.left is not None and self.right is None:
-            cvalue = self.left.evaluate()
-            # Right now factorial is only defined for the natural numbers
-            if cvalue >= 0 and cvalue == int(cvalue):
-                return math.factorial(int(cvalue))
+    # Apply the operation to the value of the child
+    def operate(self, lvalue, rvalue):
+        return _factorial(lvalue)
+
+    # Return Python source code that applies the operation to the named operand
+    def compileOperation(self, lvalue, rvalue):
+        return '_factorial(' + lvalue + ')'
+
+    # Estimate a factorial using the log-gamma function, since log2 n! = lgamma(n + 1) / ln 2
+    def estimate(self, operands):
+        value = operands[0][0]
+        if value is None:
+            # n is too big to even be a float, so n! is enormous
+            return (None, math.inf, True)
+        if isinstance(value, complex) or not math.isfinite(value) or value < 0 or value != int(value):
+            # The factorial isn't defined, so evaluation fails right away
+            return _ZERO_ESTIMATE
+        if value <= 170:
+            return _estimateOf(float(math.factorial(int(value))), True)
+        try:
+            return (None, math.lgamma(value + 1) / math.log(2), True)
+        except OverflowError:
+            return (None, math.inf, True)
+
+    # Apply the operation to an array of operand values
+    def evaluateArray(self, lvalue, rvalue):
+        import numpy
+        if numpy.iscomplexobj(lvalue) or not numpy.all((lvalue >= 0) & (lvalue == numpy.trunc(lvalue))):
+            raise EvalException('Cannot compute the factorial of negative numbers or non-integers.')
+        values = lvalue.astype(numpy.int64)
+        # Floating point factorials overflow past 170!, so there's no point computing anything larger
+        if numpy.issubdtype(lvalue.dtype, numpy.floating):
+            table = numpy.array([float(math.factorial(n)) for n in range(171)] + [math.inf], dtype=lvalue.dtype)
+            return table[numpy.minimum(values, 171)]
+        # Integer factorials that don't fit in the dtype would wrap around, e.g. 21! in int64
+        table = [1]
+        while table[-1] * len(table) <= numpy.iinfo(lvalue.dtype).max:
+            table.append(table[-1] * len(table))
+        if values.max(initial=0) >= len(table):
+            raise EvalException('Cannot compute factorials larger than ' + str(table[-1]) + ' with ' +
+                                str(lvalue.dtype) + ' values.')
+        return numpy.array(table, dtype=lvalue.dtype)[values]
+
+    # The factorial is only defined for the natural numbers, so it doesn't have a derivative of its own. This is the
+    # derivative of the gamma function that extends it, d(n!)/dn = n! * (H(n) - EulerGamma), where H(n) is the nth
+    # harmonic number.
+    def leftDerivative(self, lvalue, rvalue, value):
+        if hasattr(lvalue, 'dtype'):
+            import numpy
+            # Past 170! the values are infinite anyway
+            harmonic = numpy.concatenate(([0.0], numpy.cumsum(1.0 / numpy.arange(1, 172))))
+            return value * (harmonic[numpy.minimum(lvalue.astype(numpy.int64), 171)] - _EULER_GAMMA)
+        harmonic = math.fsum(1.0 / k for k in range(1, int(lvalue) + 1))
+        try:
+            return value * (harmonic - _EULER_GAMMA)
+        except OverflowError:
+            return math.inf
+
+
+# An operation with any number of children, stored in a list instead of left and right
+# N-ary operations are made by Tree.flatten from chains of the associative binary operation they replace (binary), and
+# are written out exactly like the chain of binary operations nested to the right, e.g. 1 + (2 + 3)
+class NaryOperation(Operation):
+    __slots__ = ('children',)
+    arity = None		# Any number of children
+    binary = None		# The binary operation this replaces
+    mergeLeft = True	# Whether chains in the left children of the binary operations are merged too
+
+    # Initialize the operation
+    def __init__(self):
+        super(NaryOperation, self).__init__()
+        self.children = []
+
+    # Add a child to the node
+    def addChild(self, child):
+        self.children.append(child)
+        child.parent = self
+        self.invalidate()
+
+    # Remove the last child from the node
+    def removeChild(self):
+        if not self.children:
+            raise NodeException('Node has no children to remove.')
+        node = self.children.pop()
+        node.parent = None
+        self.invalidate()
+        return node
+
+    # There's always room for another child
+    def addWhereOpen(self, child):
+        self.addChild(child)
+        return True
+
+    # Apply the operation to two values, like the binary operation
+    def operate(self, lvalue, rvalue):
+        return self.binary.operate(self, lvalue, rvalue)
+
+    # Apply the operation to the values of all of the children
+    def operateAll(self, values):
+        return None
+
+    # Return Python source code that applies the operation to the named operands
+    def compileOperands(self, operands):
+        raise NodeException('Cannot compile operation "' + self.symbol + '".')
+
+    # Apply the operation to a list of arrays of operand values
+    def evaluateArrays(self, arrays):
+        raise NodeException('Cannot evaluate operation "' + self.symbol + '" over arrays.')
+
+    # Return the partial derivatives of the operation with respect to each of its operands
+    def derivatives(self, values, value):
+        raise NodeException('Cannot differentiate operation "' + self.symbol + '".')
+
+    # Return the pieces of the Infix Notation string for the operation
+    def infixParts(self):
+        parts = []
+        for i, child in enumerate(self.children):
+            if i > 0:
+                parts.append(self.separator(i - 1))
+            if isinstance(child, Operation) and self.weight > child.weight:
+                parts += ['(', child, ')']
             else:
-                raise EvalException('Cannot compute the factorial of negative numbers or non-integers.')
+                parts.append(child)
+        return parts
+
+    # Return the string written between the child at index i and the one after it in Infix Notation
+    def separator(self, i):
+        return ' ' + self.symbol + ' '
+
+    # Return the pieces of the Polish Notation string for the operation
+    def polishParts(self):
+        parts = []
+        for child in self.children[:-1]:
+            parts += [self.symbol + ' ', child, ' ']
+        parts.append(self.children[-1])
+        return parts
+
+    # Return the pieces of the Reverse Polish Notation string for the operation
+    def reversePolishParts(self):
+        parts = []
+        for child in self.children:
+            parts += [child, ' ']
+        parts[-1:] = [' ' + self.symbol] * (len(self.children) - 1)
+        return parts
+
+    # Return the pieces of the string representation of the node
+    def stringParts(self):
+        parts = []
+        for child in self.children[:-1]:
+            parts += ['[ ', child, ' ' + self.symbol + ' ']
+        parts.append(self.children[-1])
+        parts += [' ]'] * (len(self.children) - 1)
+        return parts
+
+    # Return a representation of the node
+    def __repr__(self):
+        return f"{self.__class__}({', '.join(str(child) for child in self.children)}, {self.symbol})"
+
+
+# Add any number of nodes together
+class Sum(NaryOperation):
+    __slots__ = ()
+    weight = 1
+    symbol = '+'
+    binary = Plus
+
+    # Add up the values of the children
+    def operateAll(self, values):
+        return _sum(values)
+
+    # Return Python source code that adds up the named operands
+    def compileOperands(self, operands):
+        return '_sum((' + ', '.join(operands) + ',))'
+
+    # Estimate the sum of the operands
+    def estimate(self, operands):
+        return _estimateSum(operands)
+
+    # Add up arrays of operand values
+    def evaluateArrays(self, arrays):
+        return sum(arrays[1:], arrays[0])
+
+    # d(a + b + ...)/da = 1
+    def derivatives(self, values, value):
+        return [1.0] * len(values)
+
+
+# Multiply any number of nodes together
+class Product(NaryOperation):
+    __slots__ = ()
+    weight = 2
+    symbol = '*'
+    binary = Times
+    mergeLeft = False	# Implicit multiplication is only written the same way for chains nested to the right
+
+    # Multiply the values of the children
+    def operateAll(self, values):
+        return math.prod(values)
+
+    # Return Python source code that multiplies the named operands
+    def compileOperands(self, operands):
+        return '_prod((' + ', '.join(operands) + ',))'
+
+    # Estimate the product of the operands
+    def estimate(self, operands):
+        return _estimateProduct(operands)
+
+    # Multiply arrays of operand values
+    def evaluateArrays(self, arrays):
+        return math.prod(arrays[1:], start=arrays[0])
+
+    # d(a * b * ...)/da = b * ..., the product of the other operands
+    # The products are built from the left and right so operands that are zero don't need to be divided out
+    def derivatives(self, values, value):
+        before = [1.0]
+        for operand in values[:-1]:
+            before.append(before[-1] * operand)
+        derivatives = [0.0] * len(values)
+        after = 1.0
+        for i in range(len(values) - 1, -1, -1):
+            derivatives[i] = before[i] * after
+            after = after * values[i]
+        return derivatives
+
+    # Multiplication of variables is usually written with the variables adjacent to each other
+    # Like a chain of Times nested to the right, only the last pair looks at the variable on the right
+    def separator(self, i):
+        if isinstance(self.children[i], Variable):
+            return ''
+        if i == len(self.children) - 2 and isinstance(self.children[i + 1], Variable):
+            return ''
+        return ' * '
+
+
+# Raise one value to the power of another
+def _power(lvalue, rvalue):
+    # Exponents are dumb and mean when negative numbers are involved
+    if lvalue < 0:
+        if rvalue == int(rvalue):
+            return lvalue ** rvalue
         else:
+            # The answer will be complex
+            return (lvalue + 0j) ** rvalue
+    else:
+        return lvalue ** rvalue
+
+
+# The Euler-Mascheroni constant, used by the derivative of the factorial
+_EULER_GAMMA = 0.5772156649015329
+
+
+# Add up a list of values accurately
+# math.fsum only works with floats, so sums of complex numbers or integers too large for floats are added up normally
+def _sum(values):
+    try:
+        return math.fsum(values)
+    except (TypeError, OverflowError):
+        return sum(values)
+
+
+# Calculate the factorial of a value
+def _factorial(value):
+    # Right now factorial is only defined for the natural numbers
+    if value >= 0 and value == int(value):
+        return math.factorial(int(value))
+    else:
+        raise EvalException('Cannot compute the factorial of negative numbers or non-integers.')
+
+
+# Push a binary operation onto the operator stack after applying the operations that bind more tightly than it does
+# An operation of the same weight immediately before this one keeps this one as its right child if that doesn't change
+# the result (e.g. 1+2-3 is parsed as 1+(2-3) but 1-2+3 is parsed as (1-2)+3)
+def _pushOperation(operation, operators, operands):
+    adjacent = True
+    while operators and operators[-1] != Tokenizer.OPENPAREN:
+        previous = operators[-1]
+        if previous.weight < operation.weight:
+            break
+        if previous.weight == operation.weight and adjacent and previous.symbol in '+*^':
+            break
+        _reduceOperation(operators.pop(), operands)
+        adjacent = False
+    operators.append(operation)
+
+
+# Guess which notation an expression is written in: 'infix', 'polish', or 'reverse polish'
+# Polish Notation is the only one that starts with an operator, and Reverse Polish Notation is the only one that ends
+# with a binary operator (possibly followed by factorials); both have exactly one more value than binary operators,
+# which rules out infix expressions like - 2 + 3. Anything else is parsed as Infix Notation. A Reverse Polish
+# expression that ends with a factorial after a value, like 3 !, means the same thing in Infix Notation.
+def _detectNotation(expression):
+    if not isinstance(expression, str):
+        return 'infix'
+    words = expression.split()
+    if len(words) < 2:
+        return 'infix'
+    operators = sum(1 for word in words if word in _OPERATORS and word != '!')
+    if len(words) - words.count('!') != 2 * operators + 1:
+        return 'infix'
+    if words[0] in _OPERATORS:
+        return 'polish'
+    while words[-1] == '!':
+        words.pop()
+    if words[-1] in _OPERATORS:
+        return 'reverse polish'
+    return 'infix'
+
+
+# Check whether a word of a Polish or Reverse Polish expression is a number
+def _isNumber(word):
+    return word[0] in _NUMBERS or (word[0] == '-' and len(word) > 1 and word[1] in _NUMBERS)
+
+
+# Turn a word of a Polish or Reverse Polish expression into a node
+# Words are numbers, operator symbols, variable names, or bound variables written like {x=2}
+def _notationToken(word):
+    if word in _OPERATORS:
+        return getOperation(word)
+    elif _isNumber(word):
+        token = Value(word)
+        if token.number is None:
+            raise ParseException('Invalid number "' + word + '".')
+        return token
+    elif word.startswith('{') and word.endswith('}') and '=' in word:
+        name, value = word[1:-1].split('=', 1)
+        number = _parseNumber(value)
+        if not name or number is None:
+            raise ParseException('Invalid variable "' + word + '".')
+        token = Variable(name)
+        token.set(number)
+        return token
+    elif not any(char in _OPERATORS or char in '(){}=' for char in word):
+        return Variable(word)
+    raise ParseException('Unexpected token "' + word + '".')
+
+
+# Evaluate an expression written using Reverse Polish Notation without building a tree
+# The expression is a string of tokens separated by spaces or an iterable of tokens. Variables are looked up in the
+# variables dictionary; bound variables written like {x=2} use their own value if they aren't in the dictionary.
+def evaluateReversePolishNotation(expression, variables=None):
+    if isinstance(expression, str):
+        expression = expression.split()
+    if variables is None:
+        variables = {}
+    functions = _NOTATION_FUNCTIONS
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    for word in expression:
+        function = functions.get(word)
+        if function is not None:
+            if len(stack) < 2:
+                raise ParseException('Missing value for "' + word + '".')
+            rvalue = pop()
+            stack[-1] = function(stack[-1], rvalue)
+        elif word == '!':
+            if not stack:
+                raise ParseException('Missing value for "!".')
+            stack[-1] = _factorial(stack[-1])
+        elif _isNumber(word):
+            try:
+                push(float(word))
+            except ValueError:
+                raise ParseException('Invalid number "' + word + '".')
+        else:
+            token = _notationToken(word)
+            try:
+                push(float(variables.get(token.name, token.value)))
+            except (TypeError, ValueError):
+                raise EvalException('Cannot evaluate expressions that contain uninitialized variables.')
+    if len(stack) != 1:
+        raise ParseException('Too many values.' if stack else 'Empty expression.')
+    return stack[0]
+
+
+# Pop an operation's arguments off of the operand stack, add them to the operation, and push the operation
+def _reduceOperation(operation, operands):
+    if len(operands) < operation.arity:
+        raise ParseException('Missing value for "' + operation.symbol + '".')
+    if operation.arity == 2:
+        right = operands.pop()
+        operation.addChild(operands.pop())
+        operation.addChild(right)
+    else:
+        operation.addChild(operands.pop())
+    operands.append(operation)
+
+
+# Iterate over the pieces of a string representation of a node without recursion
+# Operations are broken into pieces using the method named by parts_method; other nodes are written with leaf_method
+def _notationFragments(node, parts_method, leaf_method):
+    stack = [node]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            yield item
+        elif isinstance(item, Operation):
+            stack.extend(reversed(getattr(item, parts_method)()))
+        else:
+            yield getattr(item, leaf_method)()
+
+
+# The methods _notationFragments uses for each notation that iterNotation and writeNotation accept
+_NOTATIONS = {
+    'infix': ('infixParts', 'toInfixNotation'),
+    'polish': ('polishParts', 'toPolishNotation'),
+    'reverse polish': ('reversePolishParts', 'toReversePolishNotation'),
+    'string': ('stringParts', '__str__'),
+}
+
+# The number of pieces writeNotation joins into each write
+_WRITE_CHUNK = 4096
+
+
+# Iterate over a node and its descendants in post-order (children before their parents) without recursion
+def _postOrder(node):
+    stack = [(node, False)]
+    while stack:
+        node, visited = stack.pop()
+        if visited or not isinstance(node, Operation):
+            yield node
+            continue
+        stack.append((node, True))
+        if node.arity is None:
+            if not node.children:
+                raise NodeException('Node does not have enough children.')
+            stack.extend((child, False) for child in reversed(node.children))
+            continue
+        if node.left is None or (node.arity == 2 and node.right is None):
             raise NodeException('Node does not have enough children.')
+        if node.arity == 2:
+            stack.append((node.right, False))
+        stack.append((node.left, False))
+
+
+# Compute the structural hashes of a node and its descendants that haven't been hashed yet, without recursion
+# Values are hashed by their numbers so they hash like the numbers they're equal to
+def _hashNodes(root):
+    stack = [(root, False)]
+    while stack:
+        node, visited = stack.pop()
+        if node is None or node.hash_value is not None:
+            continue
+        if isinstance(node, Operation):
+            if not visited:
+                stack.append((node, True))
+                stack.extend((child, False) for child in _children(node))
+                continue
+            if node.arity is None:
+                node.hash_value = hash((type(node), tuple(child.hash_value for child in node.children)))
+            else:
+                node.hash_value = hash((type(node), _childHash(node.left), _childHash(node.right)))
+        elif isinstance(node, Variable):
+            try:
+                node.hash_value = hash((Variable, node.name, node.value))
+            except TypeError:
+                # Values that can't be hashed still equal themselves, so the name is enough
+                node.hash_value = hash((Variable, node.name))
+        elif isinstance(node, Value):
+            # NaN doesn't equal itself, so NaN values are hashed by their text like other values that aren't numbers
+            number = node.number
+            node.hash_value = hash(node.value if number is None or number != number else number)
+        else:
+            node.hash_value = hash(type(node))
+
+
+# The hash of a child of an operation, which might not be there yet
+def _childHash(child):
+    return None if child is None else child.hash_value
+
+
+# See if two nodes are structurally equal, comparing pairs of nodes with an explicit stack so very deep trees don't hit
+# the recursion limit. If hashes is true, operations whose cached structural hashes differ are known to be different.
+def _nodesEqual(node, other, hashes):
+    stack = [(node, other)]
+    while stack:
+        node, other = stack.pop()
+        # Shared subtrees are always equal to themselves
+        if node is other:
+            continue
+        if isinstance(node, Operation):
+            if type(other) != type(node):
+                return False
+            if (hashes and node.hash_value is not None and other.hash_value is not None and
+                    node.hash_value != other.hash_value):
+                return False
+            if node.arity is None:
+                if len(node.children) != len(other.children):
+                    return False
+                stack.extend(zip(reversed(node.children), reversed(other.children)))
+                continue
+            stack.append((node.right, other.right))
+            stack.append((node.left, other.left))
+        elif not (node == other):
+            return False
+    return True
+
+
+# Return the children of an operation in order (which may include None for children that haven't been added yet)
+def _children(node):
+    if node.arity == 2:
+        return (node.left, node.right)
+    elif node.arity == 1:
+        return (node.left,)
+    return node.children
+
+
+# Return the key used to find structurally identical nodes
+# Operations are keyed by the identities of their (already shared) children, so building a key takes constant time
+def _structuralKey(node):
+    if isinstance(node, NaryOperation):
+        return (type(node),) + tuple(id(child) for child in node.children)
+    elif isinstance(node, Operation):
+        return (type(node), id(node.left), id(node.right))
+    elif isinstance(node, Variable):
+        return (Variable, node.name, node.value)
+    elif isinstance(node, Value):
+        return (Value, node.value)
+    return (type(node), id(node))
+
+
+# The number of bytes used by a single node, including the strings and values it owns but not its children
+def _nodeSize(node):
+    size = sys.getsizeof(node)
+    if hasattr(node, '__dict__'):
+        size += sys.getsizeof(node.__dict__)
+    if isinstance(node, Value):
+        size += sys.getsizeof(node.value) + sys.getsizeof(node.number)
+    elif isinstance(node, Variable):
+        size += sys.getsizeof(node.name)
+        if node.value is not None:
+            size += sys.getsizeof(node.value)
+    elif isinstance(node, NaryOperation):
+        size += sys.getsizeof(node.children)
+    return size
+
+
+# Replace structurally identical subtrees with a single shared node. Returns the new root and the number of merged nodes.
+def _shareSubtrees(root):
+    table = {}
+    shared = {}
+    # Hold on to every node until we're done so that no id in shared can be reused by another object
+    nodes = []
+    merged = 0
+    for node in _postOrder(root):
+        if id(node) in shared:
+            continue
+        nodes.append(node)
+        if isinstance(node, NaryOperation):
+            node.children = [shared[id(child)] for child in node.children]
+        elif isinstance(node, Operation):
+            node.left = shared[id(node.left)]
+            if node.right is not None:
+                node.right = shared[id(node.right)]
+        key = _structuralKey(node)
+        canonical = table.get(key)
+        if canonical is None:
+            canonical = table[key] = node
+        else:
+            merged += 1
+        shared[id(node)] = canonical
+    root = shared[id(root)]
+    # Each shared node keeps the first parent that refers to it
+    root.parent = None
+    seen = set([id(root)])
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, Operation):
+            for child in reversed(_children(node)):
+                if child is not None and id(child) not in seen:
+                    seen.add(id(child))
+                    child.parent = node
+                    stack.append(child)
+    return root, merged
+
+
+# Evaluate nodes given in post-order (see _postOrder), returning the value of the last one
+def _evaluateNodes(nodes):
+    values = []
+    for node in nodes:
+        if isinstance(node, Operation):
+            if node.arity is None:
+                operands = values[-len(node.children):]
+                del values[-len(node.children):]
+                values.append(node.operateAll(operands))
+                continue
+            rvalue = values.pop() if node.arity == 2 else None
+            values.append(node.operate(values.pop(), rvalue))
+        else:
+            values.append(node.evaluate())
+    return values[0]
+
+
+# Evaluate a node whose subtrees may be shared, evaluating each distinct node only once
+# If guard is given it's called right before each operation is applied.
+def _evaluateShared(root, guard=None):
+    profiler = _profiler
+    counts = collections.Counter() if profiler is not None else None
+    values = {}
+    stack = [(root, False)]
+    while stack:
+        node, visited = stack.pop()
+        if id(node) in values:
+            continue
+        if not isinstance(node, Operation):
+            values[id(node)] = node.evaluate()
+        elif visited:
+            if counts is not None:
+                counts[type(node)] += 1
+            if guard is not None:
+                guard()
+            if node.arity is None:
+                values[id(node)] = node.operateAll([values[id(child)] for child in node.children])
+            else:
+                rvalue = values[id(node.right)] if node.arity == 2 else None
+                values[id(node)] = node.operate(values[id(node.left)], rvalue)
+        elif node.arity is None:
+            if not node.children:
+                raise NodeException('Node does not have enough children.')
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(node.children))
+        else:
+            if node.left is None or (node.arity == 2 and node.right is None):
+                raise NodeException('Node does not have enough children.')
+            stack.append((node, True))
+            if node.arity == 2:
+                stack.append((node.right, False))
+            stack.append((node.left, False))
+    if counts is not None:
+        profiler.addVisits('evaluate', counts)
+    return values[id(root)]
+
+
+# Estimate the cost of evaluating a node without evaluating it, returning a dictionary with
+# nodes       the number of nodes
+# depth       the depth of the tree
+# operations  the number of operations that have to be evaluated
+# bits        the size in bits of the largest integer computed along the way (0 if there aren't any)
+# work        the total size in bits of the integers computed along the way, which is what big integer arithmetic
+#             spends its time on
+# Everything but factorials is computed with floats, so the only values that can get huge are the integers computed by
+# factorials and by exact arithmetic on nothing but their results. The tree is only counted, and those integers are
+# then estimated starting from each factorial and working up through its ancestors for as long as they're integers.
+# Values are followed as floats while they fit in one and as logarithms once they don't (see Operation.estimate), so
+# each node takes constant time however big its value is, and the other values are only estimated when a factorial
+# needs them. Variables use their current values.
+# If the node has shared subtrees, shared must be true so each shared node is only counted once.
+def estimateCost(node, shared=False):
+    if shared:
+        return _estimateCostShared(node)
+    nodes = 0
+    depth = 0
+    operations = 0
+    factorials = []
+    # The tree is counted a level at a time
+    level = [node]
+    while level:
+        nodes += len(level)
+        depth += 1
+        below = []
+        for current in level:
+            if not isinstance(current, Operation):
+                continue
+            operations += 1
+            if current.arity is None:
+                if not current.children:
+                    raise NodeException('Node does not have enough children.')
+                below.extend(current.children)
+                continue
+            if current.left is None or (current.arity == 2 and current.right is None):
+                raise NodeException('Node does not have enough children.')
+            below.append(current.left)
+            if current.arity == 2:
+                below.append(current.right)
+            else:
+                factorials.append(current)
+        level = below
+    bits = 0
+    work = 0
+    # Nodes are counted after their ancestors, so going backwards every factorial is reached after the ones below it
+    estimates = {}
+    for factorial in reversed(factorials):
+        current = factorial
+        while True:
+            if current is factorial:
+                operand = estimates.get(id(current.left)) or _estimateValue(current.left, estimates)
+                estimate = current.estimate([operand])
+            else:
+                operands = [estimates.get(id(child)) for child in _children(current)]
+                if None in operands or not all(operand[2] for operand in operands):
+                    # Anything combined with a float is a float, and the rest of the operands aren't all known yet
+                    break
+                estimate = current.estimate(operands)
+            estimates[id(current)] = estimate
+            if not estimate[2]:
+                break
+            size = _estimateBits(estimate)
+            bits = max(bits, size)
+            work += size
+            current = current.parent
+            if not isinstance(current, Operation) or isinstance(current, Factorial):
+                break
+    return _costOf(nodes, depth, operations, bits, work)
+
+
+# Estimate the value of a node (see Operation.estimate), e.g. the operand of a factorial
+# The estimates of nodes are kept in estimates, a dictionary keyed by node id, and nodes that are already in it aren't
+# estimated again
+def _estimateValue(node, estimates):
+    if not isinstance(node, Operation):
+        return _estimateLeaf(node)
+    stack = [(node, False)]
+    while stack:
+        current, visited = stack.pop()
+        if id(current) in estimates:
+            continue
+        if not isinstance(current, Operation):
+            estimates[id(current)] = _estimateLeaf(current)
+        elif visited:
+            estimates[id(current)] = current.estimate([estimates[id(child)] for child in _children(current)])
+        else:
+            stack.append((current, True))
+            stack.extend((child, False) for child in reversed(_children(current)))
+    return estimates[id(node)]
+
+
+# Estimate the cost of evaluating a node with shared subtrees (see estimateCost)
+# Every distinct node is estimated, since a node's estimate is needed by all of its parents
+def _estimateCostShared(node):
+    estimates = {}
+    depths = {}
+    operations = 0
+    bits = 0
+    work = 0
+    stack = [(node, False)]
+    while stack:
+        current, visited = stack.pop()
+        if id(current) in estimates:
+            continue
+        if not isinstance(current, Operation):
+            estimates[id(current)] = _estimateLeaf(current)
+            depths[id(current)] = 1
+            continue
+        children = _children(current)
+        if not children or None in children:
+            raise NodeException('Node does not have enough children.')
+        if not visited:
+            stack.append((current, True))
+            stack.extend((child, False) for child in reversed(children))
+            continue
+        estimate = current.estimate([estimates[id(child)] for child in children])
+        estimates[id(current)] = estimate
+        depths[id(current)] = 1 + max(depths[id(child)] for child in children)
+        operations += 1
+        if estimate[2]:
+            size = _estimateBits(estimate)
+            bits = max(bits, size)
+            work += size
+    return _costOf(len(estimates), depths[id(node)], operations, bits, work)
+
+
+# Return the size in bits of the integer in an estimate
+# Sizes too big to be integers in practice are infinite
+def _estimateBits(estimate):
+    return math.floor(max(estimate[1], 0)) + 1 if estimate[1] < 1e18 else math.inf
+
+
+# Return the dictionary returned by estimateCost
+def _costOf(nodes, depth, operations, bits, work):
+    return {
+        'nodes': nodes,
+        'depth': depth,
+        'operations': operations,
+        'bits': bits,
+        'work': work,
+    }
+
+
+# The estimate of a value of zero
+_ZERO_ESTIMATE = (0.0, -math.inf, False)
+
+
+# Return the estimate of a value computed as a float (see Operation.estimate)
+# If the float overflowed, the estimate uses size (the base-2 logarithm of the absolute value) instead
+def _estimateOf(value, integer, size=math.inf):
+    magnitude = abs(value)
+    if magnitude == 0:
+        return (value, -math.inf, integer)
+    if magnitude != magnitude:
+        # NaN isn't too big for a float, it's just not a number
+        return (value, 0.0, False)
+    if not math.isfinite(magnitude):
+        return (None, size, integer)
+    return (value, math.log2(magnitude), integer)
+
+
+# Return the estimate of a leaf node
+# Unset variables and values that aren't numbers make evaluation fail as soon as they're reached, so they count as 0
+def _estimateLeaf(node):
+    if isinstance(node, Value):
+        value = node.number
+    elif isinstance(node, Variable):
+        value = _parseNumber(str(node.value)) if isinstance(node.value, str) else node.value
+    else:
+        value = None
+    if not isinstance(value, (int, float)):
+        return _ZERO_ESTIMATE
+    if math.isinf(value):
+        # Infinite values are floats like any other, not values too big for one
+        return (float(value), math.inf, False)
+    return _estimateOf(float(value), False)
+
+
+# Estimate the result of adding or subtracting two operands with combine
+# Without the values, the result is at most twice the size of the bigger operand
+def _estimateAdd(operands, combine):
+    (lvalue, lsize, linteger), (rvalue, rsize, rinteger) = operands
+    size = max(lsize, rsize) + 1
+    if lvalue is not None and rvalue is not None:
+        return _estimateOf(combine(lvalue, rvalue), linteger and rinteger, size)
+    return (None, size, linteger and rinteger)
+
+
+# Estimate the sum of any number of operands
+# Without the values, a sum of n operands is at most n times the size of the largest one
+def _estimateSum(operands):
+    integer = all(operand[2] for operand in operands)
+    size = max(operand[1] for operand in operands) + math.log2(len(operands))
+    values = [operand[0] for operand in operands]
+    if None not in values:
+        try:
+            return _estimateOf(math.fsum(values), integer, size)
+        except (ArithmeticError, TypeError, ValueError):
+            pass
+    return (None, size, integer)
+
+
+# Estimate the product of any number of operands
+def _estimateProduct(operands):
+    integer = all(operand[2] for operand in operands)
+    sizes = [operand[1] for operand in operands]
+    if -math.inf in sizes:
+        return (0.0, -math.inf, integer)
+    values = [operand[0] for operand in operands]
+    if None not in values:
+        return _estimateOf(math.prod(values), integer, math.fsum(sizes))
+    return (None, math.fsum(sizes), integer)
+
+
+# Evaluate a node, reusing the cached values of operations and caching the values of the ones that are recomputed.
+# Leaves are cheap to evaluate, so they're never cached. Returns the value and the number of recomputed operations.
+def _evaluateIncremental(root):
+    if not isinstance(root, Operation):
+        return root.evaluate(), 0
+    profiler = _profiler
+    # Only the operations that are recomputed count as visited
+    counts = collections.Counter() if profiler is not None else None
+    recomputed = 0
+    stack = [(root, False)]
+    while stack:
+        node, visited = stack.pop()
+        if node.cache is not _UNSET:
+            continue
+        if visited and counts is not None:
+            counts[type(node)] += 1
+        if visited and node.arity is None:
+            node.cache = node.operateAll([child.cache if isinstance(child, Operation) else child.evaluate()
+                                          for child in node.children])
+            recomputed += 1
+            continue
+        if visited:
+            lvalue = node.left.cache if isinstance(node.left, Operation) else node.left.evaluate()
+            if node.arity == 2:
+                rvalue = node.right.cache if isinstance(node.right, Operation) else node.right.evaluate()
+            else:
+                rvalue = None
+            node.cache = node.operate(lvalue, rvalue)
+            recomputed += 1
+            continue
+        if node.arity is None:
+            if not node.children:
+                raise NodeException('Node does not have enough children.')
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(node.children) if isinstance(child, Operation))
+            continue
+        if node.left is None or (node.arity == 2 and node.right is None):
+            raise NodeException('Node does not have enough children.')
+        stack.append((node, True))
+        if isinstance(node.right, Operation) and node.arity == 2:
+            stack.append((node.right, False))
+        if isinstance(node.left, Operation):
+            stack.append((node.left, False))
+    if counts is not None:
+        profiler.addVisits('evaluate', counts)
+    return root.cache, recomputed
+
+
+# Reverse-mode automatic differentiation. The forward sweep evaluates each node in post-order, using leafValue for the
+# leaves and operate or evaluateArray (if arrays is True) for the operations, and the backward sweep pushes the derivative of the
+# root with respect to each node (its adjoint) down to the node's children. Only children that contain variables get
+# an adjoint, so the derivatives of constant subtrees are never computed. Returns the value and the gradient.
+def _reverseMode(root, leafValue, arrays):
+    # Each entry is (node, value, indices of the entries of its children, whether it contains variables)
+    entries = []
+    stack = []
+    for node in _postOrder(root):
+        if isinstance(node, Operation):
+            count = len(node.children) if node.arity is None else node.arity
+            children = tuple(stack[-count:])
+            del stack[-count:]
+            operands = [entries[child][1] for child in children]
+            if node.arity is None:
+                value = node.evaluateArrays(operands) if arrays else node.operateAll(operands)
+            else:
+                rvalue = operands[1] if count == 2 else None
+                if arrays:
+                    value = node.evaluateArray(operands[0], rvalue)
+                else:
+                    value = node.operate(operands[0], rvalue)
+            entries.append((node, value, children, any(entries[child][3] for child in children)))
+        else:
+            entries.append((node, leafValue(node), (), isinstance(node, Variable)))
+        stack.append(len(entries) - 1)
+    adjoints = [0.0] * len(entries)
+    adjoints[-1] = 1.0
+    gradient = {}
+    if arrays:
+        import numpy
+        # Derivatives that don't exist are NaN over arrays (e.g. 0^y at y = 0), so NumPy doesn't need to warn about them
+        with numpy.errstate(invalid='ignore'):
+            _backwardSweep(entries, adjoints, gradient)
+    else:
+        _backwardSweep(entries, adjoints, gradient)
+    return entries[-1][1], gradient
+
+
+# The backward sweep of _reverseMode, which adds the adjoints of the variables to gradient
+def _backwardSweep(entries, adjoints, gradient):
+    for index in range(len(entries) - 1, -1, -1):
+        node, value, children, variable = entries[index]
+        adjoint = adjoints[index]
+        if isinstance(node, Variable):
+            gradient[node.name] = gradient.get(node.name, 0.0) + adjoint
+        elif variable:
+            operands = [entries[child][1] for child in children]
+            if node.arity is None:
+                derivatives = node.derivatives(operands, value)
+            else:
+                rvalue = operands[1] if len(operands) == 2 else None
+            for position, child in enumerate(children):
+                if not entries[child][3]:
+                    continue
+                if node.arity is None:
+                    derivative = derivatives[position]
+                elif position == 0:
+                    derivative = node.leftDerivative(operands[0], rvalue, value)
+                else:
+                    derivative = node.rightDerivative(operands[0], rvalue, value)
+                adjoints[child] = adjoints[child] + adjoint * derivative
+
+
+# Factors trees for Operation.factor
+# Every subtree is given a structural key, a small integer that's the same for structurally identical subtrees, so
+# finding common factors only has to compare integers. Keys are built from the keys of the children and cached, so
+# each node is only keyed once.
+class _Factoring(object):
+    def __init__(self):
+        self.keys = {}		# Maps the id of each keyed node to the node (so the id isn't reused) and its key
+        self.table = {}		# Maps the structure of a node to its key
+
+    # Return the structural key of a node
+    def key(self, node):
+        if id(node) in self.keys:
+            return self.keys[id(node)][1]
+        stack = [(node, False)]
+        while stack:
+            current, visited = stack.pop()
+            if id(current) in self.keys:
+                continue
+            if isinstance(current, Operation) and not visited:
+                stack.append((current, True))
+                stack.extend((child, False) for child in _children(current) if child is not None)
+                continue
+            if isinstance(current, NaryOperation):
+                structure = (type(current), tuple(self.keys[id(child)][1] for child in current.children))
+            elif isinstance(current, Operation):
+                right = self.keys[id(current.right)][1] if current.right is not None else None
+                structure = (type(current), self.keys[id(current.left)][1], right)
+            elif isinstance(current, Variable):
+                structure = (Variable, current.name, current.value)
+            else:
+                structure = (type(current), current.value)
+            self.keys[id(current)] = (current, self.table.setdefault(structure, len(self.table)))
+        return self.keys[id(node)][1]
+
+    # Factor a node bottom-up without recursion
+    # Chains of additions and subtractions are factored as a whole sum once all of their terms have been factored
+    def factor(self, root):
+        profiler = _profiler
+        counts = collections.Counter() if profiler is not None else None
+        results = {}
+        stack = [(root, False, False)]
+        while stack:
+            node, visited, in_sum = stack.pop()
+            if id(node) in results:
+                continue
+            if not isinstance(node, Operation):
+                results[id(node)] = (node, node)
+                continue
+            if not visited:
+                stack.append((node, True, in_sum))
+                is_sum = isinstance(node, (Plus, Minus, Sum))
+                stack.extend((child, False, is_sum) for child in reversed(_children(node)) if child is not None)
+                continue
+            if counts is not None:
+                counts[type(node)] += 1
+            _replaceChildren(node, [results[id(child)][1] if child is not None else None for child in _children(node)])
+            if isinstance(node, (Plus, Minus, Sum)):
+                # Sums inside of a larger sum are factored with the rest of it
+                result = node if in_sum else self.factorSum(self.terms(node, 1), node)
+                # Flattened sums stay flattened
+                if isinstance(node, Sum) and result is not node:
+                    result = _flatten(result)[0]
+            elif isinstance(node, Product):
+                result = self.factorPowers(node)
+            else:
+                result = self.factorProduct(node)
+            results[id(node)] = (node, result)
+        if counts is not None:
+            profiler.addVisits('factor', counts)
+        return results[id(root)][1]
+
+    # Return the terms of a sum as a list of signs and nodes, e.g. [(1, a), (-1, b), (1, c)] for a-b+c
+    def terms(self, node, sign):
+        terms = []
+        stack = [(node, sign)]
+        while stack:
+            node, sign = stack.pop()
+            if isinstance(node, Plus):
+                stack.append((node.right, sign))
+                stack.append((node.left, sign))
+            elif isinstance(node, Sum):
+                stack.extend((child, sign) for child in reversed(node.children))
+            elif isinstance(node, Minus):
+                stack.append((node.right, -sign))
+                stack.append((node.left, sign))
+            else:
+                terms.append((sign, node))
+        return terms
+
+    # Return the factored sum of a list of terms, or node if none of them have a common factor
+    def factorSum(self, terms, node=None):
+        changed = False
+        while True:
+            terms, grouped = self.groupTerms(terms)
+            if not grouped:
+                break
+            changed = True
+        if not changed and node is not None:
+            return node
+        return _sumNode(terms)
+
+    # Group the products in a list of terms that have a common factor, e.g. x*a + y*b + x*c becomes x*(a+c) + y*b
+    # Multiplications can share a factor on either side, but divisions only on the same side, like the pairs that
+    # factor() has always handled. Each term is grouped by the factor it shares with the most other terms, and the
+    # group takes the place of its first term. Returns the new list of terms and whether anything was grouped.
+    def groupTerms(self, terms):
+        candidates = []
+        counts = {}
+        members = {}
+        for index, (sign, term) in enumerate(terms):
+            if isinstance(term, Times):
+                keys = [(Times, None, self.key(term.left)), (Times, None, self.key(term.right))]
+                if keys[0] == keys[1]:
+                    keys.pop()
+            elif isinstance(term, Product):
+                keys = []
+                for child in term.children:
+                    key = (Product, None, self.key(child))
+                    if key not in keys:
+                        keys.append(key)
+            elif isinstance(term, Divide):
+                keys = [(Divide, 'left', self.key(term.left)), (Divide, 'right', self.key(term.right))]
+            else:
+                keys = []
+            candidates.append(keys)
+            for key in keys:
+                counts[key] = counts.get(key, 0) + 1
+                members.setdefault(key, []).append(index)
+        used = [False] * len(terms)
+        grouped = []
+        changed = False
+        for index, (sign, term) in enumerate(terms):
+            if used[index]:
+                continue
+            best = None
+            for key in candidates[index]:
+                if best is None or counts[key] > counts[best]:
+                    best = key
+            group = [index]
+            if best is not None and counts[best] > 1:
+                group = [member for member in members[best] if not used[member]]
+            for member in group:
+                used[member] = True
+                for key in candidates[member]:
+                    counts[key] -= 1
+            if len(group) == 1:
+                grouped.append((sign, term))
+                continue
+            changed = True
+            # The common factor is written on the same side that it's on in the first term
+            common, common_on_left = self.commonFactor(term, best)
+            cofactors = []
+            for member in group:
+                member_sign, member_term = terms[member]
+                cofactors.extend(self.terms(self.cofactor(member_term, best), member_sign * sign))
+            new_node = type(term)()
+            if common_on_left:
+                new_node.addChild(common)
+                new_node.addChild(self.factorSum(cofactors))
+            else:
+                new_node.addChild(self.factorSum(cofactors))
+                new_node.addChild(common)
+            grouped.append((sign, new_node))
+        return grouped, changed
+
+    # Return the common factor of a product for a key chosen by groupTerms, and whether it's on the left
+    def commonFactor(self, term, key):
+        if isinstance(term, Product):
+            for i, child in enumerate(term.children):
+                if self.key(child) == key[2]:
+                    return child, i == 0
+        common_on_left = key[1] == 'left' or (key[1] is None and self.key(term.left) == key[2])
+        return (term.left if common_on_left else term.right), common_on_left
+
+    # Return what's left of a product after removing the common factor for a key chosen by groupTerms
+    def cofactor(self, term, key):
+        if isinstance(term, Product):
+            others = list(term.children)
+            for i, child in enumerate(others):
+                if self.key(child) == key[2]:
+                    del others[i]
+                    break
+            if len(others) == 1:
+                return others[0]
+            product = Product()
+            for child in others:
+                product.addChild(child)
+            return product
+        elif key[1] is None:
+            return term.right if self.key(term.left) == key[2] else term.left
+        return term.right if key[1] == 'left' else term.left
+
+    # Combine the powers with a common base in a product with any number of factors, e.g. x^a*y*x^b becomes x^(a+b)*y
+    def factorPowers(self, node):
+        bases = {}
+        for i, child in enumerate(node.children):
+            if isinstance(child, Exponent):
+                bases.setdefault(self.key(child.left), []).append(i)
+        if all(len(indices) == 1 for indices in bases.values()):
+            return node
+        factors = []
+        for i, child in enumerate(node.children):
+            indices = bases.get(self.key(child.left)) if isinstance(child, Exponent) else None
+            if not indices or len(indices) == 1:
+                factors.append(child)
+            elif indices[0] == i:
+                power = Exponent()
+                power.addChild(child.left)
+                power.addChild(self.factorSum([term for j in indices
+                                               for term in self.terms(node.children[j].right, 1)]))
+                factors.append(power)
+        if len(factors) == 1:
+            return factors[0]
+        product = Product()
+        for child in factors:
+            product.addChild(child)
+        return product
+
+    # Factor a product or quotient of powers with a common base or exponent, e.g. x^y*x^z becomes x^(y+z) and
+    # y^x/z^x becomes (y/z)^x
+    def factorProduct(self, node):
+        if not (isinstance(node, (Times, Divide)) and isinstance(node.left, Exponent) and
+                isinstance(node.right, Exponent)):
+            return node
+        left, right = node.left, node.right
+        new_node = Exponent()
+        if self.key(left.left) == self.key(right.left):
+            sign = 1 if isinstance(node, Times) else -1
+            new_node.addChild(left.left)
+            new_node.addChild(self.factorSum(self.terms(left.right, 1) + self.terms(right.right, sign)))
+        elif self.key(left.right) == self.key(right.right):
+            base = type(node)()
+            base.addChild(left.left)
+            base.addChild(right.left)
+            new_node.addChild(self.factorProduct(base))
+            new_node.addChild(left.right)
+        else:
+            return node
+        return new_node
+
+
+# Set the children of an operation, keeping the parent links and cached values consistent
+def _replaceChildren(node, children):
+    changed = False
+    if node.arity is None:
+        if any(old is not new for old, new in zip(node.children, children)):
+            node.children = list(children)
+            for child in children:
+                child.parent = node
+            changed = True
+    else:
+        if node.left is not children[0]:
+            node.left = children[0]
+            children[0].parent = node
+            changed = True
+        if node.arity == 2 and node.right is not children[1]:
+            node.right = children[1]
+            children[1].parent = node
+            changed = True
+    if changed:
+        node.invalidate()
+
+
+# The n-ary operation that replaces chains of each associative operation
+_NARY_OPERATIONS = {Plus: Sum, Times: Product, Sum: Sum, Product: Product}
+
+
+# Replace chains of additions and multiplications with Sum and Product nodes, without recursion
+# Additions are merged however they're nested, but multiplications only through right children (see mergeLeft).
+# Chains are found from the top down, so each chain is collected in a single walk over its nodes. Returns the new root
+# and the number of operations that were removed.
+def _flatten(root):
+    results = {}
+    removed = 0
+    stack = [(root, False, None)]
+    while stack:
+        node, visited, chain = stack.pop()
+        if id(node) in results:
+            continue
+        if not isinstance(node, Operation):
+            results[id(node)] = (node, node)
+            continue
+        kind = _NARY_OPERATIONS.get(type(node))
+        if not visited:
+            stack.append((node, True, chain))
+            children = _children(node)
+            for i in range(len(children) - 1, -1, -1):
+                if children[i] is not None:
+                    stack.append((children[i], False, _chainKind(kind, i, children)))
+            continue
+        if kind is None:
+            _replaceChildren(node, [results[id(child)][1] if child is not None else None for child in _children(node)])
+            results[id(node)] = (node, node)
+        elif kind is not chain:
+            # This is the top of a chain, so collect the operands of every operation in it
+            flattened = kind()
+            operands = [(node, kind)]
+            while operands:
+                operand, chain = operands.pop()
+                if chain is not None and _NARY_OPERATIONS.get(type(operand)) is kind:
+                    children = _children(operand)
+                    for i in range(len(children) - 1, -1, -1):
+                        operands.append((children[i], _chainKind(kind, i, children)))
+                    removed += 1
+                else:
+                    flattened.addChild(results[id(operand)][1])
+            removed -= 1
+            results[id(node)] = (node, flattened)
+    return results[id(root)][1], removed
+
+
+# Return the kind of chain that the child at index i of a list of children belongs to, or None if it starts a new one
+def _chainKind(kind, i, children):
+    if kind is None or (not kind.mergeLeft and i < len(children) - 1):
+        return None
+    return kind
+
+
+# Build the tree for a list of signs and terms like the one returned by _Factoring.terms
+# The sum is built the same way the parser would build it from Infix Notation
+def _sumNode(terms):
+    operators = []
+    operands = [terms[0][1]]
+    for sign, term in terms[1:]:
+        _pushOperation(Plus() if sign > 0 else Minus(), operators, operands)
+        operands.append(term)
+    while operators:
+        _reduceOperation(operators.pop(), operands)
+    return operands[0]
+
+
+# The cache used by Tree.parse; caching is disabled until enableParseCache is called
+_parse_cache = None
+
+
+# Cache parsed expressions so parsing the same expression again only has to copy a tree. Returns the cache.
+def enableParseCache(maxsize=1024):
+    global _parse_cache
+    _parse_cache = ParseCache(maxsize)
+    return _parse_cache
+
+
+# Stop caching parsed expressions
+def disableParseCache():
+    global _parse_cache
+    _parse_cache = None
+
+
+# Return the parse cache, or None if caching is disabled
+def getParseCache():
+    return _parse_cache
+
+
+# The profiler that records the phases of the pipeline; profiling is disabled until enableProfiling is called
+_profiler = None
+
+
+# Start recording how long each phase of the pipeline takes and which operations it visits. Returns the profiler.
+def enableProfiling():
+    global _profiler
+    _profiler = Profiler()
+    return _profiler
+
+
+# Stop profiling
+def disableProfiling():
+    global _profiler
+    _profiler = None
+
+
+# Return the profiler, or None if profiling is disabled
+def getProfiler():
+    return _profiler
+
+
+# Profile everything run inside a with statement with a new profiler, which the statement returns, e.g.
+#     with profiling() as profiler:
+#         ...
+#     print(profiler.snapshot())
+# Whatever profiler was enabled before is restored afterwards.
+@contextlib.contextmanager
+def profiling():
+    global _profiler
+    previous = _profiler
+    profiler = _profiler = Profiler()
+    try:
+        yield profiler
+    finally:
+        _profiler = previous
+
+
+# Return a sequence of nodes as a list, together with the number of nodes of each type in it
+def _countVisits(nodes):
+    nodes = list(nodes)
+    return nodes, collections.Counter(map(type, nodes))
+
+
+# Parse the text of a numeric literal, returning None if it isn't a number
+# Literals are always stored as floats since that's what evaluating them has always produced
+def _parseNumber(text):
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+# Return the value to store for a variable, using the number of a Value instead of the node itself
+def _rawValue(value):
+    if isinstance(value, Value):
+        return value.value if value.number is None else value.number
+    return value
+
+
+# Marker for compiled variables that don't have a value
+_UNSET = object()
+
+
+# Opcodes used by FlatTree
+_PUSH_CONSTANT = 0
+_PUSH_VARIABLE = 1
+_FACTORIAL = 7
+_OPCODES = {Plus: 2, Minus: 3, Times: 4, Divide: 5, Exponent: 6, Factorial: _FACTORIAL}
+_FLAT_FUNCTIONS = (None, None, operator.add, operator.sub, operator.mul, operator.truediv, _power, None)
+
+
+# The layout of encoded trees and expression stores
+_ENCODING_MAGIC = b'EXPT'
+_ENCODING_VERSION = 1
+_ENCODING_HEADER = struct.Struct('<4sBBIII')
+_OPERAND_TYPECODES = {1: 'B', 2: 'H', 4: 'I'}
+_STORE_MAGIC = b'EXPS'
+_STORE_HEADER = struct.Struct('<4sBQQ')
+
+
+# The array typecode of the smallest unsigned integers that can hold indices up to count
+def _operandTypecode(count):
+    if count <= 0x100:
+        return 'B'
+    elif count <= 0x10000:
+        return 'H'
+    return 'I'
+
+
+# Encode a string as its UTF-8 length followed by the UTF-8 bytes
+# Lengths under 255 take one byte; longer ones are a 255 byte followed by a 32-bit length
+def _encodeString(string):
+    data = string.encode('utf-8')
+    if len(data) < 0xFF:
+        return bytes((len(data),)) + data
+    return b'\xff' + struct.pack('<I', len(data)) + data
+
+
+# Decode a string encoded by _encodeString, returning the string and the offset after it
+def _decodeString(data, offset):
+    length = data[offset]
+    offset += 1
+    if length == 0xFF:
+        length = struct.unpack_from('<I', data, offset)[0]
+        offset += 4
+    if offset + length > len(data):
+        raise ValueError('String runs past the end of the data.')
+    return str(data[offset:offset + length], 'utf-8'), offset + length
+
+
+# The functions for the binary operator symbols, used by evaluateReversePolishNotation
+_NOTATION_FUNCTIONS = {'+': operator.add, '-': operator.sub, '*': operator.mul, '/': operator.truediv, '^': _power}
 
 
 # Return an object of the correct type given the symbol representing an operation
@@ -988,30 +3368,258 @@ def getOperation(operation_symbol):
 
 
 # Simplify a node into the smallest possible tree by evaluating as much of it as possible
+# If the whole node can be evaluated its value is returned, otherwise a new tree where every constant subtree has been
+# replaced by a Value. The node is folded bottom-up in a single pass, so each node is only visited once.
 def simplify(node):
+    profiler = _profiler
+    if profiler is not None and not profiler.running('simplify'):
+        return profiler.call('simplify', simplify, node)
     if not node or not isinstance(node, Node):
         # Null nodes, numbers, etc. can't be simplified
         return node
-    try:
-        # The easiest way to simplify a node is to just evaluate it
-        return node.evaluate()
-    except EvalException:
-        # If we can't evaluate the root node, maybe it has children we can evaluate
-        if isinstance(node, Operation):
-            if node.left:
-                lvalue = simplify(node.left)
-            else:
-                lvalue = node.left
-            if node.right:
-                rvalue = simplify(node.right)
-            else:
-                rvalue = node.right
+    nodes = _postOrder(node)
+    if profiler is not None:
+        nodes, counts = _countVisits(nodes)
+    # Each entry is (value, node): the value of a constant subtree and the subtree itself, or _UNSET and the simplified
+    # copy of a subtree that contains unset variables
+    results = []
+    for current in nodes:
+        if isinstance(current, NaryOperation):
+            entries = results[-len(current.children):]
+            del results[-len(current.children):]
+            results.append(_foldNary(current, entries))
+        elif isinstance(current, Operation):
+            right = results.pop() if current.arity == 2 else (None, None)
+            left = results.pop()
+            if left[0] is not _UNSET and right[0] is not _UNSET:
+                try:
+                    results.append((current.operate(left[0], right[0]), current))
+                    continue
+                except (EvalException, ArithmeticError):
+                    # Keep constant subtrees that can't be evaluated, e.g. 0^-1 or 10^1000, as they are
+                    pass
+            new_node = current.copyNode()
+            new_node.addChild(_foldedNode(left))
+            if current.arity == 2:
+                new_node.addChild(_foldedNode(right))
+            results.append((_UNSET, new_node))
+        elif isinstance(current, Variable):
+            value = _UNSET
+            if current.value is not None:
+                try:
+                    value = float(current.value)
+                except (TypeError, ValueError):
+                    pass
+            results.append((value, current if value is not _UNSET else current.copyNode()))
+        else:
+            results.append((current.evaluate(), current))
+    if profiler is not None:
+        profiler.addVisits('simplify', counts)
+    value, root = results[0]
+    return root if value is _UNSET else value
+
+
+# Simplify an n-ary operation given the entries of its children, like simplify does for other operations
+# All of the constant children are combined into one, in the place of the first one, e.g. 2+x+3 becomes 5+x
+def _foldNary(node, entries):
+    constants = [value for value, child in entries if value is not _UNSET]
+    if len(constants) == len(entries):
+        try:
+            return (node.operateAll(constants), node)
+        except (EvalException, ArithmeticError):
+            pass
+    elif len(constants) > 1:
+        try:
+            folded = _numberNode(node.operateAll(constants))
+        except (EvalException, ArithmeticError):
+            folded = None
+        if folded is not None:
+            kept = []
+            for entry in entries:
+                if entry[0] is _UNSET:
+                    kept.append(entry)
+                elif folded is not None:
+                    kept.append((_UNSET, folded))
+                    folded = None
+            entries = kept
+    if len(entries) == 1:
+        return entries[0]
+    new_node = node.copyNode()
+    for entry in entries:
+        new_node.addChild(_foldedNode(entry))
+    return (_UNSET, new_node)
+
+
+# Return the node for an entry of the results built by simplify
+# Constants become Values unless their value can't be written as a literal (e.g. complex or infinite values), in
+# which case the constant subtree is copied instead
+def _foldedNode(entry):
+    value, node = entry
+    if value is _UNSET:
+        return node
+    folded = _numberNode(value)
+    return node.copy() if folded is None else folded
 
-            new_node = type(node)()
-            new_node.left = lvalue
-            new_node.right = rvalue
 
-            return new_node
-        else:
-            # This node can't be simplified
-            return node
+# Return a Value for a number, or None if the number can't be written as a literal
+def _numberNode(value):
+    if isinstance(value, int):
+        value = float(value) if abs(value) < 2 ** 1023 else math.inf
+    if not isinstance(value, float) or not math.isfinite(value):
+        return None
+    folded = Value.__new__(Value)
+    folded.parent = None
+    folded.hash_value = None
+    folded.value = str(int(value)) if value.is_integer() and abs(value) < 2 ** 53 else repr(value)
+    folded.number = value
+    return folded
+
+
+# The state of a process evaluating rows for Tree.evaluateParallel
+_parallel_state = None
+
+
+# Convert a column of values into a buffer of doubles
+def _doubles(column):
+    try:
+        view = memoryview(column)
+        if view.format == 'd' and view.ndim == 1 and view.c_contiguous:
+            return view
+    except TypeError:
+        pass
+    return memoryview(array.array('d', column))
+
+
+# Set up a process to evaluate rows of the table in shared memory: compile the tree and attach to the memory
+def _startParallelWorker(flat, names, memory_name, rows):
+    global _parallel_state
+    memory = multiprocessing.shared_memory.SharedMemory(memory_name)
+    view = memory.buf.cast('d')
+    columns = [view[i * rows:(i + 1) * rows] for i in range(len(names))]
+    output = view[len(names) * rows:]
+    _parallel_state = (flat.toTree().compile(), names, columns, output, memory, view)
+
+
+# Let go of the shared memory used by a process that evaluated rows
+def _stopParallelWorker():
+    global _parallel_state
+    if _parallel_state is not None:
+        function, names, columns, output, memory, view = _parallel_state
+        _parallel_state = None
+        for buffer in columns + [output, view]:
+            buffer.release()
+        memory.close()
+
+
+# Evaluate rows start to stop of the table in shared memory
+def _evaluateRows(start, stop):
+    function, names, columns, output = _parallel_state[:4]
+    row = start
+    for values in zip(*[column[start:stop] for column in columns]):
+        value = function(**dict(zip(names, values)))
+        if isinstance(value, complex):
+            raise EvalException('Row ' + str(row) + ' has a complex value.')
+        output[row] = value
+        row += 1
+
+
+# Evaluate a chunk of batch input lines, returning a result for each line
+def _evaluateChunk(chunk, budget=None):
+    return [_evaluateLine(number, line, budget) for number, line in chunk]
+
+
+# Evaluate a single JSON line of batch input like {"expr": "x+1", "vars": {"x": 2}}
+# Errors are recorded in the result instead of being raised, so one bad line doesn't stop the whole batch
+def _evaluateLine(number, line, budget=None):
+    try:
+        item = json.loads(line)
+        if not isinstance(item, dict) or not isinstance(item.get('expr'), str):
+            raise ValueError('Expected an object with an "expr" string.')
+        tree = Tree(item['expr'])
+        tree.setVariables(item.get('vars') or {})
+        value = tree.evaluate(budget)
+    except Exception as e:
+        # The library's exceptions keep their message in value
+        return {'line': number, 'error': type(e).__name__, 'message': str(getattr(e, 'value', e))}
+    if isinstance(value, complex):
+        value = str(value)
+    return {'line': number, 'value': value}
+
+
+# Evaluate an iterable of JSON lines like {"expr": "x+1", "vars": {"x": 2}} using a pool of worker processes
+# The lines are handed to the workers in chunks and the results are yielded in input order as dictionaries with the
+# line number and either the value or the type of error and its message. Only a few chunks per worker are in flight
+# at a time, so memory use doesn't depend on the number of lines. Blank lines are skipped. If a Budget is given, every
+# line is evaluated within it.
+def evaluateLines(lines, workers=None, chunk_size=1000, budget=None):
+    if chunk_size < 1:
+        raise ValueError('The chunk size must be at least 1.')
+    numbered = ((number, line) for number, line in enumerate(lines, 1) if line.strip())
+    chunks = iter(lambda: list(itertools.islice(numbered, chunk_size)), [])
+    if workers == 1:
+        for chunk in chunks:
+            for result in _evaluateChunk(chunk, budget):
+                yield result
+        return
+    workers = workers or os.cpu_count() or 1
+    with multiprocessing.Pool(workers) as pool:
+        pending = collections.deque()
+        for chunk in chunks:
+            pending.append(pool.apply_async(_evaluateChunk, (chunk, budget)))
+            if len(pending) >= 2 * workers:
+                for result in pending.popleft().get():
+                    yield result
+        while pending:
+            for result in pending.popleft().get():
+                yield result
+
+
+# Run the command line interface, e.g. python -m expressionparse batch input.jsonl -o output.jsonl -j 8
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m expressionparse')
+    commands = parser.add_subparsers(dest='command', required=True)
+    batch = commands.add_parser('batch', help='evaluate JSON lines like {"expr": "x+1", "vars": {"x": 2}}')
+    batch.add_argument('input', nargs='?', default='-', help='file to read (default: standard input)')
+    batch.add_argument('-o', '--output', default='-', help='file to write (default: standard output)')
+    batch.add_argument('-j', '--workers', type=int, default=None, help='number of worker processes (default: one per CPU)')
+    batch.add_argument('-c', '--chunk-size', type=int, default=1000, help='lines per chunk sent to a worker')
+    batch.add_argument('-q', '--quiet', action='store_true', help="don't report throughput on standard error")
+    batch.add_argument('--max-nodes', type=int, default=None, help='reject expressions with more nodes than this')
+    batch.add_argument('--max-depth', type=int, default=None, help='reject expressions nested deeper than this')
+    batch.add_argument('--max-bits', type=int, default=None, help='reject expressions that need larger integers')
+    batch.add_argument('--max-operations', type=int, default=None, help='reject expressions with more operations')
+    batch.add_argument('--max-seconds', type=float, default=None,
+                       help='stop evaluating a line after about this long (only --max-bits bounds a single huge '
+                            'factorial or power)')
+    args = parser.parse_args(argv)
+    budget = None
+    limits = (args.max_nodes, args.max_depth, args.max_bits, args.max_operations, args.max_seconds)
+    if any(limit is not None for limit in limits):
+        budget = Budget(*limits)
+
+    source = sys.stdin if args.input == '-' else open(args.input)
+    target = sys.stdout if args.output == '-' else open(args.output, 'w')
+    count = 0
+    errors = 0
+    start = time.perf_counter()
+    try:
+        for result in evaluateLines(source, args.workers, args.chunk_size, budget):
+            count += 1
+            errors += 'error' in result
+            target.write(json.dumps(result) + '\n')
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+    elapsed = time.perf_counter() - start
+    if not args.quiet:
+        sys.stderr.write('Evaluated %d lines (%d errors) in %.2f s, %.0f lines/s\n' % (
+            count, errors, elapsed, count / elapsed if elapsed else 0))
+    return 0
+
+
+if __name__ == '__main__':
+    # Import the module by name so the worker processes and the command use the same classes
+    import expressionparse
+    sys.exit(expressionparse.main())
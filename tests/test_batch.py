@@ -0,0 +1,92 @@
+# Expressionparse v0.2 -- Create syntax trees for mathematical expressions
+#
+# Copyright (C) 2025, Peter Beard <github@peterbeard.co>
+# 
+# This file is part of Expressionparse.
+# 
+# Expressionparse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# Expressionparse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
+
+import expressionparse
+import math
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# Tests for evaluating trees over arrays of variable values
+@unittest.skipUnless(numpy, 'NumPy is not installed')
+class TestBatchEvaluation(unittest.TestCase):
+    # Batch results should match evaluating each element separately
+    def test_matches_evaluate(self):
+        tree = expressionparse.Tree('3x^2 + 2y - 4/(x+1)')
+        xs = numpy.linspace(-0.5, 3, 8)
+        ys = numpy.linspace(-2, 2, 8)
+        results = tree.evaluateBatch(x=xs, y=ys)
+        for x, y, result in zip(xs, ys, results):
+            tree.setVariable('x', float(x))
+            tree.setVariable('y', float(y))
+            self.assertAlmostEqual(result, tree.evaluate())
+
+    # Arrays are broadcast against each other
+    def test_broadcasting(self):
+        tree = expressionparse.Tree('x*y+1')
+        result = tree.evaluateBatch(x=numpy.arange(3).reshape(3, 1), y=numpy.arange(4))
+        self.assertEqual(result.shape, (3, 4))
+        self.assertEqual(result[2, 3], 7)
+
+    # Scalars and variables already set in the tree can be mixed with arrays
+    def test_scalars(self):
+        tree = expressionparse.Tree('x+y')
+        tree.setVariable('y', 2)
+        self.assertEqual(list(tree.evaluateBatch(x=[1, 2, 3])), [3, 4, 5])
+        self.assertEqual(list(tree.evaluateBatch(x=[1, 2, 3], y=0)), [1, 2, 3])
+
+    # The caller picks the dtype
+    def test_dtype(self):
+        tree = expressionparse.Tree('x*2')
+        self.assertEqual(tree.evaluateBatch(x=[1, 2]).dtype, numpy.float64)
+        self.assertEqual(tree.evaluateBatch(numpy.float32, x=[1, 2]).dtype, numpy.float32)
+        self.assertEqual(tree.evaluateBatch(numpy.int64, x=[1, 2]).dtype, numpy.int64)
+
+    # A negative base with a non-integer exponent promotes the result to complex
+    def test_complex(self):
+        tree = expressionparse.Tree('x^y')
+        result = tree.evaluateBatch(x=[-4, 4, -2], y=[0.5, 0.5, 3])
+        self.assertTrue(numpy.iscomplexobj(result))
+        self.assertAlmostEqual(result[0], expressionparse.Tree('-4^0.5').evaluate())
+        self.assertEqual(result[1], 2)
+        self.assertEqual(result[2], -8)
+        self.assertFalse(numpy.iscomplexobj(tree.evaluateBatch(x=[-2, 4], y=[3, 0.5])))
+
+    # Factorials are only defined for the natural numbers
+    def test_factorial(self):
+        tree = expressionparse.Tree('(x+1)!')
+        self.assertEqual(list(tree.evaluateBatch(x=numpy.arange(5))), [1, 2, 6, 24, 120])
+        self.assertEqual(tree.evaluateBatch(x=[200])[0], float('inf'))
+        with self.assertRaises(expressionparse.EvalException):
+            tree.evaluateBatch(x=[1, 1.5])
+        self.assertEqual(list(tree.evaluateBatch(numpy.int64, x=[19, 4])), [math.factorial(20), 120])
+        for dtype, value in [(numpy.int64, 20), (numpy.uint8, 5), (numpy.int16, 7)]:
+            with self.assertRaises(expressionparse.EvalException):
+                tree.evaluateBatch(dtype, x=[1, value])
+        with self.assertRaises(expressionparse.EvalException):
+            tree.evaluateBatch(x=[-2])
+
+    # Variables without a value can't be evaluated
+    def test_uninitialized_variable(self):
+        with self.assertRaises(expressionparse.EvalException):
+            expressionparse.Tree('x+y').evaluateBatch(x=[1, 2])
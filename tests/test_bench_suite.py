@@ -0,0 +1,118 @@
+# Expressionparse v0.2 -- Create syntax trees for mathematical expressions
+#
+# Copyright (C) 2025, Peter Beard <github@peterbeard.co>
+# 
+# This file is part of Expressionparse.
+# 
+# Expressionparse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# Expressionparse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
+
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks'))
+import bench_suite
+
+
+# Return a run with the given seconds for each operation of the wide generator at size 100
+def results(**seconds):
+	return {'format': bench_suite.FORMAT, 'results': [{'generator': 'wide', 'size': 100, 'operation': operation,
+	                                                  'nodes': 500, 'seconds': value}
+	                                                 for operation, value in seconds.items()]}
+
+
+# Tests for comparing benchmark runs against a baseline
+class TestCompare(unittest.TestCase):
+	# Only measurements that got slower by more than the threshold are slowdowns
+	def test_threshold(self):
+		rows, slower = bench_suite.compare(results(parse=1.0, evaluate=1.0, factor=1.0),
+		                                   results(parse=1.1, evaluate=1.3, factor=0.5), 0.2)
+		self.assertEqual([row[0] for row in rows], ['wide/100/parse', 'wide/100/evaluate', 'wide/100/factor'])
+		self.assertEqual(rows[1][3], 1.3)
+		self.assertEqual(slower, ['wide/100/evaluate'])
+		self.assertEqual(bench_suite.compare(results(parse=1.0), results(parse=1.1), 0.05)[1], ['wide/100/parse'])
+
+	# Measurements that aren't in both runs are skipped
+	def test_missing(self):
+		rows, slower = bench_suite.compare(results(parse=1.0), results(parse=1.0, evaluate=9.0))
+		self.assertEqual(len(rows), 1)
+		self.assertEqual(slower, [])
+
+	# Runs saved in another format can't be compared
+	def test_format(self):
+		other = results(parse=1.0)
+		other['format'] = bench_suite.FORMAT + 1
+		self.assertRaises(ValueError, bench_suite.compare, other, results(parse=1.0))
+		self.assertRaises(ValueError, bench_suite.compare, results(parse=1.0), {'results': []})
+
+	# Comparing saved runs exits with status 1 if anything got slower
+	def test_exit_status(self):
+		directory = tempfile.mkdtemp()
+		paths = [os.path.join(directory, name) for name in ('baseline.json', 'same.json', 'slower.json')]
+		for path, run in zip(paths, [results(parse=1.0), results(parse=1.0), results(parse=2.0)]):
+			with open(path, 'w') as f:
+				json.dump(run, f)
+		try:
+			with contextlib.redirect_stdout(io.StringIO()) as output:
+				self.assertEqual(bench_suite.main(['compare', paths[0], paths[1]]), 0)
+				self.assertEqual(bench_suite.main(['compare', paths[0], paths[2]]), 1)
+			self.assertIn('SLOWER', output.getvalue())
+		finally:
+			for path in paths:
+				os.remove(path)
+			os.rmdir(directory)
+
+	# Simplifying is timed with all of the variables bound and with only some of them
+	def test_operations(self):
+		names = [name for name, _, _ in bench_suite.operations('x*y+2*3')]
+		self.assertIn('simplify', names)
+		self.assertIn('simplifyPartial', names)
+		for name, setup, function in bench_suite.operations('x*y+2*3'):
+			if name == 'simplifyPartial':
+				simplified = function(None)
+				self.assertTrue(simplified.containsVariable('y'))
+				self.assertFalse(simplified.containsVariable('x'))
+
+
+# Tests for taking the profiling hooks out of expressionparse
+class TestHooks(unittest.TestCase):
+	# The copy without hooks works the same but doesn't check for a profiler
+	def test_without_hooks(self):
+		module = bench_suite.withoutHooks()
+		tree = module.Tree('(x+1)*(y-2)!')
+		tree.setVariables({'x': 2, 'y': 5})
+		self.assertEqual(tree.evaluate(), 18)
+		self.assertEqual(module.simplify(tree.root), 18)
+		profiler = module.enableProfiling()
+		try:
+			tree.evaluate()
+			self.assertEqual(profiler.snapshot()['phases'], {})
+		finally:
+			module.disableProfiling()
+
+	# Profiling needs the hooks
+	def test_profile(self):
+		self.assertRaises(ValueError, bench_suite.run, [1], 1, profile=True, hooks=False)
+
+	# The hooks command reports the ratio of the two runs
+	def test_command(self):
+		with contextlib.redirect_stdout(io.StringIO()) as output, contextlib.redirect_stderr(io.StringIO()):
+			bench_suite.main(['hooks', '--sizes', '1', '--repeat', '1', '--generators', 'deep', '--operations', 'evaluate',
+			                  '--threshold', '1000'])
+		self.assertIn('deep/1/evaluate', output.getvalue())
+		self.assertIn('geometric mean ratio', output.getvalue())
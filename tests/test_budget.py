@@ -0,0 +1,156 @@
+# Expressionparse v0.2 -- Create syntax trees for mathematical expressions
+#
+# Copyright (C) 2025, Peter Beard <github@peterbeard.co>
+# 
+# This file is part of Expressionparse.
+# 
+# Expressionparse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# Expressionparse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
+
+import expressionparse
+import math
+import time
+import unittest
+
+
+# Return the cost estimate of an expression
+def cost(expression, variables=None):
+	tree = expressionparse.Tree(expression)
+	tree.setVariables(variables or {})
+	return tree.estimateCost()
+
+
+# Tests for estimating the cost of evaluating expressions
+class TestEstimateCost(unittest.TestCase):
+	# The size of the tree
+	def test_size(self):
+		estimate = cost('(x+1)*(y-2) + 3!')
+		self.assertEqual(estimate['nodes'], 10)
+		self.assertEqual(estimate['depth'], 4)
+		self.assertEqual(estimate['operations'], 5)
+		self.assertEqual(cost('x')['operations'], 0)
+
+	# Shared nodes are only counted once
+	def test_shared(self):
+		tree = expressionparse.Tree('(x+1)*(x+1)')
+		tree.shareSubtrees()
+		self.assertEqual(tree.estimateCost()['nodes'], 4)
+		self.assertEqual(tree.estimateCost()['operations'], 2)
+
+	# Operands of factorials are estimated from their subtrees, including ones that aren't integers
+	def test_operands(self):
+		self.assertEqual(cost('(2^3+x)!', {'x': 2})['bits'], math.factorial(10).bit_length())
+		self.assertEqual(cost('(5!/2)!')['bits'], math.factorial(60).bit_length())
+		self.assertEqual(cost('(3!+1)!')['bits'], math.factorial(7).bit_length())
+		self.assertEqual(cost('(3!*4!)!')['bits'], math.factorial(144).bit_length())
+		self.assertEqual(cost('(3!+4!)*2')['bits'], (30).bit_length())
+
+	# Only factorials and the results of exact arithmetic on them are integers
+	def test_bits(self):
+		self.assertEqual(cost('2^100*x', {'x': 3})['bits'], 0)
+		self.assertEqual(cost('20!')['bits'], math.factorial(20).bit_length())
+		self.assertEqual(cost('(2^10)!')['bits'], math.factorial(1024).bit_length())
+		self.assertEqual(cost('5!^3!')['bits'], (120 ** 6).bit_length())
+		self.assertEqual(cost('x!', {'x': 30})['bits'], math.factorial(30).bit_length())
+		estimate = cost('9!^3!')
+		self.assertEqual(estimate['work'], sum(math.factorial(n).bit_length() for n in [9, 3]) +
+				(math.factorial(9) ** 6).bit_length())
+
+	# Huge results are estimated from logarithms without computing them
+	def test_huge(self):
+		estimate = cost('(9!)!')
+		self.assertAlmostEqual(estimate['bits'] / float(math.factorial(362880).bit_length()), 1, places=6)
+		self.assertAlmostEqual(cost('(10!)^(10!)')['bits'] / (3628800 * math.log2(3628800)), 1, places=6)
+		self.assertEqual(cost('((99!)!)!')['bits'], math.inf)
+
+	# Operations that fail right away don't cost anything
+	def test_failures(self):
+		for expression in ['(-3)!', '2.5!', '1/0']:
+			self.assertEqual(cost(expression)['bits'], 0)
+
+	# Estimating is fast, even for huge values
+	def test_fast(self):
+		start = time.perf_counter()
+		cost('((((99!)!)!)^(9!))!')
+		self.assertLess(time.perf_counter() - start, 0.1)
+
+
+# Tests for evaluating within a budget
+class TestBudget(unittest.TestCase):
+	# Expressions within the budget evaluate as usual
+	def test_within(self):
+		budget = expressionparse.Budget(max_nodes=10, max_depth=5, max_bits=1000, max_operations=5, max_seconds=10)
+		tree = expressionparse.Tree('(x+1)*(y-2) + 3!')
+		tree.setVariables({'x': 1, 'y': 6})
+		self.assertEqual(tree.evaluate(budget), tree.evaluate())
+		self.assertEqual(budget.check(tree.root), tree.estimateCost())
+		self.assertEqual(expressionparse.Budget().evaluate(expressionparse.Tree('2^3').root), 8)
+
+	# Each limit is enforced
+	def test_limits(self):
+		tree = expressionparse.Tree('(x+1)*(y-2) + 3!')
+		tree.setVariables({'x': 1, 'y': 6})
+		for budget in [expressionparse.Budget(max_nodes=9), expressionparse.Budget(max_depth=3),
+				expressionparse.Budget(max_operations=4), expressionparse.Budget(max_bits=2)]:
+			self.assertRaises(expressionparse.BudgetException, tree.evaluate, budget)
+
+	# Pathological expressions are rejected before anything expensive is computed
+	def test_pathological(self):
+		budget = expressionparse.Budget(max_bits=100000)
+		start = time.perf_counter()
+		for expression in ['(9!)!', '((99!)!)', '(10!)^(10!)', '9!^9!^9!', '(9!)!^2 + 1']:
+			self.assertRaises(expressionparse.BudgetException, expressionparse.Tree(expression).evaluate, budget)
+		self.assertLess(time.perf_counter() - start, 0.1)
+
+	# Factorials of NaN fail like they do without a budget
+	def test_nan(self):
+		budget = expressionparse.Budget(max_bits=100)
+		for expression, value in [('x!', float('nan')), ('(0*x)!', float('inf'))]:
+			tree = expressionparse.Tree(expression)
+			tree.setVariable('x', value)
+			try:
+				tree.evaluate(budget)
+				self.fail('Expected an EvalException')
+			except expressionparse.EvalException as e:
+				self.assertNotIsInstance(e, expressionparse.BudgetException)
+
+	# Budget exceptions are evaluation exceptions
+	def test_exception(self):
+		try:
+			expressionparse.Tree('(9!)!').evaluate(expressionparse.Budget(max_bits=1000))
+		except expressionparse.EvalException as e:
+			self.assertIsInstance(e, expressionparse.BudgetException)
+			self.assertEqual(e.value, 'Expression needs integers with more than 1000 bits.')
+
+	# The wall time is checked before every operation
+	def test_time(self):
+		tree = expressionparse.Tree('+'.join(['1'] * 1000))
+		self.assertRaises(expressionparse.BudgetException, tree.evaluate, expressionparse.Budget(max_seconds=-1))
+
+	# Shared nodes are only evaluated and counted once
+	def test_shared(self):
+		tree = expressionparse.Tree('(x+1)*(x+1) + (x+1)')
+		tree.setVariable('x', 2)
+		value = tree.evaluate()
+		tree.shareSubtrees()
+		budget = expressionparse.Budget(max_nodes=5, max_seconds=10)
+		self.assertEqual(tree.evaluate(budget), value)
+		self.assertRaises(expressionparse.BudgetException, tree.evaluate, expressionparse.Budget(max_nodes=4))
+		self.assertRaises(expressionparse.BudgetException, tree.evaluate, expressionparse.Budget(max_seconds=-1))
+
+	# Batches of lines can be evaluated within a budget
+	def test_lines(self):
+		lines = ['{"expr": "(9!)!"}', '{"expr": "x+1", "vars": {"x": 2}}']
+		results = list(expressionparse.evaluateLines(lines, workers=1, budget=expressionparse.Budget(max_bits=1000)))
+		self.assertEqual(results[0]['error'], 'BudgetException')
+		self.assertEqual(results[1]['value'], 3.0)
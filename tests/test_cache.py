@@ -0,0 +1,119 @@
+# Expressionparse v0.2 -- Create syntax trees for mathematical expressions
+#
+# Copyright (C) 2025, Peter Beard <github@peterbeard.co>
+# 
+# This file is part of Expressionparse.
+# 
+# Expressionparse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# Expressionparse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
+
+import expressionparse
+import io
+import unittest
+
+
+# Tests for the parse cache
+class TestParseCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = expressionparse.enableParseCache(2)
+
+    def tearDown(self):
+        expressionparse.disableParseCache()
+
+    # Parsing the same expression twice should hit the cache
+    def test_hit(self):
+        first = expressionparse.Tree('x+1')
+        second = expressionparse.Tree('x+1')
+        self.assertEqual(first, second)
+        self.assertEqual(self.cache.stats()['hits'], 1)
+        self.assertEqual(self.cache.stats()['misses'], 1)
+
+    # Trees from the cache don't share nodes
+    def test_isolation(self):
+        first = expressionparse.Tree('x+1')
+        first.setVariable('x', 1)
+        second = expressionparse.Tree('x+1')
+        with self.assertRaises(expressionparse.EvalException):
+            second.evaluate()
+        second.setVariable('x', 2)
+        self.assertEqual(first.evaluate(), 2)
+        self.assertEqual(second.evaluate(), 3)
+        self.assertEqual(expressionparse.Tree('x+1').toInfixNotation(), 'x + 1')
+
+    # Trees from the cache come with a variable index for their own nodes
+    def test_variable_index(self):
+        expressionparse.Tree('x*y + x')
+        tree = expressionparse.Tree('x*y + x')
+        self.assertEqual(self.cache.stats()['hits'], 1)
+        variables = tree.getVariableIndex()
+        rebuilt = tree.getVariableIndex(rebuild=True)
+        self.assertEqual(sorted(variables), ['x', 'y'])
+        for name in rebuilt:
+            self.assertEqual(sorted(map(id, variables[name])), sorted(map(id, rebuilt[name])))
+        tree.setVariable('x', 2)
+        tree.setVariable('y', 3)
+        self.assertEqual(tree.evaluate(), 8)
+
+    # Only strings are cached
+    def test_file(self):
+        tree = expressionparse.Tree(io.StringIO('x+1'))
+        self.assertEqual(tree.toInfixNotation(), 'x + 1')
+        self.assertEqual(self.cache.stats(), {'size': 0, 'maxsize': 2, 'hits': 0, 'misses': 0, 'evictions': 0})
+
+    # The least recently used expression is evicted when the cache is full
+    def test_eviction(self):
+        expressionparse.Tree('1+1')
+        expressionparse.Tree('2+2')
+        expressionparse.Tree('1+1')
+        expressionparse.Tree('3+3')
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(self.cache.stats()['evictions'], 1)
+        expressionparse.Tree('1+1')
+        expressionparse.Tree('2+2')
+        self.assertEqual(self.cache.stats(), {'size': 2, 'maxsize': 2, 'hits': 2, 'misses': 4, 'evictions': 2})
+
+    # Parse errors aren't cached
+    def test_error(self):
+        for i in range(2):
+            with self.assertRaises(expressionparse.TokenizeException):
+                expressionparse.Tree('(1+2')
+        self.assertEqual(len(self.cache), 0)
+
+    # Clearing the cache resets the counters
+    def test_clear(self):
+        expressionparse.Tree('1+1')
+        self.cache.clear()
+        self.assertEqual(self.cache.stats(), {'size': 0, 'maxsize': 2, 'hits': 0, 'misses': 0, 'evictions': 0})
+
+    # Caching is off unless it's enabled
+    def test_disable(self):
+        expressionparse.disableParseCache()
+        self.assertIsNone(expressionparse.getParseCache())
+        self.assertEqual(expressionparse.Tree('1+1').evaluate(), 2)
+
+
+# Tests for copying trees
+class TestCopy(unittest.TestCase):
+    # Copies are equal to the original but don't share nodes
+    def test_copy(self):
+        tree = expressionparse.Tree('(x+1)! * 2y')
+        tree.setVariable('x', 2)
+        copied = tree.copy()
+        self.assertEqual(tree, copied)
+        self.assertIsNot(tree.root, copied.root)
+        self.assertIs(copied.root.left.parent, copied.root)
+        copied.setVariable('x', 3)
+        copied.setVariable('y', 1)
+        tree.setVariable('y', 1)
+        self.assertEqual(tree.evaluate(), 12)
+        self.assertEqual(copied.evaluate(), 48)
@@ -0,0 +1,89 @@
+# Expressionparse v0.2 -- Create syntax trees for mathematical expressions
+#
+# Copyright (C) 2025, Peter Beard <github@peterbeard.co>
+# 
+# This file is part of Expressionparse.
+# 
+# Expressionparse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# Expressionparse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
+
+import expressionparse
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+
+LINES = [
+	'{"expr": "x+1", "vars": {"x": 2}}',
+	'{"expr": "1+(", "vars": {}}',
+	'',
+	'{"expr": "x*y"}',
+	'{"expr": "1/0"}',
+	'not json',
+	'{"expr": "(-8)^0.5"}',
+	'{"expr": "3 4 *"}',
+]
+
+
+# Tests for evaluating batches of JSON lines
+class TestBatchEvaluation(unittest.TestCase):
+	# Check the results for LINES
+	def check(self, results):
+		self.assertEqual([result['line'] for result in results], [1, 2, 4, 5, 6, 7, 8])
+		self.assertEqual(results[0]['value'], 3.0)
+		self.assertEqual(results[1]['error'], 'TokenizeException')
+		self.assertEqual(results[1]['message'], 'Unmatched parenthesis.')
+		self.assertEqual(results[2]['error'], 'EvalException')
+		self.assertEqual(results[3]['error'], 'ZeroDivisionError')
+		self.assertEqual(results[4]['error'], 'JSONDecodeError')
+		self.assertIsInstance(results[5]['value'], str)
+		self.assertEqual(results[6]['value'], 12.0)
+
+	# Evaluate in this process
+	def test_single_process(self):
+		self.check(list(expressionparse.evaluateLines(LINES, workers=1, chunk_size=3)))
+
+	# Evaluate with a pool of workers, keeping the input order
+	def test_workers(self):
+		lines = LINES * 50
+		results = list(expressionparse.evaluateLines(lines, workers=2, chunk_size=7))
+		self.assertEqual(results, list(expressionparse.evaluateLines(lines, workers=1)))
+		self.check(results[:7])
+
+	# The chunk size has to be positive
+	def test_chunk_size(self):
+		self.assertRaises(ValueError, list, expressionparse.evaluateLines(LINES, chunk_size=0))
+
+	# Run the command with files
+	def test_main(self):
+		directory = tempfile.mkdtemp()
+		source = os.path.join(directory, 'input.jsonl')
+		target = os.path.join(directory, 'output.jsonl')
+		with open(source, 'w') as f:
+			f.write('\n'.join(LINES) + '\n')
+		stderr = sys.stderr
+		sys.stderr = io.StringIO()
+		try:
+			self.assertEqual(expressionparse.main(['batch', source, '-o', target, '-j', '1']), 0)
+			report = sys.stderr.getvalue()
+		finally:
+			sys.stderr = stderr
+		self.assertIn('Evaluated 7 lines (4 errors)', report)
+		with open(target) as f:
+			self.check([json.loads(line) for line in f])
+		os.remove(source)
+		os.remove(target)
+		os.rmdir(directory)
@@ -0,0 +1,79 @@
+# Expressionparse v0.2 -- Create syntax trees for mathematical expressions
+#
+# Copyright (C) 2025, Peter Beard <github@peterbeard.co>
+# 
+# This file is part of Expressionparse.
+# 
+# Expressionparse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# Expressionparse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
+
+import expressionparse
+import cmath
+import unittest
+
+
+# Tests for compiling trees into Python functions
+class TestCompile(unittest.TestCase):
+    # Compiled functions should give the same results as evaluate()
+    def test_matches_evaluate(self):
+        expressions = ['1+1', '2-1', '2*3', '2/3', '3^5', '5!', '(4+1)!', '3 + 4 * 5', '(3 + 4) * (5 + 6)',
+                       '2^-1', '-2^-2', '9.0^-0.5', '1989/221']
+        for expression in expressions:
+            tree = expressionparse.Tree(expression)
+            self.assertEqual(tree.compile()(), tree.evaluate())
+
+    # Variables are passed as keyword arguments
+    def test_variables(self):
+        tree = expressionparse.Tree('3x^2 + 2y - 4/(x+1)')
+        f = tree.compile()
+        tree.setVariable('x', 2)
+        tree.setVariable('y', 5)
+        self.assertEqual(f(x=2, y=5), tree.evaluate())
+        self.assertEqual(f(x=-1.5, y=0), 3*2.25 - 4/(-0.5))
+
+    # Variables that are already set in the tree are used as defaults
+    def test_default_variables(self):
+        tree = expressionparse.Tree('x+y')
+        tree.setVariable('x', 1)
+        f = tree.compile()
+        self.assertEqual(f(y=2), 3)
+        self.assertEqual(f(x=2, y=2), 4)
+
+    # Variables without a value can't be evaluated
+    def test_uninitialized_variable(self):
+        f = expressionparse.Tree('x+1').compile()
+        with self.assertRaises(expressionparse.EvalException):
+            f()
+        with self.assertRaises(expressionparse.EvalException):
+            f(x='abc')
+
+    # Negative bases with non-integer exponents give complex results
+    def test_complex(self):
+        f = expressionparse.Tree('x^0.5').compile()
+        self.assertAlmostEqual(f(x=-4), cmath.sqrt(-4))
+        self.assertEqual(f(x=-4), expressionparse.Tree('-4^0.5').evaluate())
+
+    # Factorials are only defined for the natural numbers
+    def test_factorial(self):
+        self.assertEqual(expressionparse.Tree('(2+1)!').compile()(), 6)
+        with self.assertRaises(expressionparse.EvalException):
+            expressionparse.Tree('1.5!').compile()()
+        with self.assertRaises(expressionparse.EvalException):
+            expressionparse.Tree('-1!').compile()()
+
+    # Nodes with missing children can't be compiled
+    def test_missing_child(self):
+        node = expressionparse.Plus()
+        node.addChild(expressionparse.Value('1'))
+        with self.assertRaises(expressionparse.NodeException):
+            node.compile()
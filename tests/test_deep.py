@@ -0,0 +1,84 @@
+# Expressionparse v0.2 -- Create syntax trees for mathematical expressions
+#
+# Copyright (C) 2025, Peter Beard <github@peterbeard.co>
+# 
+# This file is part of Expressionparse.
+# 
+# Expressionparse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# Expressionparse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
+
+import expressionparse
+import unittest
+
+# Far deeper than the default recursion limit of 1000, but quick to build
+DEPTH = 10 ** 5
+
+
+# Build a chain of additions of the given depth with the leaves on the left or right
+def chain(depth, leaves_on_left):
+    node = expressionparse.Variable('x')
+    for i in range(depth):
+        parent = expressionparse.Plus()
+        if leaves_on_left:
+            parent.addChild(expressionparse.Value('1'))
+            parent.addChild(node)
+        else:
+            parent.addChild(node)
+            parent.addChild(expressionparse.Value('1'))
+        node = parent
+    tree = expressionparse.Tree()
+    tree.root = node
+    return tree
+
+
+# Tests for trees that are much deeper than the recursion limit
+class TestDeepTrees(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.left_deep = chain(DEPTH, False)
+
+    @classmethod
+    def tearDownClass(cls):
+        del cls.left_deep
+
+    def test_evaluate(self):
+        for tree in (self.left_deep, chain(DEPTH, True)):
+            tree.setVariable('x', 2)
+            self.assertEqual(tree.evaluate(), DEPTH + 2)
+
+    def test_set_variable(self):
+        self.left_deep.root.setVariable('x', 3)
+        self.assertEqual(self.left_deep.evaluate(), DEPTH + 3)
+        self.assertTrue(self.left_deep.root.containsVariable('x'))
+        self.assertFalse(self.left_deep.root.containsVariable('y'))
+
+    def test_equality(self):
+        self.assertEqual(self.left_deep, self.left_deep.copy())
+        self.assertNotEqual(self.left_deep, chain(DEPTH, True))
+
+    def test_length(self):
+        self.assertEqual(len(self.left_deep), DEPTH + 1)
+
+    def test_notation(self):
+        tree = chain(DEPTH, False)
+        self.assertEqual(tree.toPolishNotation(), '+ ' * DEPTH + 'x' + ' 1' * DEPTH)
+        self.assertEqual(tree.toReversePolishNotation(), 'x' + ' 1 +' * DEPTH)
+        self.assertEqual(tree.toInfixNotation(), 'x' + ' + 1' * DEPTH)
+        self.assertEqual(str(tree), '[ ' * DEPTH + 'x' + ' + 1 ]' * DEPTH)
+
+    # Long sums can be parsed, evaluated and written out
+    def test_parse(self):
+        tree = expressionparse.Tree('+'.join(['x'] * DEPTH))
+        self.assertEqual(tree.toInfixNotation(), ' + '.join(['x'] * DEPTH))
+        tree.setVariable('x', 1)
+        self.assertEqual(tree.evaluate(), DEPTH)
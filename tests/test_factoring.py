@@ -219,4 +219,46 @@ class TestFactoring(unittest.TestCase):
 		self.factored_tree.parse('(y/z)^x')
 		self.assertEqual(self.tree.root.factor(), self.factored_tree.root)
 
-
+	# Common factors are found across whole sums, not just pairs of terms
+	def test_sum_of_many_terms(self):
+		self.tree.parse('x*a+y*b-x*c')
+		self.factored_tree.parse('x*(a-c)+y*b')
+		self.assertEqual(self.tree.root.factor(), self.factored_tree.root)
+
+	# Factoring is repeated until nothing else can be factored
+	def test_fixpoint(self):
+		self.tree.parse('x*y*a+x*y*b')
+		self.factored_tree.parse('x*(y*(a+b))')
+		self.assertEqual(self.tree.root.factor(), self.factored_tree.root)
+		self.tree.parse('x*a+x*b+a*y+b*y')
+		self.factored_tree.parse('(x+y)*(a+b)')
+		self.assertEqual(self.tree.root.factor(), self.factored_tree.root)
+
+	# Division only has a common factor on the same side of both terms
+	def test_div_same_side(self):
+		self.tree.parse('x/x+y/x')
+		self.factored_tree.parse('(x+y)/x')
+		self.assertEqual(self.tree.root.factor(), self.factored_tree.root)
+
+	# The factored tree has consistent parent links
+	def test_parent_links(self):
+		self.tree.parse('x*a+y*b-x*c')
+		factored = self.tree.root.factor()
+		stack = [factored]
+		while stack:
+			node = stack.pop()
+			for child in (getattr(node, 'left', None), getattr(node, 'right', None)):
+				if child is not None:
+					self.assertIs(child.parent, node)
+					stack.append(child)
+
+	# Long sums are factored without recursion
+	def test_long_sum(self):
+		self.tree.parse('+'.join(['x*' + str(i) for i in range(5000)]))
+		factored = self.tree.root.factor()
+		self.assertIsInstance(factored, expressionparse.Times)
+		self.assertEqual(factored.left, expressionparse.Variable('x'))
+		factored_tree = expressionparse.Tree()
+		factored_tree.root = factored
+		factored_tree.setVariable('x', 2)
+		self.assertEqual(factored_tree.evaluate(), 2 * sum(range(5000)))
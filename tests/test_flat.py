@@ -0,0 +1,93 @@
+# Expressionparse v0.2 -- Create syntax trees for mathematical expressions
+#
+# Copyright (C) 2025, Peter Beard <github@peterbeard.co>
+# 
+# This file is part of Expressionparse.
+# 
+# Expressionparse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# Expressionparse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
+
+import expressionparse
+import pickle
+import unittest
+
+
+# Tests for the flat array form of trees
+class TestFlatTree(unittest.TestCase):
+	# The flat form evaluates to the same value as the tree
+	def test_evaluate(self):
+		for expression in ['1+2*3', '2^3^2', '10-4-3', '5!/3', '-2^0.5', '(1+2)*(3-4)/5']:
+			tree = expressionparse.Tree(expression)
+			self.assertEqual(tree.freeze().evaluate(), tree.evaluate())
+
+	# The instructions are in the same order as Reverse Polish Notation
+	def test_postfix(self):
+		flat = expressionparse.Tree('x*2+x!').freeze()
+		self.assertEqual(len(flat), 6)
+		self.assertEqual(list(flat.variable_slot), [0, -1, -1, 0, -1, -1])
+		self.assertEqual(list(flat.constant_index), [-1, 0, -1, -1, -1, -1])
+		self.assertEqual(flat.variables, ['x'])
+		self.assertEqual(flat.constants, ['2'])
+
+	# Variables can be set before or after freezing
+	def test_variables(self):
+		tree = expressionparse.Tree('x*y-x')
+		tree.setVariable('x', 3)
+		flat = tree.freeze()
+		self.assertRaises(expressionparse.EvalException, flat.evaluate)
+		flat.setVariable('y', 4)
+		self.assertEqual(flat.evaluate(), 9.0)
+		flat.setVariables({'x': 1, 'y': 2, 'z': 3})
+		self.assertEqual(flat.evaluate(), 1.0)
+
+	# Flat trees survive pickling
+	def test_pickle(self):
+		flat = expressionparse.Tree('x^2+1.5').freeze()
+		flat.setVariable('x', 2)
+		copy = pickle.loads(pickle.dumps(flat))
+		self.assertEqual(copy.evaluate(), 5.5)
+		self.assertEqual(list(copy.opcodes), list(flat.opcodes))
+
+	# Converting back gives an equal tree
+	def test_to_tree(self):
+		tree = expressionparse.Tree('x*3+y!-2^x/4')
+		tree.setVariable('x', 2)
+		thawed = tree.freeze().toTree()
+		self.assertEqual(thawed, tree)
+		self.assertEqual(thawed.toInfixNotation(), tree.toInfixNotation())
+		self.assertEqual(thawed.getVariableIndex().keys(), tree.getVariableIndex().keys())
+		self.assertIsNone(thawed.root.parent)
+		self.assertIs(thawed.root.left.parent, thawed.root)
+
+	# Shared subtrees are expanded again
+	def test_shared(self):
+		tree = expressionparse.Tree('(x+1)*(x+1)')
+		tree.shareSubtrees()
+		flat = tree.freeze()
+		self.assertEqual(len(flat), 7)
+		self.assertEqual(flat.toTree(), expressionparse.Tree('(x+1)*(x+1)'))
+
+	# Deep trees can be frozen and evaluated
+	def test_deep(self):
+		tree = expressionparse.Tree('+'.join(['1'] * 100000))
+		self.assertEqual(tree.freeze().evaluate(), 100000.0)
+
+	# Only the built in operations can be frozen
+	def test_errors(self):
+		self.assertRaises(expressionparse.NodeException, expressionparse.Tree().freeze)
+		tree = expressionparse.Tree()
+		tree.root = expressionparse.Operation()
+		tree.root.addChild(expressionparse.Value(1))
+		tree.root.addChild(expressionparse.Value(2))
+		self.assertRaises(expressionparse.NodeException, tree.freeze)
+		self.assertRaises(expressionparse.EvalException, expressionparse.Tree('(-1)!').freeze().evaluate)
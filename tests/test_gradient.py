@@ -0,0 +1,136 @@
+# Expressionparse v0.2 -- Create syntax trees for mathematical expressions
+#
+# Copyright (C) 2025, Peter Beard <github@peterbeard.co>
+# 
+# This file is part of Expressionparse.
+# 
+# Expressionparse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# Expressionparse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
+
+import expressionparse
+import math
+import unittest
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+
+# Tests for computing gradients with reverse-mode automatic differentiation
+class TestGradient(unittest.TestCase):
+	# Compare the gradient with central finite differences
+	def assertGradient(self, expression, variables):
+		tree = expressionparse.Tree(expression)
+		tree.setVariables(variables)
+		value, gradient = tree.gradient()
+		self.assertEqual(value, tree.evaluate())
+		self.assertEqual(sorted(gradient), sorted(variables))
+		step = 1e-6
+		for name in variables:
+			tree.setVariable(name, variables[name] + step)
+			above = tree.evaluate()
+			tree.setVariable(name, variables[name] - step)
+			below = tree.evaluate()
+			tree.setVariable(name, variables[name])
+			self.assertAlmostEqual(gradient[name], (above - below) / (2 * step), places=5)
+
+	def test_operations(self):
+		self.assertGradient('x+y', {'x': 1.5, 'y': -2})
+		self.assertGradient('x-y', {'x': 1.5, 'y': -2})
+		self.assertGradient('x*y', {'x': 1.5, 'y': -2})
+		self.assertGradient('x/y', {'x': 1.5, 'y': -2})
+		self.assertGradient('x^y', {'x': 1.5, 'y': -2})
+
+	def test_expression(self):
+		self.assertGradient('3x^2 + 2y - 4/(x+1) + x*y + 2^x', {'x': 1.5, 'y': 2.5})
+
+	# Variables that occur more than once add up their derivatives
+	def test_repeated_variable(self):
+		tree = expressionparse.Tree('x*x*x + x')
+		tree.setVariable('x', 2)
+		self.assertEqual(tree.gradient(), (10, {'x': 13}))
+
+	def test_constant(self):
+		self.assertEqual(expressionparse.Tree('2*3+1').gradient(), (7, {}))
+
+	# The factorial is differentiated as the gamma function, d(n!)/dn = n! * (H(n) - EulerGamma)
+	def test_factorial(self):
+		tree = expressionparse.Tree('x!')
+		tree.setVariable('x', 0)
+		self.assertAlmostEqual(tree.gradient()[1]['x'], -0.5772156649015329)
+		tree.setVariable('x', 4)
+		value, gradient = tree.gradient()
+		self.assertEqual(value, 24)
+		self.assertAlmostEqual(gradient['x'], 24 * (1 + 1 / 2.0 + 1 / 3.0 + 1 / 4.0 - 0.5772156649015329))
+		tree.setVariable('x', 200)
+		self.assertEqual(tree.gradient()[1]['x'], math.inf)
+
+	# The derivatives of powers of zero and negative numbers
+	def test_exponent_edge_cases(self):
+		tree = expressionparse.Tree('x^y')
+		tree.setVariables({'x': 0, 'y': 2})
+		self.assertEqual(tree.gradient()[1], {'x': 0, 'y': 0})
+		tree.setVariables({'x': 0, 'y': 0})
+		self.assertRaises(expressionparse.EvalException, tree.gradient)
+		tree = expressionparse.Tree('x^0')
+		tree.setVariable('x', 0)
+		self.assertEqual(tree.gradient(), (1, {'x': 0}))
+		tree = expressionparse.Tree('x^0.5')
+		tree.setVariable('x', 0)
+		self.assertRaises(expressionparse.EvalException, tree.gradient)
+		tree = expressionparse.Tree('2^x')
+		tree.setVariable('x', 0.5)
+		self.assertAlmostEqual(tree.gradient()[1]['x'], math.sqrt(2) * math.log(2))
+		tree = expressionparse.Tree('x^y')
+		tree.setVariables({'x': -1, 'y': 0.5})
+		gradient = tree.gradient()[1]
+		self.assertAlmostEqual(gradient['x'], -0.5j)
+		self.assertAlmostEqual(gradient['y'], -math.pi)
+
+	def test_uninitialized(self):
+		self.assertRaises(expressionparse.EvalException, expressionparse.Tree('x+1').gradient)
+
+
+# Tests for computing gradients over arrays
+@unittest.skipUnless(numpy, 'NumPy is not installed')
+class TestGradientBatch(unittest.TestCase):
+	# The gradients for each element are the same as for single values
+	def test_matches_gradient(self):
+		tree = expressionparse.Tree('3x^2 + 2y - 4/(x+1) + x*y + (y+1)! + 2^x')
+		xs = numpy.linspace(-0.5, 3, 8)
+		ys = numpy.arange(8) % 4
+		values, gradients = tree.gradientBatch(x=xs, y=ys)
+		for i in range(len(xs)):
+			tree.setVariables({'x': xs[i], 'y': int(ys[i])})
+			value, gradient = tree.gradient()
+			self.assertAlmostEqual(values[i], value)
+			self.assertAlmostEqual(gradients['x'][i], gradient['x'])
+			self.assertAlmostEqual(gradients['y'][i], gradient['y'])
+
+	# Gradients that don't depend on the variables are spread out to the shape of the values
+	def test_shape(self):
+		tree = expressionparse.Tree('2x + y')
+		values, gradients = tree.gradientBatch(x=numpy.arange(3).reshape(3, 1), y=numpy.arange(4))
+		self.assertEqual(values.shape, (3, 4))
+		self.assertEqual(gradients['x'].shape, (3, 4))
+		self.assertTrue((gradients['x'] == 2).all())
+		self.assertTrue((gradients['y'] == 1).all())
+
+	def test_exponent_edge_cases(self):
+		tree = expressionparse.Tree('x^y')
+		values, gradients = tree.gradientBatch(x=[2, 0, 0, -1], y=[3, 2, 0, 0.5])
+		self.assertTrue(numpy.iscomplexobj(values))
+		self.assertTrue(numpy.allclose(gradients['x'][:3], [12, 0, 0]))
+		self.assertAlmostEqual(gradients['x'][3], -0.5j)
+		self.assertTrue(numpy.isnan(gradients['y'][2]))
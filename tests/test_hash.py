@@ -0,0 +1,81 @@
+# Expressionparse v0.2 -- Create syntax trees for mathematical expressions
+#
+# Copyright (C) 2025, Peter Beard <github@peterbeard.co>
+# 
+# This file is part of Expressionparse.
+# 
+# Expressionparse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# Expressionparse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
+
+import expressionparse
+import unittest
+
+
+# Tests for structural hashing of nodes
+class TestHash(unittest.TestCase):
+	# Equal nodes have equal hashes, so subtrees can be used in sets and dictionaries
+	def test_equal_nodes(self):
+		nodes = [expressionparse.Tree(expression).root for expression in ['x*y+1', 'x*y+1', 'x*y+2', '(x*y)!']]
+		self.assertEqual(hash(nodes[0]), hash(nodes[1]))
+		self.assertEqual(len(set(nodes)), 3)
+		self.assertEqual({nodes[0]: 'a'}[nodes[1]], 'a')
+
+	# Values hash like the numbers they're equal to
+	def test_numbers(self):
+		self.assertEqual(hash(expressionparse.Value('2')), hash(2))
+		self.assertEqual(hash(expressionparse.Value('2.0')), hash(2.0))
+		self.assertEqual(hash(expressionparse.Value('nan')), hash(expressionparse.Value('nan')))
+		x = expressionparse.Variable('x')
+		y = expressionparse.Variable('x')
+		x.set(2)
+		y.set(2.0)
+		self.assertEqual(x, y)
+		self.assertEqual(hash(x), hash(y))
+
+	# Changing a node changes the hashes of the node and its ancestors
+	def test_invalidated(self):
+		tree = expressionparse.Tree('(x+1)*3')
+		other = expressionparse.Tree('(x+1)*3')
+		self.assertEqual(hash(tree.root), hash(other.root))
+		tree.setVariable('x', 2)
+		self.assertNotEqual(tree.root, other.root)
+		other.setVariable('x', 2)
+		self.assertEqual(hash(tree.root), hash(other.root))
+		self.assertEqual(tree.root, other.root)
+		tree.root.removeChild()
+		tree.root.addChild(expressionparse.Value('4'))
+		self.assertNotEqual(tree.root, other.root)
+		other = expressionparse.Tree('(x+1)*4')
+		other.setVariable('x', 2)
+		self.assertEqual(hash(tree.root), hash(other.root))
+
+	# Deep trees are hashed without recursion
+	def test_deep_tree(self):
+		expression = '+'.join(['x'] * 20000)
+		self.assertEqual(hash(expressionparse.Tree(expression).root), hash(expressionparse.Tree(expression).root))
+		self.assertNotEqual(expressionparse.Tree(expression + '+1').root, expressionparse.Tree(expression + '+2').root)
+
+
+	# Changing a shared node leaves stale hashes on its other parents, which tree equality doesn't rely on
+	def test_shared(self):
+		tree = expressionparse.Tree('(x+1)*2+(x+1)*3')
+		tree.shareSubtrees()
+		hash(tree.root)
+		tree.setVariable('x', 5)
+		other = expressionparse.Tree('(x+1)*2+(x+1)*3')
+		other.setVariable('x', 5)
+		self.assertEqual(tree.toPolishNotation(), other.toPolishNotation())
+		self.assertEqual(tree, other)
+		self.assertEqual(other, tree)
+		other.setVariable('x', 6)
+		self.assertNotEqual(tree, other)
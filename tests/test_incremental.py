@@ -0,0 +1,80 @@
+# Expressionparse v0.2 -- Create syntax trees for mathematical expressions
+#
+# Copyright (C) 2025, Peter Beard <github@peterbeard.co>
+# 
+# This file is part of Expressionparse.
+# 
+# Expressionparse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# Expressionparse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
+
+import expressionparse
+import unittest
+
+
+# Tests for evaluating trees incrementally
+class TestIncrementalEvaluation(unittest.TestCase):
+	def setUp(self):
+		self.tree = expressionparse.Tree('(x+1)*(y-2) + (y/4)^2 + 3!')
+		self.tree.setVariables({'x': 1, 'y': 6})
+
+	# The first evaluation computes every operation and the next one none of them
+	def test_cached(self):
+		self.assertEqual(self.tree.evaluateIncremental(), self.tree.evaluate())
+		self.assertEqual(self.tree.recomputed, 8)
+		self.assertEqual(self.tree.evaluateIncremental(), self.tree.evaluate())
+		self.assertEqual(self.tree.recomputed, 0)
+
+	# Only the path from a changed variable to the root is recomputed
+	def test_variable_changed(self):
+		self.tree.evaluateIncremental()
+		self.tree.setVariable('x', 2)
+		self.assertEqual(self.tree.evaluateIncremental(), 12 + 2.25 + 6)
+		self.assertEqual(self.tree.recomputed, 4)
+		self.tree.setVariable('y', 10)
+		self.assertEqual(self.tree.evaluateIncremental(), self.tree.evaluate())
+		self.assertEqual(self.tree.recomputed, 6)
+
+	# Unsetting a variable makes evaluation fail again
+	def test_unset(self):
+		self.tree.evaluateIncremental()
+		self.tree.getVariableIndex()['x'][0].unset()
+		self.assertRaises(expressionparse.EvalException, self.tree.evaluateIncremental)
+
+	# Adding and removing children invalidates the cached values
+	def test_structure_changed(self):
+		self.tree.evaluateIncremental()
+		factorial = self.tree.root.right
+		factorial.removeChild()
+		factorial.addChild(expressionparse.Value(4))
+		self.assertEqual(self.tree.evaluateIncremental(), 8 + 2.25 + 24)
+		self.assertEqual(self.tree.recomputed, 2)
+
+	# Trees that are a single leaf
+	def test_leaf(self):
+		tree = expressionparse.Tree('x')
+		tree.setVariable('x', 3)
+		self.assertEqual(tree.evaluateIncremental(), 3)
+		self.assertEqual(tree.recomputed, 0)
+
+	# Deep trees don't hit the recursion limit
+	def test_deep(self):
+		tree = expressionparse.Tree('+'.join(['x'] * 100000))
+		tree.setVariable('x', 1)
+		self.assertEqual(tree.evaluateIncremental(), 100000)
+		tree.setVariable('x', 2)
+		self.assertEqual(tree.evaluateIncremental(), 200000)
+
+	# Shared subtrees only know one of their parents, so they can't be invalidated properly
+	def test_shared(self):
+		self.tree.shareSubtrees()
+		self.assertRaises(expressionparse.NodeException, self.tree.evaluateIncremental)
@@ -0,0 +1,78 @@
+# Expressionparse v0.2 -- Create syntax trees for mathematical expressions
+#
+# Copyright (C) 2025, Peter Beard <github@peterbeard.co>
+# 
+# This file is part of Expressionparse.
+# 
+# Expressionparse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# Expressionparse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
+
+import expressionparse
+import unittest
+
+
+# Tests for the memory layout of nodes
+class TestMemory(unittest.TestCase):
+	# Nodes don't have a per-instance dictionary
+	def test_slots(self):
+		tree = expressionparse.Tree('x*3+y!')
+		for node in (tree.root, tree.root.left, tree.root.left.left, tree.root.left.right, tree.root.right):
+			self.assertFalse(hasattr(node, '__dict__'))
+
+	# Operator metadata lives on the class
+	def test_class_metadata(self):
+		self.assertEqual(expressionparse.Times.weight, 2)
+		self.assertEqual(expressionparse.Times.symbol, '*')
+		self.assertEqual(expressionparse.Factorial.arity, 1)
+		self.assertEqual(expressionparse.Minus().symbol, '-')
+
+	# Unset variables don't hold a value node
+	def test_unset_variable(self):
+		var = expressionparse.Variable('x')
+		self.assertIsNone(var.value)
+		self.assertEqual(str(var), 'x')
+		self.assertRaises(expressionparse.EvalException, var.evaluate)
+		var.set(2)
+		self.assertEqual(var.evaluate(), 2.0)
+		var.unset()
+		self.assertIsNone(var.value)
+		self.assertIsNone(var.copyNode().value)
+
+	# The footprint counts every node by type
+	def test_footprint(self):
+		tree = expressionparse.Tree('x*3+y!-x')
+		footprint = tree.memoryFootprint()
+		self.assertEqual(footprint['Variable']['count'], 3)
+		self.assertEqual(footprint['Value']['count'], 1)
+		self.assertEqual(footprint['Factorial']['count'], 1)
+		self.assertEqual(sum(entry['count'] for entry in footprint.values()), tree.estimateCost()['nodes'])
+		for entry in footprint.values():
+			self.assertGreater(entry['bytes'], 0)
+
+	# Binding a variable adds the size of its value
+	def test_footprint_bound(self):
+		tree = expressionparse.Tree('x+1')
+		unbound = tree.memoryFootprint()['Variable']['bytes']
+		tree.setVariable('x', 2)
+		self.assertGreater(tree.memoryFootprint()['Variable']['bytes'], unbound)
+
+	# Shared nodes are only counted once
+	def test_footprint_shared(self):
+		tree = expressionparse.Tree('(x+1)*(x+1)')
+		self.assertEqual(tree.memoryFootprint()['Plus']['count'], 2)
+		tree.shareSubtrees()
+		self.assertEqual(tree.memoryFootprint()['Plus']['count'], 1)
+
+	# An empty tree has no footprint
+	def test_footprint_empty(self):
+		self.assertEqual(expressionparse.Tree().memoryFootprint(), {})
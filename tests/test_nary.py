@@ -0,0 +1,170 @@
+# Expressionparse v0.2 -- Create syntax trees for mathematical expressions
+#
+# Copyright (C) 2025, Peter Beard <github@peterbeard.co>
+# 
+# This file is part of Expressionparse.
+# 
+# Expressionparse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# Expressionparse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
+
+import expressionparse
+import unittest
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+
+EXPRESSIONS = ['1+2+3', 'x*y*z', '2*x*3+y*4*5', 'x+y+z-w+1', '(x+y+z)*(z+1)!', '(x*2)*y', 'x*2*y', 'x*y+2*3+z',
+		'(1+2)+(3+4)+5', '3x^2*y + x*y*z/w']
+VARIABLES = {'x': 1.5, 'y': 2, 'z': 3, 'w': 0.5}
+
+
+# Flatten a copy of a tree, returning the flattened copy
+def flattened(tree):
+	copy = tree.copy()
+	copy.flatten()
+	return copy
+
+
+# Tests for flattening chains of additions and multiplications into n-ary nodes
+class TestFlatten(unittest.TestCase):
+	# Chains nested to the right become a single node
+	def test_chain(self):
+		tree = expressionparse.Tree('1+2+3+4')
+		self.assertEqual(tree.flatten(), 2)
+		self.assertIsInstance(tree.root, expressionparse.Sum)
+		self.assertEqual(len(tree.root.children), 4)
+		self.assertEqual(tree.evaluate(), 10)
+		tree = expressionparse.Tree('x*y*z')
+		self.assertEqual(tree.flatten(), 1)
+		self.assertIsInstance(tree.root, expressionparse.Product)
+
+	# Additions are merged however they're nested, multiplications only when they're nested to the right
+	def test_left_chain(self):
+		tree = expressionparse.Tree('(1+2)+(3+4)+5')
+		self.assertEqual(tree.flatten(), 3)
+		self.assertEqual(len(tree.root.children), 5)
+		self.assertEqual(tree.toPolishNotation(), '+ 1 + 2 + 3 + 4 5')
+		tree = expressionparse.Tree('(x*y)*(2*z)')
+		self.assertEqual(tree.flatten(), 1)
+		self.assertEqual(len(tree.root.children), 3)
+		self.assertEqual(len(tree.root.children[0].children), 2)
+
+	# Trees without chains don't change
+	def test_unchanged(self):
+		tree = expressionparse.Tree('x-y/2^z')
+		self.assertEqual(tree.flatten(), 0)
+		self.assertEqual(tree, expressionparse.Tree('x-y/2^z'))
+		self.assertEqual(expressionparse.Tree().flatten(), 0)
+
+	# Chains nested to the right are written out exactly like the binary ones
+	def test_notation(self):
+		for expression in ['1+2+3', 'x*y*z', '2*x*3+y*4*5', '(x+y+z)*(z+1)!', '(x*y)*(2*z)', '3x^2*y/(x+y+z)']:
+			tree = expressionparse.Tree(expression)
+			flat = flattened(tree)
+			self.assertEqual(flat.toInfixNotation(), tree.toInfixNotation())
+			self.assertEqual(flat.toPolishNotation(), tree.toPolishNotation())
+			self.assertEqual(flat.toReversePolishNotation(), tree.toReversePolishNotation())
+			self.assertEqual(str(flat), str(tree))
+
+	# Other chains have the same Infix Notation, and the other notations parse back into the flattened tree
+	def test_notation_nested(self):
+		for expression in EXPRESSIONS:
+			tree = expressionparse.Tree(expression)
+			flat = flattened(tree)
+			self.assertEqual(flat.toInfixNotation(), tree.toInfixNotation())
+			self.assertEqual(flattened(expressionparse.Tree(flat.toPolishNotation())), flat)
+			self.assertEqual(flattened(expressionparse.Tree(flat.toReversePolishNotation())), flat)
+
+	# All of the ways of evaluating a tree agree with the binary tree
+	def test_evaluate(self):
+		for expression in EXPRESSIONS:
+			tree = expressionparse.Tree(expression)
+			tree.setVariables(VARIABLES)
+			flat = flattened(tree)
+			expected = tree.evaluate()
+			self.assertAlmostEqual(flat.evaluate(), expected)
+			self.assertAlmostEqual(flat.evaluateIncremental(), expected)
+			self.assertAlmostEqual(flat.compile()(), expected)
+			self.assertAlmostEqual(flat.freeze().evaluate(), expected)
+			self.assertAlmostEqual(flat.copy().evaluate(), expected)
+
+	# Gradients agree with the binary tree, including products with a zero operand
+	def test_gradient(self):
+		for expression in EXPRESSIONS + ['x*y*z*w']:
+			tree = expressionparse.Tree(expression)
+			tree.setVariables(dict(VARIABLES, z=0))
+			value, gradient = flattened(tree).gradient()
+			expected_value, expected_gradient = tree.gradient()
+			self.assertAlmostEqual(value, expected_value)
+			for name in expected_gradient:
+				self.assertAlmostEqual(gradient[name], expected_gradient[name])
+
+	@unittest.skipUnless(numpy, 'NumPy is not installed')
+	def test_batch(self):
+		tree = expressionparse.Tree('x*y*z + x + y + 1')
+		columns = dict((name, numpy.arange(1.0, 5.0) * value) for name, value in VARIABLES.items())
+		self.assertTrue(numpy.allclose(flattened(tree).evaluateBatch(**columns), tree.evaluateBatch(**columns)))
+
+	# Setting a variable in a flattened tree only recomputes its chain
+	def test_incremental(self):
+		tree = expressionparse.Tree('+'.join(['x', 'y'] * 1000))
+		tree.flatten()
+		tree.setVariables({'x': 1, 'y': 2})
+		self.assertEqual(tree.evaluateIncremental(), 3000)
+		tree.setVariable('x', 2)
+		self.assertEqual(tree.evaluateIncremental(), 4000)
+		self.assertEqual(tree.recomputed, 1)
+
+	# Long chains become shallow trees
+	def test_depth(self):
+		tree = expressionparse.Tree('*'.join(['2'] * 10000))
+		self.assertEqual(tree.flatten(), 9998)
+		self.assertEqual(len(tree.root.children), 10000)
+		self.assertEqual(expressionparse.Tree('+'.join(['1'] * 100000)).copy().flatten(), 99998)
+
+	# Children can be added and removed
+	def test_children(self):
+		node = expressionparse.Sum()
+		self.assertRaises(expressionparse.NodeException, node.removeChild)
+		for value in [1, 2, 3]:
+			self.assertTrue(node.addWhereOpen(expressionparse.Value(value)))
+		self.assertEqual(node.evaluate(), 6)
+		self.assertEqual(node.removeChild().evaluate(), 3)
+		self.assertEqual(node.evaluate(), 3)
+		self.assertEqual(node, flattened(expressionparse.Tree('1+2')).root)
+
+	# Flattened trees are equal to each other and hash the same way
+	def test_equality(self):
+		first = flattened(expressionparse.Tree('x+y+z'))
+		self.assertEqual(first, flattened(expressionparse.Tree('x+y+z')))
+		self.assertEqual(hash(first.root), hash(flattened(expressionparse.Tree('x+y+z')).root))
+		self.assertNotEqual(first, flattened(expressionparse.Tree('x+y+z+w')))
+		self.assertNotEqual(first, expressionparse.Tree('x+y+z'))
+
+	# Simplifying folds all of the constant operands of a chain together
+	def test_simplify(self):
+		simplified = expressionparse.simplify(flattened(expressionparse.Tree('-2+x+3')).root)
+		self.assertEqual(simplified.toInfixNotation(), '1 + x')
+		simplified = expressionparse.simplify(flattened(expressionparse.Tree('2*x*3*y')).root)
+		self.assertEqual(simplified.toInfixNotation(), '6 * xy')
+		self.assertEqual(expressionparse.simplify(flattened(expressionparse.Tree('1+2+3')).root), 6)
+
+	# Factoring a flattened tree gives the same result as factoring the binary tree
+	def test_factor(self):
+		for expression in ['x*y + x*z', 'x*y*z + x*y*w', '2x+2y+2z']:
+			tree = expressionparse.Tree(expression)
+			factored = flattened(tree).root.factor()
+			self.assertEqual(factored.toInfixNotation(), tree.root.factor().toInfixNotation())
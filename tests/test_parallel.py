@@ -0,0 +1,59 @@
+# Expressionparse v0.2 -- Create syntax trees for mathematical expressions
+#
+# Copyright (C) 2025, Peter Beard <github@peterbeard.co>
+# 
+# This file is part of Expressionparse.
+# 
+# Expressionparse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# Expressionparse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
+
+import array
+import expressionparse
+import unittest
+
+
+# Tests for evaluating a tree over a table of variable values with worker processes
+class TestParallelEvaluation(unittest.TestCase):
+	def setUp(self):
+		self.tree = expressionparse.Tree('3x^2 + 2y - 4/(x+1) + z!')
+		self.tree.setVariable('z', 3)
+		self.xs = array.array('d', [i / 7.0 for i in range(500)])
+		self.ys = [i % 11 - 5 for i in range(500)]
+
+	# Compare the results with evaluating each row on its own
+	def check(self, results):
+		self.assertEqual(len(results), 500)
+		for x, y, result in zip(self.xs, self.ys, results):
+			self.tree.setVariables({'x': x, 'y': y})
+			self.assertEqual(result, self.tree.evaluate())
+
+	# Evaluate in this process
+	def test_single_worker(self):
+		self.check(self.tree.evaluateParallel(workers=1, x=self.xs, y=self.ys))
+
+	# Evaluate with several workers and chunks that don't divide the rows evenly
+	def test_workers(self):
+		self.check(self.tree.evaluateParallel(workers=3, chunk_size=37, x=self.xs, y=self.ys))
+
+	# Errors in a row are raised
+	def test_errors(self):
+		tree = expressionparse.Tree('1/x')
+		self.assertRaises(ZeroDivisionError, tree.evaluateParallel, workers=2, x=[1, 0, 2])
+		self.assertRaises(expressionparse.EvalException, expressionparse.Tree('x^0.5').evaluateParallel, workers=1, x=[-1])
+		self.assertRaises(expressionparse.EvalException, tree.evaluateParallel, workers=1, y=[1])
+
+	# The columns have to line up
+	def test_columns(self):
+		self.assertRaises(ValueError, self.tree.evaluateParallel)
+		self.assertRaises(ValueError, self.tree.evaluateParallel, x=[1, 2], y=[1])
+		self.assertEqual(len(self.tree.evaluateParallel(x=[], y=[])), 0)
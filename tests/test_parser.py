@@ -116,3 +116,59 @@ class TestParser(unittest.TestCase):
         self.assertEqual(self.tree.evaluate(), 9)
 
 
+    # Subtraction and division chains are evaluated from left to right
+    def testLeftToRight(self):
+        self.tree.parse('1-2-3')
+        self.assertEqual(self.tree.evaluate(), -4)
+        self.tree.parse('8/4/2')
+        self.assertEqual(self.tree.evaluate(), 1)
+        self.tree.parse('1-2+3')
+        self.assertEqual(self.tree.evaluate(), 2)
+        self.tree.parse('2^3^2')
+        self.assertEqual(self.tree.evaluate(), 512)
+
+    # Operations of three different weights in one expression
+    def testMixedPrecedence(self):
+        self.tree.parse('1+2*3^2')
+        self.assertEqual(self.tree.evaluate(), 19)
+        self.tree.parse('1+2^3*4')
+        self.assertEqual(self.tree.evaluate(), 33)
+        self.tree.parse('1+2*3^2!')
+        self.assertEqual(self.tree.evaluate(), 19)
+        self.tree.parse('3!-2')
+        self.assertEqual(self.tree.evaluate(), 4)
+        self.tree.parse('((x+1)*(y-2)+x*y)/(x^2+y^2+1)-3x+2y^3')
+        self.tree.setVariables({'x': 1, 'y': 2})
+        self.assertEqual(self.tree.evaluate(), 2/6.0 - 3 + 16)
+
+    # Parenthesised single values
+    def testParenthesisedValue(self):
+        self.tree.parse('(3)')
+        self.assertEqual(self.tree.root, expressionparse.Value('3'))
+        self.tree.parse('2*(3)!')
+        self.assertEqual(self.tree.evaluate(), 12)
+
+    # Deeply nested parentheses
+    def testDeepNesting(self):
+        self.tree.parse('(' * 10000 + '1+2' + ')' * 10000)
+        self.assertEqual(self.tree.root.toPolishNotation(), '+ 1 2')
+        self.assertIsNone(self.tree.root.parent)
+
+    # Malformed expressions
+    def testMalformed(self):
+        for expression in ['1+', '*2', '()', '2(+)', '(1+)*2', '-x']:
+            with self.assertRaises(expressionparse.ParseException):
+                self.tree.parse(expression)
+
+    # Literals are parsed into numbers once and keep their original text for output
+    def testParsedLiteral(self):
+        self.tree.parse('2.50*3')
+        self.assertEqual(self.tree.root.left.number, 2.5)
+        self.assertEqual(self.tree.root.left.value, '2.50')
+        self.assertEqual(self.tree.toInfixNotation(), '2.50 * 3')
+        self.assertEqual(self.tree.copy().root.left.number, 2.5)
+        value = expressionparse.Value()
+        self.assertIsNone(value.number)
+        value.append(4)
+        value.append(2)
+        self.assertEqual(value.evaluate(), 42.0)
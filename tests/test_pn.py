@@ -17,7 +17,7 @@
 # You should have received a copy of the GNU General Public License
 # along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
 
-from expressionparse import Tree
+from expressionparse import Tree, ParseException
 import unittest
 
 
@@ -63,3 +63,39 @@ class TestPolishNotation(unittest.TestCase):
     def test_parentheses(self):
         tree = Tree("(3 + 4) * (5 + 6)")
         self.assertEqual(tree.toPolishNotation(), "* + 3 4 + 5 6")
+
+
+# Tests for parsing expressions written in Polish Notation
+class TestPolishNotationParser(unittest.TestCase):
+    def test_parse(self):
+        tree = Tree()
+        tree.parsePolishNotation("+ 3 * 4 5")
+        self.assertEqual(tree, Tree("3 + 4 * 5"))
+        tree.parsePolishNotation("! - 5 2")
+        self.assertEqual(tree.evaluate(), 6)
+
+    def test_round_trip(self):
+        for expression in ["1-2-3", "2^3^2", "(3 + 4) * (5 + 6)", "x*3+y!-2^x/4-(-2)", "-1.5/x"]:
+            tree = Tree(expression)
+            parsed = Tree()
+            parsed.parsePolishNotation(tree.toPolishNotation())
+            self.assertEqual(parsed, tree)
+            self.assertIsNone(parsed.root.parent)
+
+    def test_bound_variable(self):
+        tree = Tree()
+        tree.parsePolishNotation("* {x=2} 3")
+        self.assertEqual(tree.evaluate(), 6)
+        tree.setVariable('x', 3)
+        self.assertEqual(tree.evaluate(), 9)
+
+    def test_detect(self):
+        self.assertEqual(Tree("- 3 4").evaluate(), -1)
+        self.assertEqual(Tree("* + 3 4 + 5 6"), Tree("(3 + 4) * (5 + 6)"))
+        # Infix expressions that start with a negative number aren't mistaken for Polish Notation
+        self.assertEqual(Tree("- 2 + 3").evaluate(), 1)
+
+    def test_malformed(self):
+        tree = Tree()
+        for expression in ["+ 1", "+ 1 2 3", "* ( 1 2", "+ 1 2.3.4", "! {x} 1"]:
+            self.assertRaises(ParseException, tree.parsePolishNotation, expression)
@@ -0,0 +1,131 @@
+# Expressionparse v0.2 -- Create syntax trees for mathematical expressions
+#
+# Copyright (C) 2025, Peter Beard <github@peterbeard.co>
+# 
+# This file is part of Expressionparse.
+# 
+# Expressionparse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# Expressionparse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
+
+import expressionparse
+import unittest
+
+
+# Tests for profiling the phases of the pipeline
+class TestProfiling(unittest.TestCase):
+	def tearDown(self):
+		expressionparse.disableProfiling()
+		expressionparse.disableParseCache()
+
+	# Nothing is recorded unless profiling is enabled
+	def test_disabled(self):
+		self.assertIsNone(expressionparse.getProfiler())
+		expressionparse.Tree('x+1').root.factor()
+		profiler = expressionparse.enableProfiling()
+		self.assertIs(expressionparse.getProfiler(), profiler)
+		self.assertEqual(profiler.snapshot(), {'phases': {}, 'visits': {}, 'parseCache': {'hits': 0, 'misses': 0}})
+		expressionparse.disableProfiling()
+		expressionparse.Tree('1+2').evaluate()
+		self.assertEqual(profiler.snapshot()['phases'], {})
+
+	# Each phase records the number of calls and the time they took
+	def test_phases(self):
+		with expressionparse.profiling() as profiler:
+			tree = expressionparse.Tree('(x+1)*(y-2)')
+			tree.setVariables({'x': 1, 'y': 6})
+			tree.setVariable('x', 2)
+			tree.evaluate()
+			expressionparse.simplify(tree.root)
+			tree.root.factor()
+			expressionparse.Tokenizer('1+2')
+			expressionparse.Tree('+ 1 2')
+			expressionparse.Tree('1 2 +')
+		phases = profiler.snapshot()['phases']
+		calls = dict((phase, record['calls']) for phase, record in phases.items())
+		self.assertEqual(calls, {'tokenize': 2, 'parse': 3, 'setVariable': 2, 'evaluate': 1, 'simplify': 1, 'factor': 1})
+		for record in phases.values():
+			self.assertGreater(record['seconds'], 0)
+		self.assertIsNone(expressionparse.getProfiler())
+
+	# Nested calls in the same phase are only recorded once
+	def test_nested(self):
+		tree = expressionparse.Tree('x*2+1')
+		tree.setVariable('x', 3)
+		with expressionparse.profiling() as profiler:
+			self.assertEqual(tree.evaluate(), 7)
+			self.assertEqual(tree.root.evaluate(), 7)
+		self.assertEqual(profiler.snapshot()['phases']['evaluate']['calls'], 2)
+
+	# Every operation that's evaluated, simplified, or factored is counted by type
+	def test_visits(self):
+		tree = expressionparse.Tree('(x+1)*(y-2) + 3!')
+		tree.setVariables({'x': 1, 'y': 6})
+		with expressionparse.profiling() as profiler:
+			tree.evaluate()
+			expressionparse.simplify(tree.root)
+			expressionparse.Tree('x*y+x*z').root.factor()
+		visits = profiler.snapshot()['visits']
+		self.assertEqual(visits['evaluate'], {'Plus': 2, 'Minus': 1, 'Times': 1, 'Factorial': 1})
+		self.assertEqual(visits['simplify'], visits['evaluate'])
+		self.assertEqual(visits['factor'], {'Plus': 1, 'Times': 2})
+
+	# Incremental evaluation only visits the operations that are recomputed, and shared nodes are visited once
+	def test_visits_cached(self):
+		tree = expressionparse.Tree('(x+1)*(y-2) + (x+1)')
+		tree.setVariables({'x': 1, 'y': 6})
+		tree.evaluateIncremental()
+		tree.setVariable('y', 3)
+		with expressionparse.profiling() as profiler:
+			tree.evaluateIncremental()
+			self.assertEqual(profiler.snapshot()['visits']['evaluate'], {'Plus': 1, 'Minus': 1, 'Times': 1})
+			profiler.reset()
+			tree.shareSubtrees()
+			tree.evaluate()
+			self.assertEqual(profiler.snapshot()['visits']['evaluate'], {'Plus': 2, 'Minus': 1, 'Times': 1})
+
+	# Parse cache lookups are counted
+	def test_parse_cache(self):
+		expressionparse.enableParseCache()
+		with expressionparse.profiling() as profiler:
+			for expression in ['x+1', 'x+1', 'y', 'x+1']:
+				expressionparse.Tree(expression)
+		self.assertEqual(profiler.snapshot()['parseCache'], {'hits': 2, 'misses': 2})
+
+	# Resetting forgets everything, and snapshots don't change afterwards
+	def test_reset(self):
+		with expressionparse.profiling() as profiler:
+			expressionparse.Tree('1+2').evaluate()
+			snapshot = profiler.snapshot()
+			profiler.reset()
+			self.assertEqual(profiler.snapshot()['phases'], {})
+		self.assertEqual(snapshot['phases']['evaluate']['calls'], 1)
+		self.assertEqual(snapshot['visits']['evaluate'], {'Plus': 1})
+
+	# Profiling doesn't change any results, including exceptions
+	def test_results(self):
+		with expressionparse.profiling() as profiler:
+			tree = expressionparse.Tree('x/0')
+			tree.setVariable('x', 1)
+			self.assertRaises(ZeroDivisionError, tree.evaluate)
+			self.assertRaises(expressionparse.ParseException, expressionparse.Tree, '1+')
+			self.assertEqual(expressionparse.Tree('2^10').evaluate(), 1024)
+		self.assertEqual(profiler.snapshot()['phases']['evaluate']['calls'], 2)
+
+	# The previous profiler is restored when the with statement ends
+	def test_restore(self):
+		outer = expressionparse.enableProfiling()
+		with expressionparse.profiling() as inner:
+			expressionparse.Tree('1+2').evaluate()
+		self.assertIs(expressionparse.getProfiler(), outer)
+		self.assertEqual(outer.snapshot()['phases'], {})
+		self.assertEqual(inner.snapshot()['phases']['evaluate']['calls'], 1)
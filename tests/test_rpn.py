@@ -17,7 +17,7 @@
 # You should have received a copy of the GNU General Public License
 # along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
 
-from expressionparse import Tree
+from expressionparse import Tree, EvalException, ParseException, evaluateReversePolishNotation
 import unittest
 
 
@@ -65,3 +65,46 @@ class TestReversePolishNotation(unittest.TestCase):
     def test_parentheses(self):
         tree = Tree("(3 + 4) * (5 + 6)")
         self.assertEqual(tree.toReversePolishNotation(), "3 4 + 5 6 + *")
+
+
+# Tests for parsing and evaluating expressions written in Reverse Polish Notation
+class TestReversePolishNotationParser(unittest.TestCase):
+    def test_parse(self):
+        tree = Tree()
+        tree.parseReversePolishNotation("3 4 5 * +")
+        self.assertEqual(tree, Tree("3 + 4 * 5"))
+        tree.parseReversePolishNotation("5 2 - !")
+        self.assertEqual(tree.evaluate(), 6)
+
+    def test_round_trip(self):
+        for expression in ["1-2-3", "2^3^2", "(3 + 4) * (5 + 6)", "x*3+y!-2^x/4-(-2)", "-1.5/x"]:
+            tree = Tree(expression)
+            parsed = Tree()
+            parsed.parseReversePolishNotation(tree.toReversePolishNotation())
+            self.assertEqual(parsed, tree)
+
+    def test_detect(self):
+        self.assertEqual(Tree("3 4 -").evaluate(), -1)
+        self.assertEqual(Tree("1 2 + !").evaluate(), 6)
+        self.assertEqual(Tree("3 4 + 5 6 + *"), Tree("(3 + 4) * (5 + 6)"))
+
+    def test_malformed(self):
+        tree = Tree()
+        for expression in ["1 +", "1 2 3 +", "1 2 ) +"]:
+            self.assertRaises(ParseException, tree.parseReversePolishNotation, expression)
+
+    def test_evaluate(self):
+        for expression in ["1-2-3", "2^3^2", "(3 + 4) * (5 + 6)", "5!/3", "-2^0.5"]:
+            tree = Tree(expression)
+            self.assertEqual(evaluateReversePolishNotation(tree.toReversePolishNotation()), tree.evaluate())
+        self.assertEqual(evaluateReversePolishNotation(["2", "3", "^", "!"]), 40320)
+
+    def test_evaluate_variables(self):
+        self.assertEqual(evaluateReversePolishNotation("x y * 1 +", {'x': 2, 'y': 3}), 7)
+        self.assertEqual(evaluateReversePolishNotation("{x=2} 3 *"), 6)
+        self.assertEqual(evaluateReversePolishNotation("{x=2} 3 *", {'x': 4}), 12)
+        self.assertRaises(EvalException, evaluateReversePolishNotation, "x 1 +")
+
+    def test_evaluate_malformed(self):
+        for expression in ["1 +", "1 2", "", "!", "1 2.3.4 +"]:
+            self.assertRaises(ParseException, evaluateReversePolishNotation, expression)
@@ -0,0 +1,94 @@
+# Expressionparse v0.2 -- Create syntax trees for mathematical expressions
+#
+# Copyright (C) 2025, Peter Beard <github@peterbeard.co>
+# 
+# This file is part of Expressionparse.
+# 
+# Expressionparse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# Expressionparse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
+
+import expressionparse
+import unittest
+
+
+# An addition that counts how many times it's been applied
+class CountingPlus(expressionparse.Plus):
+    count = 0
+
+    def operate(self, lvalue, rvalue):
+        CountingPlus.count += 1
+        return super(CountingPlus, self).operate(lvalue, rvalue)
+
+
+# Tests for merging identical subtrees
+class TestSharedSubtrees(unittest.TestCase):
+    # Identical subtrees become a single node
+    def test_share(self):
+        tree = expressionparse.Tree('(x+1)^2*(x+1)^3 + (x+1)')
+        self.assertEqual(tree.shareSubtrees(), 6)
+        self.assertTrue(tree.hasSharedSubtrees())
+        first = tree.root.left.left.left
+        self.assertIs(first, tree.root.left.right.left)
+        self.assertIs(first, tree.root.right)
+
+    # Output and equality don't change
+    def test_unchanged(self):
+        expression = '(x+1)^2*(x+1)^3 + (x+1) - 2(x+1)'
+        tree = expressionparse.Tree(expression)
+        tree.shareSubtrees()
+        original = expressionparse.Tree(expression)
+        self.assertEqual(tree, original)
+        self.assertEqual(tree.toInfixNotation(), original.toInfixNotation())
+        self.assertEqual(tree.toPolishNotation(), original.toPolishNotation())
+        self.assertEqual(tree.toReversePolishNotation(), original.toReversePolishNotation())
+        self.assertEqual(str(tree), str(original))
+        tree.setVariable('x', 2)
+        original.setVariable('x', 2)
+        self.assertEqual(tree.evaluate(), original.evaluate())
+
+    # Shared nodes are only evaluated once
+    def test_evaluate_once(self):
+        nodes = []
+        for i in range(2):
+            node = CountingPlus()
+            node.addChild(expressionparse.Variable('x'))
+            node.addChild(expressionparse.Value('1'))
+            nodes.append(node)
+        root = expressionparse.Times()
+        root.addChild(nodes[0])
+        root.addChild(nodes[1])
+        tree = expressionparse.Tree()
+        tree.root = root
+        tree.setVariable('x', 2)
+        CountingPlus.count = 0
+        self.assertEqual(tree.evaluate(), 9)
+        self.assertEqual(CountingPlus.count, 2)
+        tree.shareSubtrees()
+        CountingPlus.count = 0
+        self.assertEqual(tree.evaluate(), 9)
+        self.assertEqual(CountingPlus.count, 1)
+
+    # Variables that occur in more than one place are shared too
+    def test_variables(self):
+        tree = expressionparse.Tree('x*y + x*y + x')
+        tree.shareSubtrees()
+        self.assertEqual(len(tree.getVariableIndex()['x']), 1)
+        tree.setVariables({'x': 2, 'y': 3})
+        self.assertEqual(tree.evaluate(), 14)
+
+    # Replacing the root turns sharing off
+    def test_parse_again(self):
+        tree = expressionparse.Tree('1+1')
+        tree.shareSubtrees()
+        tree.parse('2+2')
+        self.assertFalse(tree.hasSharedSubtrees())
@@ -17,7 +17,7 @@
 # You should have received a copy of the GNU General Public License
 # along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
 
-from expressionparse import Tree, simplify
+from expressionparse import Tree, Value, simplify
 import unittest
 
 
@@ -48,3 +48,48 @@ class TestSimplify(unittest.TestCase):
         tree = Tree("x")
         tree.setVariable("x", 5)
         self.assertEqual(simplify(tree.root), 5.0)
+
+    # Constants under variables are folded into values, and the new tree has consistent parent links
+    def test_parent_links(self):
+        tree = Tree("(1+2)*x + 3!*y/4")
+        simplified = simplify(tree.root)
+        self.assertEqual(simplified.toInfixNotation(), "3x + 6 * y / 4")
+        self.assertIsNone(simplified.parent)
+        stack = [simplified]
+        while stack:
+            node = stack.pop()
+            for child in (getattr(node, 'left', None), getattr(node, 'right', None)):
+                if child is not None:
+                    self.assertIs(child.parent, node)
+                    stack.append(child)
+        # The original tree isn't changed
+        self.assertEqual(tree, Tree("(1+2)*x + 3!*y/4"))
+
+    def test_folded_values(self):
+        simplified = simplify(Tree("x * (1/4)").root)
+        self.assertIsInstance(simplified.right, Value)
+        self.assertEqual(simplified.right.value, "0.25")
+        self.assertEqual(simplified.right.number, 0.25)
+
+    # Constants that can't be written as literals are kept as they are
+    def test_unfoldable_constants(self):
+        tree = Tree("(-1)^0.5 * x + 200! * y")
+        self.assertEqual(simplify(tree.root), tree.root)
+
+    # Constants whose evaluation fails with an arithmetic error are kept as they are
+    def test_arithmetic_errors(self):
+        for expression in ["x+0^-1", "x+10^1000", "x*(0^-1)!"]:
+            tree = Tree(expression)
+            self.assertEqual(simplify(tree.root), tree.root)
+        tree = Tree("x+0^-1+10^1000")
+        tree.flatten()
+        self.assertEqual(simplify(tree.root), tree.root)
+
+    # Deep trees are simplified without recursion
+    def test_deep_tree(self):
+        tree = Tree()
+        tree.parseReversePolishNotation("x" + " 2 3 * +" * 20000)
+        simplified = simplify(tree.root)
+        self.assertEqual(simplified.right, 6)
+        tree.setVariable("x", 1)
+        self.assertEqual(simplify(tree.root), 120001)
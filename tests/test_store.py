@@ -0,0 +1,117 @@
+# Expressionparse v0.2 -- Create syntax trees for mathematical expressions
+#
+# Copyright (C) 2025, Peter Beard <github@peterbeard.co>
+# 
+# This file is part of Expressionparse.
+# 
+# Expressionparse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# Expressionparse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
+
+import expressionparse
+import os
+import tempfile
+import unittest
+
+
+EXPRESSIONS = ['x*3.50+y!-2^x/4-(-2)', '1+2', 'z^2', '(a+b)*(a-b)/7']
+
+
+# Tests for the binary encoding of trees
+class TestEncoding(unittest.TestCase):
+	# Encoding and decoding gives back an equal tree
+	def test_round_trip(self):
+		for expression in EXPRESSIONS:
+			tree = expressionparse.Tree(expression)
+			tree.setVariable('x', 2)
+			decoded = expressionparse.FlatTree.decode(tree.freeze().encode()).toTree()
+			self.assertEqual(decoded, tree)
+			self.assertEqual(decoded.toInfixNotation(), tree.toInfixNotation())
+
+	# Operands get wider when there are lots of constants
+	def test_wide_operands(self):
+		for count in [300, 70000]:
+			tree = expressionparse.Tree('+'.join(str(i) for i in range(count)))
+			data = tree.freeze().encode()
+			self.assertEqual(expressionparse.FlatTree.decode(data).evaluate(), tree.evaluate())
+
+	# Long constants and names are encoded with a longer length
+	def test_long_strings(self):
+		tree = expressionparse.Tree('1.' + '0' * 300 + '+x')
+		self.assertEqual(expressionparse.FlatTree.decode(tree.freeze().encode()).toTree(), tree)
+
+	# Bad data raises a ParseException
+	def test_corrupt(self):
+		data = expressionparse.Tree(EXPRESSIONS[0]).freeze().encode()
+		for end in range(len(data)):
+			self.assertRaises(expressionparse.ParseException, expressionparse.FlatTree.decode, data[:end])
+		self.assertRaises(expressionparse.ParseException, expressionparse.FlatTree.decode, b'EXPT\x02' + data[5:])
+
+	# Operands and opcodes that don't fit the rest of the data are caught when decoding
+	def test_bad_operands(self):
+		data = expressionparse.Tree('x+1').freeze().encode()
+		self.assertEqual(expressionparse.FlatTree.decode(data).toTree(), expressionparse.Tree('x+1'))
+		# The opcodes start at byte 18 and the operands of the two leaves follow them
+		for position, byte in [(21, 3), (22, 5), (20, 9), (19, 2)]:
+			corrupt = bytearray(data)
+			corrupt[position] = byte
+			self.assertRaises(expressionparse.ParseException, expressionparse.FlatTree.decode, bytes(corrupt))
+		self.assertRaises(expressionparse.ParseException, expressionparse.FlatTree.decode, data.replace(b'\x011', b'\x01a'))
+
+	# Variables need numeric values to be encoded
+	def test_bad_value(self):
+		tree = expressionparse.Tree('x+1')
+		tree.setVariable('x', 'abc')
+		self.assertRaises(expressionparse.NodeException, tree.freeze().encode)
+
+
+# Tests for files of encoded trees
+class TestExpressionStore(unittest.TestCase):
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.path = os.path.join(self.directory, 'expressions.store')
+
+	def tearDown(self):
+		if os.path.exists(self.path):
+			os.remove(self.path)
+		os.rmdir(self.directory)
+
+	# Trees come back out in the same order
+	def test_store(self):
+		trees = [expressionparse.Tree(expression) for expression in EXPRESSIONS]
+		self.assertEqual(expressionparse.ExpressionStore.write(self.path, trees), len(trees))
+		with expressionparse.ExpressionStore(self.path) as store:
+			self.assertEqual(len(store), len(trees))
+			self.assertEqual(list(store), trees)
+			self.assertEqual(store[-1], trees[-1])
+			self.assertEqual(store.getFlatTree(1).evaluate(), 3.0)
+			self.assertRaises(IndexError, store.__getitem__, len(trees))
+
+	# Expressions are parsed before they're stored
+	def test_expressions(self):
+		expressionparse.ExpressionStore.write(self.path, EXPRESSIONS)
+		with expressionparse.ExpressionStore(self.path) as store:
+			self.assertEqual(store[2], expressionparse.Tree('z^2'))
+
+	# An empty store
+	def test_empty(self):
+		expressionparse.ExpressionStore.write(self.path, [])
+		with expressionparse.ExpressionStore(self.path) as store:
+			self.assertEqual(len(store), 0)
+			self.assertEqual(list(store), [])
+
+	# Other files are rejected
+	def test_not_a_store(self):
+		for data in [b'', b'hello world, this is not a store at all']:
+			with open(self.path, 'wb') as f:
+				f.write(data)
+			self.assertRaises(expressionparse.ParseException, expressionparse.ExpressionStore, self.path)
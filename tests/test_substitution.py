@@ -51,3 +51,48 @@ class TestSubstitution(unittest.TestCase):
 		self.tree.setVariable('y',2)
 		self.assertEqual(self.tree.evaluate(), 4)
 
+	# Set several variables at once
+	def test_set_variables(self):
+		self.tree.parse('x+y+1+x')
+		self.tree.setVariables({'x': 1, 'y': 2})
+		self.assertEqual(self.tree.evaluate(), 5)
+
+	# Variables that don't occur in the tree are ignored
+	def test_set_missing_variable(self):
+		self.tree.parse('x+1')
+		self.tree.setVariables({'x': 1, 'z': 2})
+		self.assertEqual(self.tree.evaluate(), 2)
+
+	# Variables under a unary operator
+	def test_factorial_variable(self):
+		self.tree.parse('(x+1)!')
+		self.tree.setVariable('x', 2)
+		self.assertEqual(self.tree.evaluate(), 6)
+
+	# The variable index maps names to every node where the variable occurs
+	def test_variable_index(self):
+		self.tree.parse('x+y*x')
+		index = self.tree.getVariableIndex()
+		self.assertEqual(sorted(index), ['x', 'y'])
+		self.assertEqual(len(index['x']), 2)
+		self.assertTrue(all(isinstance(node, expressionparse.Variable) for node in index['x']))
+
+	# Replacing the root of the tree replaces the index
+	def test_replace_root(self):
+		self.tree.parse('x+1')
+		self.tree.root = expressionparse.Variable('y')
+		self.tree.setVariable('y', 3)
+		self.assertEqual(self.tree.evaluate(), 3)
+
+	# Variables store the number they're given
+	def test_raw_value(self):
+		var = expressionparse.Variable('x')
+		var.set(2)
+		self.assertEqual(var.value, 2)
+		self.assertEqual(str(var), '{x=2}')
+		var.set(expressionparse.Value('1.5'))
+		self.assertEqual(var.value, 1.5)
+		self.assertEqual(var.evaluate(), 1.5)
+		var.set('abc')
+		self.assertRaises(expressionparse.EvalException, var.evaluate)
+		self.assertEqual(str(var), 'x')
@@ -0,0 +1,94 @@
+# Expressionparse v0.2 -- Create syntax trees for mathematical expressions
+#
+# Copyright (C) 2025, Peter Beard <github@peterbeard.co>
+# 
+# This file is part of Expressionparse.
+# 
+# Expressionparse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# Expressionparse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
+
+import expressionparse
+import io
+import types
+import unittest
+
+
+# Describe a list of tokens so they can be compared
+def describe(tokens):
+    described = []
+    for token in tokens:
+        if isinstance(token, expressionparse.Value):
+            described.append(token.value)
+        elif isinstance(token, expressionparse.Variable):
+            described.append('var ' + token.name)
+        elif isinstance(token, expressionparse.Operation):
+            described.append(token.symbol)
+        else:
+            described.append(token)
+    return described
+
+
+# Tests for the tokenizer
+class TestTokenizer(unittest.TestCase):
+    # Numbers, operators, and parentheses
+    def test_simple(self):
+        tokens = describe(expressionparse.tokenize('(12.5 + 3) * 4!'))
+        self.assertEqual(tokens, ['(', '12.5', '+', '3', ')', '*', '4', '!'])
+
+    # Negative numbers versus minus operators
+    def test_negative_numbers(self):
+        self.assertEqual(describe(expressionparse.tokenize('-2^-2')), ['-2', '^', '-2'])
+        self.assertEqual(describe(expressionparse.tokenize('3--2')), ['3', '-', '-2'])
+        self.assertEqual(describe(expressionparse.tokenize('x-1')), ['var x', '-', '1'])
+        self.assertEqual(describe(expressionparse.tokenize('(1)-1')), ['(', '1', ')', '-', '1'])
+
+    # Implicit multiplication is made explicit
+    def test_implicit_multiplication(self):
+        self.assertEqual(describe(expressionparse.tokenize('3xy')), ['3', '*', 'var x', '*', 'var y'])
+        self.assertEqual(describe(expressionparse.tokenize('x2')), ['var x', '*', '2'])
+        self.assertEqual(describe(expressionparse.tokenize('2(x)')), ['2', '*', '(', 'var x', ')'])
+        self.assertEqual(describe(expressionparse.tokenize('(1)(2)x')),
+                         ['(', '1', ')', '*', '(', '2', ')', '*', 'var x'])
+
+    # Tokens are produced lazily
+    def test_generator(self):
+        tokens = expressionparse.tokenize('1+2')
+        self.assertIsInstance(tokens, types.GeneratorType)
+        self.assertEqual(describe([next(tokens)]), ['1'])
+
+    # File-like objects give the same tokens as strings, even when numbers are split across reads
+    def test_file(self):
+        expression = '3x^2 + 12.25y(x-1) - 100/(x+1)'
+        expected = describe(expressionparse.tokenize(expression))
+        for chunk_size in (1, 2, 3, 7, 1024):
+            tokens = expressionparse.tokenize(io.StringIO(expression), chunk_size)
+            self.assertEqual(describe(tokens), expected)
+
+    # Files opened in binary mode are rejected instead of being read forever
+    def test_binary_file(self):
+        with self.assertRaises(expressionparse.TokenizeException):
+            list(expressionparse.tokenize(io.BytesIO(b'1+2')))
+        with self.assertRaises(expressionparse.TokenizeException):
+            expressionparse.Tokenizer(io.BytesIO(b''))
+
+    # The Tokenizer class gives the same tokens
+    def test_tokenizer_class(self):
+        expression = '3x + 9y - 2'
+        self.assertEqual(describe(expressionparse.Tokenizer(expression).tokens),
+                         describe(expressionparse.tokenize(expression)))
+
+    # Unmatched parentheses
+    def test_unmatched(self):
+        for expression in ('1+(2+3', '1+(2+3))', ')1+2('):
+            with self.assertRaises(expressionparse.TokenizeException):
+                list(expressionparse.tokenize(expression))
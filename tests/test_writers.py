@@ -0,0 +1,95 @@
+# Expressionparse v0.2 -- Create syntax trees for mathematical expressions
+#
+# Copyright (C) 2025, Peter Beard <github@peterbeard.co>
+# 
+# This file is part of Expressionparse.
+# 
+# Expressionparse is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+# 
+# Expressionparse is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with Expressionparse. If not, see <http://www.gnu.org/licenses/>.
+
+import expressionparse
+import io
+import os
+import tempfile
+import unittest
+
+
+NOTATIONS = ['infix', 'polish', 'reverse polish', 'string']
+EXPRESSIONS = ['3x^2*y + x*y*z/w', '(3 + 4) * (5 + 6)', '2^3^2', '1-2-3', 'x*3+y!-2^x/4-(-2)', '(x*y)*(2*z)!-1/(a-b)',
+		'x', '2.5']
+
+
+# Return the string a notation is written as by the existing methods
+def written(node, notation):
+	return {
+		'infix': node.toInfixNotation,
+		'polish': node.toPolishNotation,
+		'reverse polish': node.toReversePolishNotation,
+		'string': node.__str__,
+	}[notation]()
+
+
+# Tests for streaming notation output
+class TestWriters(unittest.TestCase):
+	# The pieces join into exactly the same strings as before
+	def test_iterate(self):
+		for expression in EXPRESSIONS:
+			tree = expressionparse.Tree(expression)
+			for notation in NOTATIONS:
+				self.assertEqual(''.join(tree.iterNotation(notation)), written(tree, notation))
+				self.assertEqual(''.join(tree.root.iterNotation(notation)), written(tree.root, notation))
+
+	# Writing to a file-like object writes the same strings and returns their lengths
+	def test_write(self):
+		for expression in EXPRESSIONS:
+			tree = expressionparse.Tree(expression)
+			for notation in NOTATIONS:
+				output = io.StringIO()
+				self.assertEqual(tree.writeNotation(output, notation), len(written(tree, notation)))
+				self.assertEqual(output.getvalue(), written(tree, notation))
+
+	# Variables with values, flattened chains, and shared subtrees are written the same way too
+	def test_special_nodes(self):
+		tree = expressionparse.Tree('x*y*z + 2*x*3 + (x*y)*(x*y)')
+		tree.setVariable('x', 2)
+		for change in [lambda: None, tree.flatten, tree.shareSubtrees]:
+			change()
+			for notation in NOTATIONS:
+				self.assertEqual(''.join(tree.iterNotation(notation)), written(tree, notation))
+
+	# The default notation is infix
+	def test_default(self):
+		tree = expressionparse.Tree('2x+1')
+		self.assertEqual(''.join(tree.iterNotation()), '2x + 1')
+		output = io.StringIO()
+		tree.writeNotation(output)
+		self.assertEqual(output.getvalue(), '2x + 1')
+
+	def test_unknown_notation(self):
+		tree = expressionparse.Tree('1+2')
+		self.assertRaises(ValueError, tree.iterNotation, 'postfix')
+		self.assertRaises(ValueError, tree.writeNotation, io.StringIO(), 'postfix')
+
+	# Huge trees can be written to a file without building the whole string
+	def test_file(self):
+		tree = expressionparse.Tree('(' * 50000 + 'x' + '+1)' * 50000)
+		handle, path = tempfile.mkstemp()
+		try:
+			with os.fdopen(handle, 'w') as output:
+				count = tree.writeNotation(output, 'reverse polish')
+			with open(path) as f:
+				text = f.read()
+		finally:
+			os.remove(path)
+		self.assertEqual(count, len(text))
+		self.assertEqual(text, 'x' + ' 1 +' * 50000)